@@ -18,4 +18,4 @@
 #
 #	This library creates an API for Anritsu nework Generators
 #
-__all__ = ["combined_tests", "port", "stream", "convert_calc", "compare", "error", "analyzer"]
+__all__ = ["combined_tests", "port", "stream", "convert_calc", "compare", "error", "analyzer", "rate", "results", "test_plan", "sweep", "scheduler", "learning", "trace", "loopback", "exporter", "mesh", "audit", "dryrun", "fingerprint", "report", "back_to_back", "broker"]
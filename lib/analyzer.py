@@ -27,48 +27,125 @@ analyzer.py - this module contains the Analyzer class to control an Anritsu gene
 from anritsu import port
 from anritsu import stream
 from anritsu import error
+from anritsu import compare
 from anritsu import input_validator
+from anritsu import rate
+from anritsu import report
 from time import sleep
+try:
+	from time import monotonic
+except ImportError:
+	# Python 2 has no monotonic clock in the standard library
+	from time import time as monotonic
 from sys import stdout
+import math
 import socket
-import texttable
+import threading
 
 class Analyzer:
 	"""Control the analyzer via a TCP socket on port 5001 which subsequently controls the generator.
 
+	An Analyzer can be shared by threads: every request, a port selection with its commands and queries and the replies to them, is sent while holding the lock of the connection, and calls keep their state in locals. Requests of different threads may still interleave between calls, so threads should work on different ports.
+
 	"""
-	def __init__(self, address, anritsu_type):
+	def __init__(self, address, anritsu_type, connection=None):
 		"""Connect to a given analyzer on port 5001, save the given expected Anritsu type. Additionally it waits and cleans old query replies from the Anritsu. This process follows these steps: we start by expecting a reply within 5 seconds. If no reply is received, we assume old queries replies are cleaned. This cleaning process is repeated two times, just to be sure.
 	
 		:param address: host name or IP address
+		:param connection: use this socket-like object instead of connecting to the address, e.g. a loopback.LoopbackSocket as a local stand-in device
 	
 		"""
-		self.socket = socket.create_connection((address, 5001))
+		self.address = address
+		self.connection = connection
 		self.anritsu_type = str.lower(anritsu_type)
-		input_validator.string_set(['md1230b', 'md1260a'], anritsu_type)
+		self.rates = rate.CounterRate()
+		self.monitors = []
+		self.monitor_turn = 0
+		# If False, ports are initialized without clearing the ownership of another user, e.g. by the scheduler on a shared chassis
+		self.clear_ownership = True
+		# Held for every request and its replies on the control connection, so threads can share the Analyzer
+		self.lock = threading.RLock()
+		input_validator.string_set(stream.ANRITSU_TYPES, self.anritsu_type)
+		self.connect()
+	def connect(self):
+		"""Open the socket to the analyzer and clean old query replies, as described in __init__."""
+		if self.connection != None:
+			self.socket = self.connection
+		else:
+			self.socket = self.open_socket()
+		# The control connection as a Connection, for requests which may also go to a monitor connection
+		self.control = Connection(self.socket, self.lock, tracking=False)
+	def open_socket(self):
+		"""Open a new socket to the analyzer on port 5001 and clean old query replies, as described in __init__."""
+		new_socket = socket.create_connection((self.address, 5001))
 		# Cleaning old query replies 
-		self.try_count = 2
-		while self.try_count != 0:
+		try_count = 2
+		while try_count != 0:
 			try:
-				self.socket.settimeout(5)
-				self.socket.recv(1024)
+				new_socket.settimeout(5)
+				new_socket.recv(1024)
 			except socket.timeout:
-				self.try_count = self.try_count - 1
+				try_count = try_count - 1
 			else:
-				self.try_count = self.try_count - 1
+				try_count = try_count - 1
 				print('Received old message, retrying ')
 		# Setting socket timeout back to 20 seconds
-		self.socket.settimeout(20)
+		new_socket.settimeout(20)
+		return new_socket
+	def open_monitor(self, connection=None):
+		"""Open an extra connection to the analyzer, dedicated to read-only monitoring queries. Once opened, read_counter_snapshot, read_port_counter and wait_for_transmission_group use the monitor connections in turn, with their own port selection, so polling doesn't block the configuration of other ports on the control connection. Returns the new Connection.
+
+		:param connection: use this socket-like object instead of connecting to the address
+
+		"""
+		if connection == None:
+			connection = self.open_socket()
+		monitor = Connection(connection)
+		self.monitors.append(monitor)
+		return monitor
+	def monitor(self):
+		"""Return the next monitor connection in turn, or None if no monitor is open."""
+		with self.lock:
+			if not self.monitors:
+				return None
+			self.monitor_turn = (self.monitor_turn + 1) % len(self.monitors)
+			return self.monitors[self.monitor_turn]
+	def polling_connection(self, connection=None):
+		"""Return the given connection, else the next monitor connection in turn, else the control connection.
+
+		:param connection: a Connection or None
+
+		"""
+		if connection == None:
+			connection = self.monitor()
+		if connection == None:
+			connection = self.control
+		return connection
+	def reconnect(self):
+		"""Close the socket and connect again, e.g. after an AnritsuTimeout. The port ownership must be taken again afterwards."""
+		self.disconnect()
+		self.connect()
+	def initialize_block(self, unit, module, port_number):
+		"""Return the pre-joined messages to initialize a port for first use: port.initialize, or port.initialize_shared if clear_ownership is False.
+
+		:param unit: the unit (generator) number as a string to be selected
+		:param module: the module (network card) number as a string to be selected
+		:param port_number: the port number as a string to be selected
+
+		"""
+		if self.clear_ownership:
+			return port.block(port.initialize, unit, module, port_number)
+		return port.block(port.initialize_shared, unit, module, port_number)
 	def port_clear_own(self, unit, module, port_number):
-		"""Clear the counters and take ownership on the given port.
+		"""Clear the counters and take ownership on the given port. The ownership of another user is only cleared if clear_ownership is True.
 
 		:param unit: the unit (generator) number as a string to be selected
 		:param module: the module (network card) number as a string to be selected
 		:param port_number: the port number as a string to be selected with ownership taken and its counters and streams cleared
 
 		"""
-		self.messages = port.initialize(unit, module, port_number)
-		self.send_msg(self.messages)
+		self.send_batch([self.initialize_block(unit, module, port_number)])
+		self.rates.clear(unit, module, port_number)
 	def stream(self, stream_identification_number, unit, module, port_number):
 		"""Create via the stream module a stream and pass the anritsu type to the stream, because the API is different between different Anritsu device types
 
@@ -79,8 +156,7 @@ class Analyzer:
 
 		"""
 		try:
-			self.new_stream = stream.Stream(stream_identification_number, unit, module, port_number, self.anritsu_type)
-			return self.new_stream
+			return stream.Stream(stream_identification_number, unit, module, port_number, self.anritsu_type)
 		except:
 			self.disconnect()
 			raise
@@ -90,37 +166,125 @@ class Analyzer:
 		:param stream_object: a stream object
 
 		"""
-		self.send_msg(stream_object.port_commands)
-		for message, expected_string in stream_object.port_queries.iteritems():
-			self.socket.send(message)
-			try:
-				data = self.socket.recv(1024)
-			except socket.timeout:
-				raise error.AnritsuTimeout(message)
-			if data != expected_string:
-				raise error.AnritsuCommandError(message, expected_string, data)
-		stream_object.commands.append(':TSTReam:TABLe:WRITe\n')
-		self.send_msg(stream_object.commands)
-		#First test with queries the variables of the 'stream setting'
-		for message, expected_string in stream_object.stream_queries.iteritems():
-			self.socket.send(message)
-			try:
-				data = self.socket.recv(1024)
-			except socket.timeout:
-				raise error.AnritsuTimeout(message)
-			if data != expected_string:
-				raise error.AnritsuQueryError(message, expected_string, data)
-		#Then tests with queries the variables of the 'frame settings'.
-		#This seperation of queries was required, as frame settings can't
-		#be tested if the stream setting is untested.
-		for message, expected_string in stream_object.frame_queries.iteritems():
-			self.socket.send(message)
-			try:
-				data = self.socket.recv(1024)
-			except socket.timeout:
-				raise error.AnritsuTimeout(message)
+		with self.lock:
+			self.send_msg(stream_object.port_commands)
+			for message, expected_string in stream_object.port_queries.iteritems():
+				self.socket.send(message)
+				try:
+					data = self.socket.recv(1024)
+				except socket.timeout:
+					raise error.AnritsuTimeout(message)
+				if data != expected_string:
+					raise error.AnritsuCommandError(message, expected_string, data)
+			stream_object.commands.append(':TSTReam:TABLe:WRITe\n')
+			self.send_msg(stream_object.commands)
+			#First test with queries the variables of the 'stream setting'
+			for message, expected_string in stream_object.stream_queries.iteritems():
+				self.socket.send(message)
+				try:
+					data = self.socket.recv(1024)
+				except socket.timeout:
+					raise error.AnritsuTimeout(message)
+				if data != expected_string:
+					raise error.AnritsuQueryError(message, expected_string, data)
+			#Then tests with queries the variables of the 'frame settings'.
+			#This seperation of queries was required, as frame settings can't
+			#be tested if the stream setting is untested.
+			for message, expected_string in stream_object.frame_queries.iteritems():
+				self.socket.send(message)
+				try:
+					data = self.socket.recv(1024)
+				except socket.timeout:
+					raise error.AnritsuTimeout(message)
+				if data != expected_string:
+					raise error.AnritsuQueryError(message, expected_string, data)
+	def stream_commit_batch(self, stream_objects, strict=True):
+		"""Commit several stream objects with one write, followed by one pipelined read of all their verification queries. Per stream the write contains the port selection, the stream commands, the table write and the verification queries, so the queries are answered in the state of their own stream.
+
+		:param stream_objects: a list of stream objects
+		:param strict: if True, raise the first mismatch as an error. If False, return a list with a (stream object, error object) tuple for every mismatch.
+
+		"""
+		return self.stream_commit_encoded(self.encode_commit_batch(stream_objects), strict)
+	def encode_commit_batch(self, stream_objects):
+		"""Encode the commit of several stream objects as done by stream_commit_batch, without sending it, so it can be prepared ahead, e.g. while other ports transmit. Returns a (messages, expected) tuple for stream_commit_encoded.
+
+		:param stream_objects: a list of stream objects
+
+		"""
+		messages = []
+		expected = []
+		for stream_object in stream_objects:
+			messages.extend(stream_object.port_commands)
+			messages.extend(stream_object.commands)
+			if stream_object.commands[-1] != ':TSTReam:TABLe:WRITe\n':
+				messages.append(':TSTReam:TABLe:WRITe\n')
+			for message, expected_string in stream_object.port_queries.iteritems():
+				messages.append(message)
+				expected.append((stream_object, error.AnritsuCommandError, message, expected_string))
+			for message, expected_string in stream_object.stream_queries.iteritems():
+				messages.append(message)
+				expected.append((stream_object, error.AnritsuQueryError, message, expected_string))
+			for message, expected_string in stream_object.frame_queries.iteritems():
+				messages.append(message)
+				expected.append((stream_object, error.AnritsuQueryError, message, expected_string))
+		return (messages, expected)
+	def stream_commit_encoded(self, encoded, strict=True, prefix=None):
+		"""Send a commit encoded by encode_commit_batch with one write and verify it with one pipelined read, see stream_commit_batch.
+
+		:param encoded: the (messages, expected) tuple of encode_commit_batch
+		:param strict: if True, raise the first mismatch as an error. If False, return a list with a (stream object, error object) tuple for every mismatch.
+		:param prefix: an optional list of command messages to send in the same write before the commit, e.g. to initialize the ports
+
+		"""
+		messages, expected = encoded
+		if prefix != None:
+			messages = prefix + messages
+		replies = self.send_recv_batch(messages)
+		mismatches = []
+		for (stream_object, error_class, message, expected_string), data in zip(expected, replies):
 			if data != expected_string:
-				raise error.AnritsuQueryError(message, expected_string, data)
+				if strict:
+					raise error_class(message, expected_string, data)
+				mismatches.append((stream_object, error_class(message, expected_string, data)))
+		return mismatches
+	def stream_update(self, stream_objects, commands):
+		"""Change fields of streams which are already committed, with one write. Per stream the port and the stream ID are selected, the given commands are sent and the table is written, without adding or clearing streams.
+
+		:param stream_objects: a list of committed stream objects
+		:param commands: a list with, per stream object, the list of its command messages to send
+
+		"""
+		messages = []
+		for stream_object, stream_commands in zip(stream_objects, commands):
+			messages.extend(stream_object.port_commands)
+			messages.append(':TSTReam:TABLe:ID ' + str(stream_object.stream_identification_number) + '\n')
+			messages.extend(stream_commands)
+			messages.append(':TSTReam:TABLe:WRITe\n')
+		self.send_batch(messages)
+	def replicate_stream(self, stream_object, ports, peers=None):
+		"""Replicate a configured stream to many ports and commit all copies with one batched, pipelined pass. Every copy gets the port identity in its source MAC address and, if a peer is given, the source MAC address of its peer as destination, see Stream.replicate. Returns a consolidated report: a dictionary with the (unit, module, port) tuple as key and the list of errors of its copy as value, empty for a verified copy.
+
+		:param stream_object: a configured stream object, which is used as template and not changed
+		:param ports: a list of (unit, module, port) tuples
+		:param peers: an optional dictionary with a (unit, module, port) tuple as key and the (unit, module, port) tuple of the port it sends to as value
+
+		"""
+		if peers == None:
+			peers = {}
+		copies = []
+		for location in ports:
+			copies.append(stream_object.replicate(location[0], location[1], location[2], peers.get(location)))
+		mismatches = self.stream_commit_batch(copies, strict=False)
+		report = dict((location, []) for location in ports)
+		for copy, mismatch in mismatches:
+			report[(copy.unit, copy.module, copy.port)].append(mismatch)
+		failed = [location for location in ports if report[location]]
+		print('replicated stream to ' + str(len(ports)) + ' ports, ' + str(len(ports) - len(failed)) + ' verified, ' + str(len(failed)) + ' failed')
+		for location in failed:
+			for mismatch in report[location]:
+				print('/'.join(str(number) for number in location) + ': ' + str(mismatch))
+		return report
 	def get_port_counter(self, unit, module, port_number, counter_name):
 		"""Get a port counter value
 		
@@ -130,14 +294,30 @@ class Analyzer:
 		:param counter_name: the counter that needs to be checked
 
 		"""
-		self.select = port.select(unit, module, port_number)
-		self.send_msg(self.select)
-		self.counter = port.read(counter_name)
-		data = self.send_recv_msg(self.counter)
+		counter_value = self.read_port_counter(unit, module, port_number, counter_name)
+		print('requested counter field = ' + str(counter_value))
+		return counter_value
+	def read_port_counter(self, unit, module, port_number, counter_name):
+		"""Read a port counter value without printing it
+		
+		:param unit: the unit (generator) number as a string to be selected
+		:param module: the module (network card) number as a string to be selected
+		:param port_number: the port number as a string to be selected
+		:param counter_name: the counter that needs to be read
+
+		"""
+		data = self.polling_connection().query([((unit, module, port_number), [port.block(port.read, counter_name)])])[0]
 		datasplit = str.split(data, ',')
-		counter_value = datasplit[1]
-		print('requested counter field = ' + counter_value)
-		return int(counter_value)
+		return int(datasplit[1])
+	def read_flow_counters(self, flows, connection=None):
+		"""Read the received test frames of many flows with one write and one pipelined read. Returns a dictionary with the (location, flow ID) tuple as key and the received test frames of that flow as value.
+
+		:param flows: a list of (location, flow ID) tuples, with the (unit, module, port) tuple of the receiving port as location
+		:param connection: the Connection to read with, defaults to the next monitor connection, or the control connection if none is open
+
+		"""
+		replies = self.polling_connection(connection).query([(location, [port.block(port.read_flow, flow_id)]) for location, flow_id in flows])
+		return dict((flow, int(str.split(data, ',')[1])) for flow, data in zip(flows, replies))
 	def test_port_counter(self, unit, module, port_number, counter_name, val1, val2):
 		"""Get the port counter values and test if its between the expected range
 		
@@ -149,20 +329,10 @@ class Analyzer:
 		:param val2: the value where the range ends
 
 		"""
-		self.select = port.select(unit, module, port_number)
-		self.send_msg(self.select)
-		self.counter = port.read(counter_name)
-		data = self.send_recv_msg(self.counter)
-		datasplit = str.split(data, ',')
-		counter_value = datasplit[1]
-		if int(counter_value) < val1 or int(counter_value) > val2:
-			print('out of range, result = ' + counter_value)
-			return False
-		else:
-			#print('in range, requested counter field = ' + counter_value)
-			return True
+		counter_value = self.read_port_counter(unit, module, port_number, counter_name)
+		return compare.in_range(counter_value, val1, val2)
 	def get_port_counter_group(self, unit1, module1, port_number1, unit2, module2, port_number2, counter_group=None):
-		"""Get a group of counter values 
+		"""Get a group of counter values of two ports and print them as a table, see report.print_counters for any amount of ports and other outputs.
 		
 		:param unit: the unit (generator) number as a string to be selected
 		:param module: the module (network card) number as a string to be selected
@@ -170,89 +340,112 @@ class Analyzer:
 		:param counter_group: the name of the group of counters
 
 		"""
-		description = []
-		counter_value1 = []
-		counter_value2 = []
+		report.print_counters(self, [(unit1, module1, port_number1), (unit2, module2, port_number2)], counter_group, rates=True)
+	def get_port_rates(self, unit, module, port_number, counter_group=None):
+		"""Get the absolute counters of a group and calculate their rates locally from the previous call on the same port, instead of querying the Anritsu rate counters.
 
-		self.select1 = port.select(unit1, module1, port_number1)
-		self.send_msg(self.select1)
-		try:
-			self.messages1 = port.read_group(counter_group, self.anritsu_type)
-		except:
-			self.disconnect()
-			raise
-		for message, desc in sorted(self.messages1.iteritems()):
-			self.socket.send(message)
-			try:
-				data = self.socket.recv(1024)
-			except socket.timeout:
-				raise error.AnritsuTimeout(message)
-			datasplit = str.split(data, ',')
-			description.append(desc)
-			counter_value1.append(datasplit[1])
+		:param unit: the unit (generator) number as a string to be selected
+		:param module: the module (network card) number as a string to be selected
+		:param port_number: the port number as a string to be selected
+		:param counter_group: the name of the group of counters
 
-		self.select2 = port.select(unit2, module2, port_number2)
-		self.send_msg(self.select2)
+		"""
+		counters = {}
 		try:
-			self.messages2 = port.read_group(counter_group, self.anritsu_type)
+			items = port.read_group_items(counter_group, self.anritsu_type, rates=False)
 		except:
 			self.disconnect()
 			raise
-		for message, desc in sorted(self.messages2.iteritems()):
-			self.socket.send(message)
-			try:
-				data = self.socket.recv(1024)
-			except socket.timeout:
-				raise error.AnritsuTimeout(message)
+		# The selection and the queries are one request, so no other thread can select another port in between
+		replies = self.send_recv_batch([port.block(port.select, unit, module, port_number)] + [message for message, desc in items])
+		for (message, desc), data in zip(items, replies):
 			datasplit = str.split(data, ',')
-			counter_value2.append(datasplit[1])
-
-		self.table = texttable.Texttable()
-		self.table.set_cols_dtype(['i', 'i', 'i'])
-		self.table.header(['Counter', 'Int '+ unit1 +'/'+ module1 +'/'+ port_number1, 'Int '+ unit2 +'/'+ module2 +'/'+ port_number2])
-		for teller, i in enumerate(description):
-			self.table.add_row([description[teller], counter_value1[teller], counter_value2[teller]])
-		self.table.add_row(['Counter', 'Int '+ unit1 +'/'+ module1 +'/'+ port_number1, 'Int '+ unit2 +'/'+ module2 +'/'+ port_number2])
-		print(self.table.draw())
+			counters[desc] = int(datasplit[1])
+		counters.update(self.rates.update(unit, module, port_number, counters))
+		return counters
+	def read_counter_snapshot(self, ports, counter_group=None, rates=False, connection=None):
+		"""Read a group of counters of many ports with one write and one pipelined read. Returns a dictionary with the (unit, module, port) tuple as key and a dictionary with the counter description and its integer value as value.
+
+		:param ports: a list of (unit, module, port) tuples
+		:param counter_group: the name of the group of counters
+		:param rates: if True, the Anritsu rate counters are read as well
+		:param connection: the Connection to read with, defaults to the next monitor connection, or the control connection if none is open
+
+		"""
+		# An unsupported group raises before anything is sent, the connection stays usable
+		items = port.read_group_items(counter_group, self.anritsu_type, rates)
+		messages = [message for message, desc in items]
+		replies = self.polling_connection(connection).query([(location, messages) for location in ports])
+		snapshot = {}
+		for teller, location in enumerate(ports):
+			counters = {}
+			for (message, desc), data in zip(items, replies[teller * len(items):(teller + 1) * len(items)]):
+				counters[desc] = int(str.split(data, ',')[1])
+			snapshot[location] = counters
+		return snapshot
 	def send_recv_msg(self, messages):
 		"""To deduce repetitive code of sending a message and waiting for a reply(socket is of blocking type).
 		
 		:param messages: the list of query messages
 
 		"""
-		for message in messages:
-			try:
-				self.socket.send(message)
-				data = self.socket.recv(1024)
-			except socket.timeout:
-				raise error.AnritsuTimeout(message)
-		return data 
+		with self.lock:
+			for message in messages:
+				try:
+					self.socket.send(message)
+					data = self.socket.recv(1024)
+				except socket.timeout:
+					raise error.AnritsuTimeout(message)
+			return data 
+	def send_batch(self, messages):
+		"""Send a list of command messages with one write.
+
+		:param messages: the list of command messages
+
+		"""
+		with self.lock:
+			self.socket.sendall(''.join(messages))
+	def send_recv_batch(self, messages):
+		"""Send a list of command and query messages with one write and read the replies of all queries, instead of waiting for every reply before sending the next query. The replies are returned as a list in the order of the queries.
+
+		:param messages: the list of command and query messages, query messages end with '?\\n'
+
+		"""
+		with self.lock:
+			return send_recv_batch(self.socket, messages)
 	def send_msg(self, messages):
 		"""To deduce repetitive code of sending a message.
 		
 		:param messages: the list of command messages
 
 		"""
-		for message in messages:
-			self.socket.send(message)
-	def count(self, unit1, module1, port_number1, unit2, module2, port_number2):
-		"""Start counting on the port.
+		with self.lock:
+			for message in messages:
+				self.socket.send(message)
+	def count(self, unit1, module1, port_number1, unit2=None, module2=None, port_number2=None):
+		"""Start counting on one or two ports with one write.
 
-		:param selection: a list of messages to select a port
+		:param unit: the unit (generator) number as a string to be selected
+		:param module: the module (network card) number as a string to be selected
+		:param port_number: the port number as a string to be selected
 
 		"""
-		self.messages = port.count(unit1, module1, port_number1, unit2, module2, port_number2)
-		self.send_msg(self.messages)
-	def transmit(self, unit1, module1, port_number1, unit2, module2, port_number2):
-		"""Start transmitting on a port.
+		ports = [(unit1, module1, port_number1)]
+		if port_number2 != None:
+			ports.append((unit2, module2, port_number2))
+		return self.count_transmit_group(ports, [])
+	def transmit(self, unit1, module1, port_number1, unit2=None, module2=None, port_number2=None):
+		"""Start transmitting on one or two ports with one write.
 
 		:param unit: the unit (generator) number as a string to be selected
 		:param module: the module (network card) number as a string to be selected
 		:param port_number: the port number as a string to be selected
 
 		"""
-		self.messages = port.transmit(unit1, module1, port_number1, unit2, module2, port_number2)
-		self.send_msg(self.messages)
+		ports = [(unit1, module1, port_number1)]
+		if port_number2 != None:
+			ports.append((unit2, module2, port_number2))
+		return self.count_transmit_group([], ports)
 	def count_transmit(self, unit1, module1, port_number1, unit2, module2, port_number2):
 		"""Deducing two functions(count() and transmit()) as one function.
 
@@ -261,11 +454,44 @@ class Analyzer:
 		:param port_number: the port number as a string to be selected
 
 		"""
-		self.message = port.count(unit1, module1, port_number1)
-		self.message = self.message + port.count(unit2, module2, port_number2)
-		self.message = self.message + port.transmit(unit1, module1, port_number1)
-		self.message = self.message + port.transmit(unit2, module2, port_number2)
-		self.socket.send(''.join(self.message))
+		return self.count_transmit_group([(unit1, module1, port_number1), (unit2, module2, port_number2)])
+	def count_transmit_group(self, counting_ports, transmitting_ports=None, frame_rate=None):
+		"""Start counting and transmitting on any set of ports, across units and modules, with one write. All counters are started before any transmitter, so no frame is sent to a port which is not counting yet. Returns a Traffic handle with the start time and the involved ports, to pass to the calls which wait for or stop this traffic.
+
+		When the frame rate is given, the skew between the first and last port start is measured: right after the write the transmitted frames of all transmitting ports are read with one pipelined read, and every count is converted into the seconds the port has been transmitting with its frame rate. The skew is the spread of these times. The ports are read forward and then backward and both counts of a port are averaged, so the time the read itself takes cancels out. The skew is only valid while all ports are still transmitting.
+
+		:param counting_ports: a list of (unit, module, port) tuples to start counting on
+		:param transmitting_ports: a list of (unit, module, port) tuples to start transmitting on, defaults to the counting ports
+		:param frame_rate: the frames per second every transmitting port sends, or a dictionary with the (unit, module, port) tuple as key and its frames per second as value, to measure the skew
+
+		"""
+		if transmitting_ports == None:
+			transmitting_ports = counting_ports
+		messages = [port.block(port.count, *location) for location in counting_ports]
+		messages.extend([port.block(port.transmit, *location) for location in transmitting_ports])
+		# The involved ports, so a continuous stream can be stopped on all of them at its deadline
+		ports = list(counting_ports)
+		for location in transmitting_ports:
+			if location not in ports:
+				ports.append(location)
+		with self.lock:
+			started = monotonic()
+			self.socket.sendall(''.join(messages))
+			write_duration = monotonic() - started
+			skew = None
+			if frame_rate != None and transmitting_ports:
+				read_order = list(transmitting_ports) + list(reversed(transmitting_ports))
+				replies = self.control.query([(location, [port.block(port.read, 'txframes')]) for location in read_order])
+				counts = [int(str.split(data, ',')[1]) for data in replies]
+				number = len(transmitting_ports)
+				times = []
+				for index, location in enumerate(transmitting_ports):
+					location_rate = frame_rate
+					if isinstance(frame_rate, dict):
+						location_rate = frame_rate[location]
+					times.append((counts[index] + counts[2 * number - 1 - index]) / 2.0 / float(location_rate))
+				skew = max(times) - min(times)
+			return Traffic(started, ports, write_duration, skew)
 	def capture(self, unit, module, port_number):
 		"""Start capturing on the port.
 
@@ -274,76 +500,186 @@ class Analyzer:
 		:param port_number: the port number as a string to be selected
 
 		"""
-		self.messages = port.capture(unit, module, port_number)
-		self.send_msg(self.messages)
-	def stop_all(self, unit, module, port_number, when=None, time=None):
+		self.send_batch([port.block(port.capture, unit, module, port_number)])
+	def stop_all(self, unit, module, port_number, when=None, time=None, traffic=None):
 		"""Stop all running actions(i.e. counting, transmitting and capturing) on a port.
 		
 		:param unit: the unit (generator) number as a string to be selected
 		:param module: the module (network card) number as a string to be selected
 		:param port_number: the port number as a string to be selected
 		:param when: Choose between CONT or STOP. 'CONT' means a continuous stream, a time must be given to the time parameter. 'STOP' means wait for the stream to end, then stop all remaining actions.
-		:param time: how many seconds to wait for the continuous stream before ending it
+		:param time: how many seconds, counted from the start of the traffic, to wait for the continuous stream before ending it on all involved ports
+		:param traffic: the Traffic handle returned when the traffic was started, without it the seconds are counted from now and only this port is stopped
 
 		"""
-		self.stop = port.stop_all(unit, module, port_number)
-		self.checkstopped = port.transmit_state()
+		# The port is selected with every poll, so the state is read from this port even when other threads select other ports
+		checkstopped = [port.block(port.select, unit, module, port_number) + port.block(port.transmit_state)]
 		if when == 'CONT':
 			if time == None:
 				raise ValueError('no time given') 
 			else:
-				sleep(int(time))
-				send_msg(stop)
+				self.wait_for_deadline(time, traffic)
+				self.stop_all_group(self.involved_ports(unit, module, port_number, traffic))
 		elif when == 'STOP':
-			self.stopped = False
+			stopped = False
 			print('waiting for transmission to end on port' + port_number)
-			while self.stopped == False:
-				self.data = self.send_recv_msg(self.checkstopped)
-				if self.data == '0\n':
+			while stopped == False:
+				data = self.send_recv_msg(checkstopped)
+				if data == '0\n':
 					print('stopped counters on port ' + port_number)
-					self.stopped = True
-				elif self.data == '1\n':
+					stopped = True
+				elif data == '1\n':
 					sleep(1)
-				elif self.data == '2\n':
+				elif data == '2\n':
 					print('starting/halting ' + port_number)
 					sleep(1)
-			self.send_msg(self.stop)
+			self.send_batch([port.block(port.stop_all, unit, module, port_number)])
 		elif when == None:
 			print('when == None')
 		else:
 			print(when)
-	def wait_for_transmission(self, unit, module, port_number, when=None, time=None):
+	def wait_for_transmission(self, unit, module, port_number, when=None, time=None, traffic=None):
 		"""Wait until a 'Stop'stream is done, or terminate a 'CONT'stream after x seconds on a port.
 		
 		:param unit: the unit (generator) number as a string to be selected
 		:param module: the module (network card) number as a string to be selected
 		:param port_number: the port number as a string to be selected
 		:param when: Choose between CONT or STOP. 'CONT' means a continuous stream, a time must be given to the time parameter. 'STOP' means wait for the stream to end, then stop all remaining actions.
-		:param time: how many seconds to wait for the continuous stream before ending it
+		:param time: how many seconds, counted from the start of the traffic, to wait for the continuous stream before ending it on all involved ports
+		:param traffic: the Traffic handle returned when the traffic was started, without it the seconds are counted from now and only this port is stopped
 
 		"""
-		self.checkstopped = port.transmit_state()
+		checkstopped = [port.block(port.select, unit, module, port_number) + port.block(port.transmit_state)]
 		if when == 'CONT':
-			self.stop = port.stop_all(unit, module, port_number)
 			if time == None:
 				raise ValueError('no time given') 
 			else:
-				sleep(int(time))
-				self.send_msg(self.stop)
+				self.wait_for_deadline(time, traffic)
+				self.stop_all_group(self.involved_ports(unit, module, port_number, traffic))
 		elif when == 'STOP' or when == None:
 			#print('waiting for transmission to end on port' + port_number)
 			while 1:
-				self.data = self.send_recv_msg(self.checkstopped)
+				data = self.send_recv_msg(checkstopped)
 				stdout.write('.')
 				stdout.flush()
-				if self.data == '0\n':
+				if data == '0\n':
 					print '.'
 					break
-				elif self.data == '1\n':
+				elif data == '1\n':
 					sleep(1)
-				elif self.data == '2\n':
+				elif data == '2\n':
 					print('starting/halting ' + port_number)
 					sleep(1)
+	def wait_for_transmission_group(self, ports, interval=1, connection=None):
+		"""Wait until the streams of all given ports are done, polling the state of all ports with one pipelined read per poll.
+
+		:param ports: a list of (unit, module, port) tuples
+		:param interval: the seconds between polls
+		:param connection: the Connection to poll with, defaults to the next monitor connection, or the control connection if none is open
+
+		"""
+		connection = self.polling_connection(connection)
+		while 1:
+			replies = connection.query([(location, [port.block(port.transmit_state)]) for location in ports])
+			if all(data == '0\n' for data in replies):
+				break
+			sleep(interval)
+	def watch_transmission_group(self, pairs, frames, seconds, frame_rate, latency, buffer, interval=0.2, connection=None, traffic=None):
+		"""Wait until the streams of all transmitting ports are done and settled, like wait_for_transmission_group, but also read the loss and error counters of every pair on each poll. As soon as a failure is certain, all involved ports are stopped with one write and a compare.Abort with the reason and the time saved is returned. Returns None when all streams are done without a certain failure, the counters still have to be verified afterwards.
+
+		A failure is certain when the receiving port counts an FCS or a sequence error, receives more frames than are sent to it, or lags behind the transmitting port by more frames than can be on their way: frame_rate * (latency + buffer) while transmitting, none once the transmitter has stopped for latency + buffer seconds. The transmitted frames are read before the received frames, so the lag is never overestimated.
+
+		:param pairs: a list of (transmitting, receiving) tuples of (unit, module, port) tuples
+		:param frames: the amount of frames every transmitting port sends
+		:param seconds: the duration of the traffic in seconds, to calculate the time saved
+		:param frame_rate: the frames per second every transmitting port sends
+		:param latency: the latency of the path between the ports in seconds
+		:param buffer: the seconds of traffic the path can buffer, e.g. in the queues of a switch
+		:param interval: the seconds between polls
+		:param connection: the Connection to poll with, defaults to the next monitor connection, or the control connection if none is open
+		:param traffic: the Traffic handle returned when the traffic was started, to calculate the time saved from its start instead of from now
+
+		"""
+		connection = self.polling_connection(connection)
+		if traffic != None:
+			started = traffic.started
+		else:
+			started = monotonic()
+		involved = []
+		for pair in pairs:
+			for location in pair:
+				if location not in involved:
+					involved.append(location)
+		settle = float(latency) + float(buffer)
+		in_flight = int(math.ceil(float(frame_rate) * settle))
+		stopped = {}
+		while 1:
+			requests = []
+			for tx, rx in pairs:
+				requests.append((tx, [port.block(port.read, 'txframes'), port.block(port.transmit_state)]))
+				requests.append((rx, [port.block(port.read, 'rxframes'), ':COUNter:ERRor:FCS?\n', ':COUNter:ERRor:SEQuence?\n']))
+			replies = connection.query(requests)
+			polled = monotonic()
+			done = True
+			for teller, pair in enumerate(pairs):
+				tx_frames, state, rx_frames, fcs, sequence = replies[teller * 5:(teller + 1) * 5]
+				if state == '0\n':
+					stopped.setdefault(pair, polled)
+				settled = pair in stopped and polled - stopped[pair] >= settle
+				tx_frames = int(str.split(tx_frames, ',')[1])
+				rx_frames = int(str.split(rx_frames, ',')[1])
+				failure = None
+				if int(str.split(fcs, ',')[1]) > 0:
+					failure = ('FCS error', 'FCS errors', int(str.split(fcs, ',')[1]))
+				elif int(str.split(sequence, ',')[1]) > 0:
+					failure = ('sequence error', 'Sequence error', int(str.split(sequence, ',')[1]))
+				elif rx_frames > frames:
+					failure = ('more frames received than sent', 'Received frames', rx_frames)
+				elif settled and tx_frames > rx_frames:
+					failure = ('frames lost', 'Transmitted frames - Received frames', tx_frames - rx_frames)
+				elif tx_frames - rx_frames > in_flight:
+					failure = ('frames lost in flight', 'Transmitted frames - Received frames', tx_frames - rx_frames)
+				if failure != None:
+					self.stop_all_group(involved)
+					elapsed = monotonic() - started
+					return compare.Abort(failure[0], pair, failure[1], failure[2], elapsed, max(0, float(seconds) - elapsed))
+				if not settled:
+					done = False
+			if done:
+				return None
+			sleep(interval)
+	def wait_for_deadline(self, seconds, traffic=None):
+		"""Sleep until the given (fractional) amount of seconds has passed since the traffic was started by count_transmit_group, so the time spent between starting and calling this is not added to the duration. Without a Traffic handle, the seconds are counted from now.
+
+		:param seconds: the duration of the continuous stream in seconds
+		:param traffic: the Traffic handle returned by count_transmit_group
+
+		"""
+		if traffic == None:
+			deadline = monotonic() + float(seconds)
+		else:
+			deadline = traffic.started + float(seconds)
+		remaining = deadline - monotonic()
+		while remaining > 0:
+			sleep(remaining)
+			remaining = deadline - monotonic()
+	def involved_ports(self, unit, module, port_number, traffic=None):
+		"""Return the ports of a Traffic handle, or only the given port if there is none."""
+		location = (unit, module, port_number)
+		if traffic != None:
+			ports = list(traffic.ports)
+			if location not in ports:
+				ports.append(location)
+			return ports
+		return [location]
+	def stop_all_group(self, ports):
+		"""Stop all running actions on any set of ports with one write.
+
+		:param ports: a list of (unit, module, port) tuples
+
+		"""
+		with self.lock:
+			self.socket.sendall(''.join([port.block(port.stop_all, *location) for location in ports]))
 	def stop_capture(self, unit, module, port_number):
 		"""Stop capture on a port.
 		
@@ -352,8 +688,7 @@ class Analyzer:
 		:param port_number: the port number as a string to be selected
 
 		"""
-		self.stop = port.stop_capture(unit, module, port_number)
-		self.send_msg(self.stop)
+		self.send_batch([port.block(port.stop_capture, unit, module, port_number)])
 	def stop_counter(self, unit1, module1, port_number1, unit2, module2, port_number2):
 		"""Stop count on a port.
 		
@@ -362,9 +697,21 @@ class Analyzer:
 		:param port_number: the port number as a string to be selected
 
 		"""
-		self.message = port.stop_counter(unit1, module1, port_number1)
-		self.message = self.message + port.stop_counter(unit2, module2, port_number2)
-		self.socket.send(''.join(self.message))
+		self.stop_counter_group([(unit1, module1, port_number1), (unit2, module2, port_number2)])
+	def stop_counter_group(self, ports):
+		"""Stop counting on any set of ports with one write.
+
+		:param ports: a list of (unit, module, port) tuples
+
+		"""
+		self.send_batch([port.block(port.stop_counter, *location) for location in ports])
+	def stop_stream_group(self, ports):
+		"""Stop transmitting on any set of ports with one write.
+
+		:param ports: a list of (unit, module, port) tuples
+
+		"""
+		self.send_batch([port.block(port.stop_stream, *location) for location in ports])
 	def stop_stream(self, unit, module, port_number):
 		"""Stop stream on a port.
 		
@@ -373,13 +720,122 @@ class Analyzer:
 		:param port_number: the port number as a string to be selected
 
 		"""
-		self.stop = port.stop_stream(unit, module, port_number)
-		self.send_msg(self.stop)
+		self.send_batch([port.block(port.stop_stream, unit, module, port_number)])
 	def disconnect(self):
-		"""Disconnects the socket, consequently ending the test."""
+		"""Disconnects the socket and the monitor connections, consequently ending the test."""
+		with self.lock:
+			for monitor in self.monitors:
+				monitor.close()
+			self.monitors = []
+			try:
+				self.socket.close()
+			finally:
+				return None
+
+# The messages which change the port selection
+SELECTION = (':UENTry:ID ', ':MODule:ID ', ':PORT:ID ')
+
+class Traffic:
+	"""A handle of traffic started by Analyzer.count_transmit_group. Each caller keeps its own handle, so threads sharing an Analyzer wait for and stop their own traffic.
+
+	:ivar started: the monotonic time right before the start messages were handed to the connection
+	:ivar ports: the list of (unit, module, port) tuples which count or transmit
+	:ivar write_duration: the seconds sendall took to hand the start messages to the connection
+	:ivar skew: the measured seconds between the first and last transmitting port start, None if not measured, see Analyzer.count_transmit_group
+
+	"""
+	def __init__(self, started, ports, write_duration, skew=None):
+		self.started = started
+		self.ports = ports
+		self.write_duration = write_duration
+		self.skew = skew
+
+class Connection:
+	"""A connection to the analyzer which tracks its own port selection, so a port is only selected again when another port was selected on this connection. Used for the monitor connections of an Analyzer, and without tracking for its control connection.
+
+	:ivar socket: the socket of the connection
+	:ivar selected: the (unit, module, port) tuple selected on this connection, None if unknown
+	:ivar lock: held while a request and its replies are on the connection
+	:ivar tracking: if False, every request selects its ports again, for a connection on which others select ports too
+
+	"""
+	def __init__(self, connection_socket, lock=None, tracking=True):
+		if lock == None:
+			lock = threading.RLock()
+		self.socket = connection_socket
+		self.selected = None
+		self.lock = lock
+		self.tracking = tracking
+	def select(self, location):
+		"""Return the messages to select a port on this connection, an empty list if it is already selected. Hold the lock until the messages are sent, or use query().
+
+		:param location: the (unit, module, port) tuple
+
+		"""
+		location = tuple(str(number) for number in location)
+		if location == self.selected and self.tracking:
+			return []
+		self.selected = location
+		return [port.block(port.select, *location)]
+	def query(self, requests):
+		"""Send the messages of many ports as one request and return the replies of all queries. The ports are selected while the lock is held, so no other thread can change the selection before the request is on the connection.
+
+		:param requests: a list of (location, messages) tuples, with a (unit, module, port) tuple as location, or None to keep the selection, and the list of its command and query messages
+
+		"""
+		with self.lock:
+			messages = []
+			for location, port_messages in requests:
+				if location != None:
+					messages.extend(self.select(location))
+				messages.extend(port_messages)
+				if any(message.startswith(SELECTION) for message in port_messages):
+					# The messages select a port themselves
+					self.selected = None
+			return self.send_recv_batch(messages)
+	def send_recv_batch(self, messages):
+		"""Send messages with one write and return the replies of all queries, see send_recv_batch().
+
+		:param messages: the list of command and query messages
+
+		"""
+		with self.lock:
+			try:
+				return send_recv_batch(self.socket, messages)
+			except:
+				# The selection is unknown after a failed request
+				self.selected = None
+				raise
+	def close(self):
+		"""Close the connection."""
 		try:
 			self.socket.close()
 		finally:
 			return None
 
+def send_recv_batch(connection_socket, messages):
+	"""Send a list of command and query messages with one write on a socket and read the replies of all queries, instead of waiting for every reply before sending the next query. The replies are returned as a list in the order of the queries.
+
+	:param connection_socket: the socket to the analyzer
+	:param messages: the list of command and query messages, query messages end with '?\\n'
+
+	"""
+	queries = [message for message in messages if message.endswith('?\n')]
+	connection_socket.sendall(''.join(messages))
+	replies = []
+	data = ''
+	while len(replies) < len(queries):
+		try:
+			received = connection_socket.recv(4096)
+		except socket.timeout:
+			raise error.AnritsuTimeout(queries[len(replies)])
+		if not received:
+			raise error.AnritsuTimeout(queries[len(replies)])
+		data = data + received
+		lines = data.split('\n')
+		data = lines.pop()
+		for line in lines:
+			replies.append(line + '\n')
+	return replies[:len(queries)]
+
 # vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
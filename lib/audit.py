@@ -0,0 +1,212 @@
+#	This program is free software: you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation, either version 3 of the License, or
+#	(at your option) any later version.
+#
+#	This program is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#	Copyright 2013, AMS-IX
+#	Original author: Sean Rijs
+#	Current maintainer: Stefan Plug
+#	Contact: stefan.plug@ams-ix.net
+#
+#	This library creates an API for Anritsu nework Generators
+#
+#!/bin/python
+
+"""
+audit.py - this module walks the stream tables of ports, compares them with the intended stream objects and re-commits only the drifted fields.
+"""
+
+from anritsu import port, stream, error
+
+def _query_fields():
+	"""Return a dictionary with the query message of every field of stream.FIELDS as key and the list of fields it verifies as value."""
+	query_fields = {}
+	for name, field in sorted(stream.FIELDS.iteritems()):
+		query_fields.setdefault(field.query, []).append(field)
+	return query_fields
+
+# The fields behind every query message, several fields can be verified by the same query
+QUERY_FIELDS = _query_fields()
+
+class Audit:
+	"""The result of an audit of stream objects against the stream tables of their ports.
+
+	:ivar stream_objects: the list of intended stream objects
+	:ivar drifts: a list with the drifted fields of every stream object, see drift(), empty for a missing stream
+	:ivar missing: the list of stream objects whose ID is not in the stream table of their port
+	:ivar extra: a list of ((unit, module, port), stream ID) tuples of the streams in the tables which are not intended
+	:ivar records: a dictionary with the ((unit, module, port), stream ID) tuple of every stream found as key and its read back fields as value
+
+	"""
+	def __init__(self, stream_objects, drifts, missing, extra, records):
+		self.stream_objects = stream_objects
+		self.drifts = drifts
+		self.missing = missing
+		self.extra = extra
+		self.records = records
+	def in_sync(self):
+		"""Return True if the stream tables hold exactly the intended streams, without drifted fields."""
+		return not any(self.drifts) and not self.missing and not self.extra
+
+def location(stream_object):
+	"""Return the (unit, module, port) tuple of a stream object, as strings."""
+	return tuple(str(number) for number in (stream_object.unit, stream_object.module, stream_object.port))
+
+def read_tables(anritsu_control, ports):
+	"""Read the stream tables of ports with one write and one pipelined read: per port the amount of streams and the list of their IDs. Returns a dictionary with the (unit, module, port) tuple as key and the list of stream IDs as value.
+
+	:param anritsu_control: an Analyzer object
+	:param ports: a list of (unit, module, port) tuples
+
+	"""
+	messages = []
+	for table_location in ports:
+		messages.append(port.block(port.select, *table_location))
+		messages.extend(port.stream_table())
+	replies = anritsu_control.send_recv_batch(messages)
+	tables = {}
+	for teller, table_location in enumerate(ports):
+		count, id_list = replies[teller * 2:teller * 2 + 2]
+		ids = []
+		if int(count) > 0:
+			ids = [int(stream_id) for stream_id in id_list.split(',')]
+		if len(ids) != int(count):
+			raise error.AnritsuQueryError(':TSTReam:TABLe:IDList?\n', count, id_list)
+		tables[tuple(str(number) for number in table_location)] = ids
+	return tables
+
+def read_back(anritsu_control, stream_objects):
+	"""Walk the stream tables of the ports of the given streams and read every stream found, with one write and one pipelined read for the tables and one for the fields. A stream with an intended stream object is read with its queries, any other stream with the queries of all fields the Anritsu type supports. Returns a (tables, records) tuple, see read_tables() and Audit.records.
+
+	:param anritsu_control: an Analyzer object
+	:param stream_objects: a list of stream objects, only their ports, IDs and query messages are used
+
+	"""
+	ports = []
+	intended = {}
+	for stream_object in stream_objects:
+		if location(stream_object) not in ports:
+			ports.append(location(stream_object))
+		intended[(location(stream_object), int(stream_object.stream_identification_number))] = stream_object
+	tables = read_tables(anritsu_control, ports)
+	all_queries = sorted(set(field.query for field in stream.FIELDS.itervalues() if anritsu_control.anritsu_type in field.anritsu_types))
+	messages = []
+	fields = []
+	for table_location in ports:
+		messages.append(port.block(port.select, *table_location))
+		for stream_id in tables[table_location]:
+			if (table_location, stream_id) in intended:
+				stream_object = intended[(table_location, stream_id)]
+				queries = stream_object.stream_queries.keys() + stream_object.frame_queries.keys()
+			else:
+				queries = all_queries
+			messages.append(':TSTReam:TABLe:ID ' + str(stream_id) + '\n')
+			messages.extend(queries)
+			fields.append(((table_location, stream_id), queries))
+	replies = anritsu_control.send_recv_batch(messages)
+	records = {}
+	offset = 0
+	for key, queries in fields:
+		records[key] = dict(zip(queries, replies[offset:offset + len(queries)]))
+		offset = offset + len(queries)
+	return (tables, records)
+
+def drift(stream_object, record):
+	"""Return the drifted fields of a stream: a dictionary with the query message as key and an (intended value, Anritsu value) tuple as value.
+
+	:param stream_object: the intended stream object
+	:param record: the read back fields of the stream, see Audit.records
+
+	"""
+	drifted = {}
+	for queries in (stream_object.stream_queries, stream_object.frame_queries):
+		for message, expected_string in queries.iteritems():
+			if record.get(message) != expected_string:
+				drifted[message] = (expected_string, record.get(message))
+	return drifted
+
+def audit(anritsu_control, stream_objects):
+	"""Read back the stream tables of the given streams and return an Audit with the drifted fields of every stream object and the missing and extra stream IDs.
+
+	:param anritsu_control: an Analyzer object
+	:param stream_objects: a list of intended stream objects
+
+	"""
+	tables, records = read_back(anritsu_control, stream_objects)
+	drifts = []
+	missing = []
+	for stream_object in stream_objects:
+		key = (location(stream_object), int(stream_object.stream_identification_number))
+		if key in records:
+			drifts.append(drift(stream_object, records[key]))
+		else:
+			drifts.append({})
+			missing.append(stream_object)
+	intended = set((location(stream_object), int(stream_object.stream_identification_number)) for stream_object in stream_objects)
+	extra = sorted(key for key in records if key not in intended)
+	return Audit(stream_objects, drifts, missing, extra, records)
+
+def commands(stream_object, drifted):
+	"""Return the command messages of a stream object which set its drifted fields, in the order the stream object sets them. The query messages are mapped back to their commands through stream.FIELDS, a drifted field without a command raises an AnritsuRepairError.
+
+	:param stream_object: the intended stream object
+	:param drifted: the drifted fields of the stream object, see drift()
+
+	"""
+	paths = set()
+	for message in drifted:
+		if message not in QUERY_FIELDS:
+			raise error.AnritsuRepairError(message)
+		paths.update(field.command for field in QUERY_FIELDS[message])
+	repair_commands = [command for command in stream_object.commands if command.split(' ', 1)[0] + ' ' in paths]
+	if not repair_commands:
+		raise error.AnritsuRepairError(sorted(drifted)[0])
+	return repair_commands
+
+def repair(anritsu_control, result):
+	"""Re-commit only the drifted fields of the streams with one write, commit the missing streams as a whole, and return the Audit after reading them back. Extra streams are left in place, they stay in the returned Audit. A drifted field which can't be set by a command raises an AnritsuRepairError before anything is sent.
+
+	:param anritsu_control: an Analyzer object
+	:param result: the Audit of the streams, as returned by audit()
+
+	"""
+	changed = []
+	changed_commands = []
+	for stream_object, drifted in zip(result.stream_objects, result.drifts):
+		if drifted:
+			changed.append(stream_object)
+			changed_commands.append(commands(stream_object, drifted))
+	if not changed and not result.missing:
+		return result
+	if changed:
+		anritsu_control.stream_update(changed, changed_commands)
+	if result.missing:
+		anritsu_control.stream_commit_batch(result.missing)
+	return audit(anritsu_control, result.stream_objects)
+
+def report(result):
+	"""Print the drifted fields of every stream, and the missing and extra streams.
+
+	:param result: the Audit of the streams, as returned by audit()
+
+	"""
+	for stream_object, drifted in zip(result.stream_objects, result.drifts):
+		name = '/'.join(location(stream_object)) + ' stream ' + str(stream_object.stream_identification_number)
+		if stream_object in result.missing:
+			print(name + ': missing')
+		elif not drifted:
+			print(name + ': in sync')
+		for message, (expected_string, data) in sorted(drifted.iteritems()):
+			print(name + ': ' + message.rstrip('\n') + ' intended ' + expected_string.rstrip('\n') + ', found ' + str(data).rstrip('\n'))
+	for table_location, stream_id in result.extra:
+		print('/'.join(table_location) + ' stream ' + str(stream_id) + ': extra')
+
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
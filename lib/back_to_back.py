@@ -0,0 +1,169 @@
+#	This program is free software: you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation, either version 3 of the License, or
+#	(at your option) any later version.
+#
+#	This program is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#	Copyright 2013, AMS-IX
+#	Original author: Sean Rijs
+#	Current maintainer: Stefan Plug
+#	Contact: stefan.plug@ams-ix.net
+#
+#	This library creates an API for Anritsu nework Generators
+#
+#!/bin/python
+
+"""
+back_to_back.py - this module searches the longest burst of back-to-back frames at line rate which is forwarded without loss, as in the RFC 2544 back-to-back test.
+"""
+
+from anritsu import port, convert_calc, combined_tests
+
+# The seconds of line rate traffic the longest burst lasts by default, RFC 2544 asks for at least 2 seconds
+SECONDS = 2
+
+class BurstSearch:
+	"""A binary search of the longest lossless burst, for several port pairs at once. Every sending port gets one stream, which is committed once; between trials only its frames per burst are changed with Analyzer.stream_update, and between frame sizes only its frame size and inter frame gap. Every trial starts all pairs with one write and reads the counters of all ports with one pipelined read, and every pair narrows its own search window.
+
+	:ivar pairs: a list of (transmitting, receiving) tuples of (unit, module, port) tuples
+	:ivar Gbps: the speed of the ports in Gbps
+	:ivar resolution: the search stops when the window of every pair is smaller than this amount of frames
+	:ivar repeat: the amount of searches per frame size, the result is their average
+	:ivar streams: a dictionary with the transmitting (unit, module, port) tuple as key and its committed stream object as value
+
+	"""
+	def __init__(self, pairs, Gbps, resolution=1, repeat=1):
+		self.pairs = [(tuple(tx), tuple(rx)) for tx, rx in pairs]
+		self.Gbps = Gbps
+		self.resolution = max(1, int(resolution))
+		self.repeat = max(1, int(repeat))
+		self.streams = {}
+		self.ports = []
+		for tx, rx in self.pairs:
+			for location in (tx, rx):
+				if location not in self.ports:
+					self.ports.append(location)
+	def commit(self, anritsu_control, frame_size, maximum):
+		"""Clear all ports and commit one stream of one burst at line rate per transmitting port, with one batched commit.
+
+		:param anritsu_control: an Analyzer object
+		:param frame_size: the frame size in bytes
+		:param maximum: the frames per burst of the committed streams
+
+		"""
+		anritsu_control.send_batch([anritsu_control.initialize_block(*location) for location in self.ports])
+		for location in self.ports:
+			anritsu_control.rates.clear(*location)
+		IFG = convert_calc.calculate_inter_frame_gap(100, 8, frame_size, self.Gbps)
+		self.streams = {}
+		for tx, rx in self.pairs:
+			new_stream = combined_tests.port_stream(anritsu_control, tx, convert_calc.MactoHex('00-00', tx[0], tx[1], tx[2]), convert_calc.MactoHex('00-00', rx[0], rx[1], rx[2]), 1, maximum, frame_size, IFG[1])
+			new_stream.burst_per_stream('1')
+			self.streams[tx] = new_stream
+		anritsu_control.stream_commit_batch([self.streams[tx] for tx, rx in self.pairs])
+	def resize(self, anritsu_control, frame_size):
+		"""Change the frame size and the line rate inter frame gap of the committed streams.
+
+		:param anritsu_control: an Analyzer object
+		:param frame_size: the frame size in bytes
+
+		"""
+		IFG = convert_calc.calculate_inter_frame_gap(100, 8, frame_size, self.Gbps)
+		commands = [':TSTReam:TABLe:ITEM:FSIZe:VALue ' + str(frame_size) + '\n', ':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:VALue ' + str(IFG[1]) + '\n']
+		anritsu_control.stream_update([self.streams[tx] for tx, rx in self.pairs], [commands] * len(self.pairs))
+	def trial(self, anritsu_control, bursts):
+		"""Send one burst per pair and return a dictionary with the (transmitting, receiving) tuple as key and True as value if the receiving port got the whole burst.
+
+		:param anritsu_control: an Analyzer object
+		:param bursts: a dictionary with the (transmitting, receiving) tuple as key and the frames per burst as value
+
+		"""
+		pairs = [pair for pair in self.pairs if pair in bursts]
+		anritsu_control.stream_update([self.streams[tx] for tx, rx in pairs], [[':TSTReam:TABLe:ITEM:CONTrol:FPBurst ' + str(bursts[(tx, rx)]) + '\n'] for tx, rx in pairs])
+		involved = []
+		for tx, rx in pairs:
+			for location in (tx, rx):
+				if location not in involved:
+					involved.append(location)
+		transmitting = [tx for tx, rx in pairs]
+		anritsu_control.send_batch([port.block(port.clear_counters, *location) for location in involved])
+		anritsu_control.count_transmit_group(involved, transmitting)
+		anritsu_control.wait_for_transmission_group(transmitting)
+		anritsu_control.stop_counter_group(involved)
+		snapshot = anritsu_control.read_counter_snapshot(involved)
+		passed = {}
+		for tx, rx in pairs:
+			burst = bursts[(tx, rx)]
+			passed[(tx, rx)] = snapshot[tx]['Transmitted frames'] == burst and snapshot[rx]['Received frames'] == burst
+		return passed
+	def search(self, anritsu_control, frame_size, maximum, minimum=1):
+		"""Search the longest lossless burst of all pairs for the frame size of the committed streams. Returns a dictionary with the (transmitting, receiving) tuple as key and the longest lossless burst as value, 0 if even the minimum burst lost frames.
+
+		:param anritsu_control: an Analyzer object
+		:param frame_size: the frame size in bytes, for reporting
+		:param maximum: the longest burst to try
+		:param minimum: the shortest burst to try
+
+		"""
+		# Every window is [longest passed, shortest failed), the maximum is tried first
+		low = dict((pair, minimum - 1) for pair in self.pairs)
+		high = dict((pair, maximum + 1) for pair in self.pairs)
+		bursts = dict((pair, maximum) for pair in self.pairs)
+		while bursts:
+			passed = self.trial(anritsu_control, bursts)
+			for pair, burst in bursts.items():
+				if passed[pair]:
+					low[pair] = burst
+				else:
+					high[pair] = burst
+				if high[pair] - low[pair] <= self.resolution:
+					del bursts[pair]
+				else:
+					bursts[pair] = (low[pair] + high[pair]) // 2
+			print(str(frame_size) + ' bytes: ' + ', '.join('/'.join(tx) + '->' + '/'.join(rx) + ' ' + str(low[(tx, rx)]) + '..' + str(high[(tx, rx)]) for tx, rx in self.pairs))
+		return dict((pair, max(0, low[pair])) for pair in self.pairs)
+	def run(self, anritsu_control, frame_sizes, seconds=SECONDS, maximum=None):
+		"""Run the back-to-back test for every frame size. Returns a dictionary with the frame size as key and as value a dictionary with the (transmitting, receiving) tuple as key and the average longest lossless burst as value.
+
+		:param anritsu_control: an Analyzer object
+		:param frame_sizes: a list of frame sizes in bytes
+		:param seconds: the duration of the longest burst to try at line rate, used when maximum is not given
+		:param maximum: the longest burst to try, for every frame size
+
+		"""
+		results = {}
+		for teller, frame_size in enumerate(frame_sizes):
+			longest = maximum
+			if longest == None:
+				IFG = convert_calc.calculate_inter_frame_gap(100, 8, frame_size, self.Gbps)
+				longest = convert_calc.calculate_frames(seconds, 8, IFG[0], frame_size, self.Gbps)
+			if teller == 0:
+				self.commit(anritsu_control, frame_size, longest)
+			else:
+				self.resize(anritsu_control, frame_size)
+			totals = dict((pair, 0) for pair in self.pairs)
+			for repetition in range(self.repeat):
+				for pair, burst in self.search(anritsu_control, frame_size, longest).iteritems():
+					totals[pair] = totals[pair] + burst
+			results[frame_size] = dict((pair, totals[pair] / float(self.repeat)) for pair in self.pairs)
+		return results
+
+def print_results(results):
+	"""Print the results of BurstSearch.run with a row per frame size and pair.
+
+	:param results: the dictionary returned by BurstSearch.run
+
+	"""
+	print('frame size'.rjust(10) + ' ' + 'pair'.ljust(20) + ' ' + 'burst'.rjust(12))
+	for frame_size in sorted(results):
+		for (tx, rx), burst in sorted(results[frame_size].iteritems()):
+			print(str(frame_size).rjust(10) + ' ' + ('/'.join(tx) + '->' + '/'.join(rx)).ljust(20) + ' ' + ('%.1f' % burst).rjust(12))
+
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
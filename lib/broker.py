@@ -0,0 +1,201 @@
+#	This program is free software: you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation, either version 3 of the License, or
+#	(at your option) any later version.
+#
+#	This program is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#	Copyright 2013, AMS-IX
+#	Original author: Sean Rijs
+#	Current maintainer: Stefan Plug
+#	Contact: stefan.plug@ams-ix.net
+#
+#	This library creates an API for Anritsu nework Generators
+#
+#!/bin/python
+
+"""
+broker.py - this module keeps persistent connections to analyzers in a local broker process, which short-lived scripts use over a unix socket.
+
+A client sends a program as one JSON line and gets one JSON line back::
+
+	{"address": "10.0.0.1", "anritsu_type": "md1260a", "own": [["1", "1", "1"]], "requests": [{"port": ["1", "1", "1"], "messages": [":COUNter:RECeived:FRAMes?\\n"]}]}
+	{"replies": ["0,1000\\n"]}
+
+The ports in 'own' are initialized once, when the broker doesn't own them yet, without clearing the ownership of another user of the chassis. The program only runs once their ownership is confirmed, a port owned by someone else fails the program with an AnritsuOwnershipError. A request without 'port' keeps the current selection. On failure the reply is {"error": "..."}.
+"""
+
+import json
+import os
+import socket
+import threading
+import SocketServer
+from anritsu import analyzer, port, error
+
+class Broker:
+	"""Keeps one persistent Analyzer per analyzer address and runs the programs of its clients on it. Every program is one request on the connection, sent and answered while holding its lock, so the replies of clients are never mixed up. The port selection is tracked per analyzer, so a program on the port selected last doesn't select it again.
+
+	The locks are always taken in one order: the lock of a connection first, then the lock of the broker. The broker lock is never held while taking the lock of a connection, so an analyzer is disconnected after it is removed, outside the broker lock.
+
+	:ivar path: the path of the unix socket
+	:ivar connect: a function which returns a new Analyzer object for an address and Anritsu type
+	:ivar analyzers: a dictionary with the (address, anritsu_type) tuple as key and an (Analyzer, Connection) tuple as value
+	:ivar owned: a dictionary with the (address, anritsu_type) tuple as key and the set of initialized (unit, module, port) tuples as value
+
+	"""
+	def __init__(self, path, connect=None):
+		if connect == None:
+			connect = analyzer.Analyzer
+		self.path = path
+		self.connect = connect
+		self.analyzers = {}
+		self.owned = {}
+		self.lock = threading.Lock()
+		self.server = None
+	def get_analyzer(self, address, anritsu_type):
+		"""Return the Analyzer and the tracking Connection of an analyzer, connecting to it on first use."""
+		key = (address, anritsu_type.lower())
+		with self.lock:
+			if key not in self.analyzers:
+				anritsu_control = self.connect(address, anritsu_type)
+				self.analyzers[key] = (anritsu_control, analyzer.Connection(anritsu_control.socket, anritsu_control.lock))
+				self.owned[key] = set()
+			return self.analyzers[key]
+	def forget(self, address, anritsu_type):
+		"""Disconnect from an analyzer, e.g. after a timeout, so the next program connects again."""
+		key = (address, anritsu_type.lower())
+		with self.lock:
+			entry = self.analyzers.pop(key, None)
+			self.owned.pop(key, None)
+		if entry != None:
+			entry[0].disconnect()
+	def run(self, program):
+		"""Run a program and return the dictionary to reply with. The connection lock is held for the whole program, so two programs can't both initialize the same port. Only a lost connection or a timeout makes the broker forget the analyzer, other errors leave it connected.
+
+		:param program: a dictionary as described in the module documentation
+
+		"""
+		address = str(program['address'])
+		anritsu_type = str(program.get('anritsu_type', 'md1260a'))
+		key = (address, anritsu_type.lower())
+		anritsu_control, connection = self.get_analyzer(address, anritsu_type)
+		initialized = []
+		requests = []
+		for request in program.get('requests', []):
+			location = request.get('port')
+			if location != None:
+				location = tuple(str(number) for number in location)
+			requests.append((location, [str(message) for message in request.get('messages', [])]))
+		with connection.lock:
+			with self.lock:
+				owned = set(self.owned.get(key, ()))
+			for location in program.get('own', []):
+				location = tuple(str(number) for number in location)
+				if location not in owned and location not in initialized:
+					initialized.append(location)
+			try:
+				if initialized:
+					ownership = connection.query([(None, [port.block(port.initialize_shared, *location), port.block(port.ownership)]) for location in initialized])
+					not_owned = [location for location, data in zip(initialized, ownership) if data != '1\n']
+					if not_owned:
+						raise error.AnritsuOwnershipError(not_owned)
+					# The ports are owned once the ownership is confirmed, by this analyzer connection only
+					with self.lock:
+						if self.analyzers.get(key, (None, None))[0] is anritsu_control:
+							self.owned[key].update(initialized)
+				replies = connection.query(requests)
+			except (socket.error, error.AnritsuTimeout):
+				self.forget(address, anritsu_type)
+				raise
+		return {'replies': replies}
+	def serve(self):
+		"""Listen on the unix socket and handle every client in its own thread, until stop() is called."""
+		broker = self
+		class Handler(SocketServer.StreamRequestHandler):
+			def handle(self):
+				for line in self.rfile:
+					try:
+						reply = broker.run(json.loads(line))
+					except Exception as exception:
+						reply = {'error': str(exception)}
+					self.wfile.write(json.dumps(reply) + '\n')
+					self.wfile.flush()
+		if os.path.exists(self.path):
+			os.remove(self.path)
+		self.server = SocketServer.ThreadingUnixStreamServer(self.path, Handler)
+		self.server.daemon_threads = True
+		self.server.serve_forever()
+	def start(self):
+		"""Serve in a background thread."""
+		thread = threading.Thread(target=self.serve)
+		thread.daemon = True
+		thread.start()
+	def stop(self):
+		"""Stop serving and disconnect from all analyzers."""
+		if self.server != None:
+			self.server.shutdown()
+			self.server.server_close()
+			self.server = None
+		if os.path.exists(self.path):
+			os.remove(self.path)
+		with self.lock:
+			keys = self.analyzers.keys()
+		for address, anritsu_type in keys:
+			self.forget(address, anritsu_type)
+
+class BrokerClient:
+	"""A client of a broker, which attaches to the unix socket instead of connecting to the analyzer.
+
+	:ivar address: the address of the analyzer
+	:ivar anritsu_type: can select out of the following set: 'md1230b', 'md1260a'
+
+	"""
+	def __init__(self, path, address, anritsu_type):
+		self.address = address
+		self.anritsu_type = anritsu_type
+		self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		self.socket.connect(path)
+		self.file = self.socket.makefile('rb')
+	def run(self, requests, own=None):
+		"""Run a program on the broker and return the replies of all its queries, in order.
+
+		:param requests: a list of (location, messages) tuples, with a (unit, module, port) tuple as location, or None to keep the selection, and the list of its command and query messages
+		:param own: a list of (unit, module, port) tuples to initialize, if the broker doesn't own them yet
+
+		"""
+		program = {'address': self.address, 'anritsu_type': self.anritsu_type, 'own': [list(location) for location in own or []]}
+		program['requests'] = [{'port': location and list(location), 'messages': list(messages)} for location, messages in requests]
+		self.socket.sendall(json.dumps(program) + '\n')
+		line = self.file.readline()
+		if not line:
+			raise error.AnritsuBrokerError('connection closed')
+		reply = json.loads(line)
+		if 'error' in reply:
+			raise error.AnritsuBrokerError(reply['error'])
+		return [str(data) for data in reply['replies']]
+	def read_counter_snapshot(self, ports, counter_group=None, rates=False):
+		"""Read a group of counters of many ports with one program, see Analyzer.read_counter_snapshot."""
+		items = port.read_group_items(counter_group, self.anritsu_type, rates)
+		replies = self.run([(location, [message for message, desc in items]) for location in ports])
+		snapshot = {}
+		for teller, location in enumerate(ports):
+			counters = {}
+			for (message, desc), data in zip(items, replies[teller * len(items):(teller + 1) * len(items)]):
+				counters[desc] = int(str.split(data, ',')[1])
+			snapshot[location] = counters
+		return snapshot
+	def close(self):
+		"""Detach from the broker, its connections to the analyzers stay open."""
+		try:
+			self.file.close()
+			self.socket.close()
+		finally:
+			return None
+
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
@@ -20,9 +20,10 @@
 #
 #!/usr/bin/python -Btt
 
-from anritsu import stream, analyzer, convert_calc
+from anritsu import stream, analyzer, convert_calc, compare, trace
+from time import time
 
-def set_port(anritsu_control, port, src, dst, streamid, frames, frame_size, ns_IFG):
+def port_stream(anritsu_control, port, src, dst, streamid, frames, frame_size, ns_IFG):
 	stream = anritsu_control.stream(streamid, port[0], port[1], port[2])
 	stream.distribution('NEXT')
 	stream.frames_per_burst(str(frames))
@@ -34,28 +35,63 @@ def set_port(anritsu_control, port, src, dst, streamid, frames, frame_size, ns_I
 	stream.ipv4_source_address('127.0.0.1/24', 'STATIC')
 	stream.ipv4_destination_address('127.0.0.0/24', 'RANDOM')
 	stream.test_frame('PRBS', '46')
+	return stream
+
+def set_port(anritsu_control, port, src, dst, streamid, frames, frame_size, ns_IFG):
+	stream = port_stream(anritsu_control, port, src, dst, streamid, frames, frame_size, ns_IFG)
 	anritsu_control.stream_commit(stream)
 
-def run(anritsu_control, p1, p2, sec, speed, frame_size, Gbps, learn):
+def run(anritsu_control, p1, p2, sec, speed, frame_size, Gbps, learn, results=None, tracer=None, fingerprints=None, early_abort=None):
+	started = time()
 	mac_a = convert_calc.MactoHex('00-00', p1[0], p1[1], p1[2])
 	mac_b = convert_calc.MactoHex('00-00', p2[0], p2[1], p2[2])
-	anritsu_control.port_clear_own(p1[0], p1[1], p1[2])
-	anritsu_control.port_clear_own(p2[0], p2[1], p2[2])
-	IFG = convert_calc.calculate_inter_frame_gap(speed, 8, frame_size, Gbps)
-	frames = convert_calc.calculate_frames(sec, 8, IFG[0], frame_size, Gbps)
-	set_port(anritsu_control, p1, mac_a, mac_b, 1, frames, frame_size, IFG[1])
-	set_port(anritsu_control, p2, mac_b, mac_a, 1, frames, frame_size, IFG[1])
-	anritsu_control.count_transmit(p1[0], p1[1], p1[2], p2[0], p2[1], p2[2])
-	anritsu_control.wait_for_transmission(p2[0], p2[1], p2[2], 'STOP') 
-	anritsu_control.stop_counter(p1[0], p1[1], p1[2], p2[0], p2[1], p2[2])
+	with trace.span(tracer, 'setup', {'frame_size': frame_size}):
+		IFG = convert_calc.calculate_inter_frame_gap(speed, 8, frame_size, Gbps)
+		frames = convert_calc.calculate_frames(sec, 8, IFG[0], frame_size, Gbps)
+		if fingerprints == None:
+			anritsu_control.port_clear_own(p1[0], p1[1], p1[2])
+			anritsu_control.port_clear_own(p2[0], p2[1], p2[2])
+			set_port(anritsu_control, p1, mac_a, mac_b, 1, frames, frame_size, IFG[1])
+			set_port(anritsu_control, p2, mac_b, mac_a, 1, frames, frame_size, IFG[1])
+		else:
+			# Unchanged ports keep their stream table, only their counters are cleared
+			fingerprints.prepare(anritsu_control, p1, [port_stream(anritsu_control, p1, mac_a, mac_b, 1, frames, frame_size, IFG[1])])
+			fingerprints.prepare(anritsu_control, p2, [port_stream(anritsu_control, p2, mac_b, mac_a, 1, frames, frame_size, IFG[1])])
+	with trace.span(tracer, 'traffic', {'frame_size': frame_size}):
+		traffic = anritsu_control.count_transmit(p1[0], p1[1], p1[2], p2[0], p2[1], p2[2])
+		if early_abort != None and learn == 0:
+			# Stop both directions as soon as loss or an error is certain, instead of waiting the whole duration,
+			# early_abort is the (latency, buffer) tuple in seconds of the path between the ports
+			aborted = anritsu_control.watch_transmission_group([(p1, p2), (p2, p1)], frames, sec, frames / float(sec), early_abort[0], early_abort[1], traffic=traffic)
+			if aborted != None:
+				print(str(aborted))
+		else:
+			anritsu_control.wait_for_transmission(p2[0], p2[1], p2[2], 'STOP', traffic=traffic)
+		anritsu_control.stop_counter(p1[0], p1[1], p1[2], p2[0], p2[1], p2[2])
 	if learn == 0:
-		anritsu_control.get_port_counter_group(p1[0], p1[1], p1[2], p2[0], p2[1], p2[2], 'test_and_IPV4')
-		result_a = anritsu_control.test_port_counter(p1[0], p1[1], p1[2], 'rxframes', frames, frames)
-		result_b = anritsu_control.test_port_counter(p2[0], p2[1], p2[2], 'rxframes', frames, frames)
+		with trace.span(tracer, 'verify', {'frame_size': frame_size}):
+			anritsu_control.get_port_counter_group(p1[0], p1[1], p1[2], p2[0], p2[1], p2[2], 'test_and_IPV4')
+			rx_a = anritsu_control.read_port_counter(p1[0], p1[1], p1[2], 'rxframes')
+			rx_b = anritsu_control.read_port_counter(p2[0], p2[1], p2[2], 'rxframes')
+			tx_a = anritsu_control.read_port_counter(p1[0], p1[1], p1[2], 'txframes')
+			tx_b = anritsu_control.read_port_counter(p2[0], p2[1], p2[2], 'txframes')
+		result_a = compare.in_range(rx_a, frames, frames)
+		result_b = compare.in_range(rx_b, frames, frames)
+		if results != None:
+			elapsed = time() - started
+			results.record(test='throughput', tx_port='/'.join(p2), rx_port='/'.join(p1), frame_size=frame_size, load=speed, seconds=sec, expected_frames=frames, tx_frames=tx_b, rx_frames=rx_a, passed=result_a, elapsed=elapsed)
+			results.record(test='throughput', tx_port='/'.join(p1), rx_port='/'.join(p2), frame_size=frame_size, load=speed, seconds=sec, expected_frames=frames, tx_frames=tx_a, rx_frames=rx_b, passed=result_b, elapsed=elapsed)
+		return [result_a, result_b]
 
-def run_test(anritsu_control, p1, p2, sec, speed, frame_sizes, Gbps, learn):
+def run_test(anritsu_control, p1, p2, sec, speed, frame_sizes, Gbps, learn, results=None, learning=None, tracer=None, fingerprints=None, early_abort=None):
 	for teller, frame_size in enumerate(frame_sizes):
-		if learn == 1:
+		if learn == 1 and learning != None:
+			# Only a short burst, and only when the MAC table entries may have aged out
+			if learning.learn(anritsu_control, p1, p2, Gbps):
+				print('Test: LEARNING MAC, short burst of ' + str(learning.frames) + ' frames')
+			else:
+				print('Test: LEARNING MAC skipped, entries still warm')
+		elif learn == 1:
 			print (
 				'\n'
 				'*************************\n'
@@ -65,7 +101,7 @@ def run_test(anritsu_control, p1, p2, sec, speed, frame_sizes, Gbps, learn):
 				'Frame size: '+ str(frame_size) + ' Byte\n'
 				'*************************'
 				)
-			run(anritsu_control, p1, p2, sec, speed, frame_size, Gbps, learn)
+			run(anritsu_control, p1, p2, sec, speed, frame_size, Gbps, learn, tracer=tracer, fingerprints=fingerprints)
 		else:
 			print (
 				'\n'
@@ -76,7 +112,12 @@ def run_test(anritsu_control, p1, p2, sec, speed, frame_sizes, Gbps, learn):
 				'Frame size: '+ str(frame_size) + ' Byte\n'
 				'*************************'
 				)
-			run(anritsu_control, p1, p2, sec, speed, frame_size, Gbps, learn)
+			run(anritsu_control, p1, p2, sec, speed, frame_size, Gbps, learn, results, tracer, fingerprints, early_abort)
+			if learning != None:
+				learning.seen(p1)
+				learning.seen(p2)
+	if results != None:
+		results.flush()
 
 def cleanup(anritsu_control):
 	anritsu_control.disconnect()
@@ -21,9 +21,11 @@
 #!/usr/bin/python
 
 """
-compare.py - with this module two variables are compared to test if there both or one of them are true or false.
+compare.py - with this module two variables are compared to test if there both or one of them are true or false, and counter snapshots of many ports are tested against a set of rules.
 """
 
+from anritsu import port
+
 def counter(a, b):
 	"""Used to compare the return values of two objects and returns their return values.
 	
@@ -38,4 +40,146 @@ def counter(a, b):
 		print '!!! TEST FAILED !!!'
 		return False
 
+def in_range(value, minimum, maximum):
+	"""Test if a counter value is between the expected range.
+
+	:param value: the counter value as an integer
+	:param minimum: the value where the range starts
+	:param maximum: the value where the range ends
+
+	"""
+	if int(value) < minimum or int(value) > maximum:
+		print('out of range, result = ' + str(value))
+		return False
+	else:
+		return True
+
+def validate_counters(names, counter_group=None, anritsu_type='md1230b', rates=False):
+	"""Raise a ValueError if a counter description is not read by a counter group, so a rule fails when it is built instead of with a KeyError on the snapshot.
+
+	:param names: a list of counter descriptions, as in port.read_group
+	:param counter_group: the name of the group of counters the snapshot is read with
+	:param anritsu_type: the Anritsu type the snapshot is read from
+	:param rates: if True, the snapshot holds the Anritsu rate counters as well
+
+	"""
+	descriptions = set(desc for message, desc in port.read_group_items(counter_group, anritsu_type, rates))
+	for name in names:
+		if name not in descriptions:
+			raise ValueError('counter \'' + str(name) + '\' is not read by counter group ' + str(counter_group) + ', choose out of: ' + ', '.join(sorted(descriptions)))
+
+class Failure:
+	"""One failing counter of a rule.
+
+	:ivar rule: the description of the rule
+	:ivar location: the (unit, module, port) tuple, or a (transmitting, receiving) tuple of them for pair rules
+	:ivar counter: the description of the counter
+	:ivar value: the counter value, or the loss in ppm for loss rules
+	:ivar limit: the value the rule allows
+
+	"""
+	def __init__(self, rule, location, counter, value, limit):
+		self.rule = rule
+		self.location = location
+		self.counter = counter
+		self.value = value
+		self.limit = limit
+	def __str__(self):
+		return self.rule + ' failed on ' + str(self.location) + ': ' + self.counter + ' = ' + str(self.value) + ', allowed ' + str(self.limit)
+
+class Abort:
+	"""Why a trial was stopped before the end of its duration.
+
+	:ivar reason: the description of the failure condition
+	:ivar location: the (transmitting, receiving) tuple of (unit, module, port) tuples which failed
+	:ivar counter: the description of the counter
+	:ivar value: the counter value
+	:ivar elapsed: the seconds since the traffic was started
+	:ivar saved: the seconds of the duration which were not waited for
+
+	"""
+	def __init__(self, reason, location, counter, value, elapsed, saved):
+		self.reason = reason
+		self.location = location
+		self.counter = counter
+		self.value = value
+		self.elapsed = elapsed
+		self.saved = saved
+	def __str__(self):
+		return 'aborted after ' + ('%.2f' % self.elapsed) + ' s on ' + str(self.location) + ', ' + self.reason + ': ' + self.counter + ' = ' + str(self.value) + ', saved ' + ('%.2f' % self.saved) + ' s'
+
+class Verdict:
+	"""The result of all rules on a snapshot.
+
+	:ivar passed: True if no rule failed
+	:ivar failures: a list of every Failure, not just the first one
+
+	"""
+	def __init__(self, failures):
+		self.failures = failures
+		self.passed = not failures
+	def __str__(self):
+		if self.passed:
+			return 'Test passed'
+		return '!!! TEST FAILED !!!\n' + '\n'.join(str(failure) for failure in self.failures)
+
+class Maximum:
+	"""Rule: a counter may not exceed a value on any of the ports, e.g. Maximum('FCS errors', 0). The counter must be read by the counter group of the snapshot, see validate_counters().
+
+	:ivar counter: the description of the counter, as in port.read_group
+	:ivar limit: the maximum allowed value
+	:ivar ports: the list of (unit, module, port) tuples to test, defaults to all ports of the snapshot
+
+	"""
+	def __init__(self, counter, limit=0, ports=None, counter_group=None, anritsu_type='md1230b', rates=False):
+		validate_counters([counter], counter_group, anritsu_type, rates)
+		self.counter = counter
+		self.limit = limit
+		self.ports = ports
+	def check(self, snapshot):
+		ports = self.ports if self.ports != None else snapshot.keys()
+		description = self.counter + ' <= ' + str(self.limit)
+		return [Failure(description, location, self.counter, snapshot[location][self.counter], self.limit) for location in ports if snapshot[location][self.counter] > self.limit]
+
+class Loss:
+	"""Rule: the frames lost between a transmitting and a receiving port may not exceed a limit in parts per million, more received than transmitted frames fail as well. Loss(pairs) tests rx == tx. The counters must be read by the counter group of the snapshot, see validate_counters().
+
+	:ivar pairs: a list of (transmitting, receiving) tuples of (unit, module, port) tuples
+	:ivar ppm: the maximum allowed loss in parts per million
+	:ivar transmitted: the description of the transmit counter
+	:ivar received: the description of the receive counter
+
+	"""
+	def __init__(self, pairs, ppm=0, transmitted='Transmitted frames', received='Received frames', counter_group=None, anritsu_type='md1230b', rates=False):
+		validate_counters([transmitted, received], counter_group, anritsu_type, rates)
+		self.pairs = pairs
+		self.ppm = ppm
+		self.transmitted = transmitted
+		self.received = received
+	def check(self, snapshot):
+		description = 'loss <= ' + str(self.ppm) + ' ppm'
+		failures = []
+		for transmitting, receiving in self.pairs:
+			tx = snapshot[transmitting][self.transmitted]
+			rx = snapshot[receiving][self.received]
+			if tx == 0:
+				loss = 0.0 if rx == 0 else -1000000.0
+			else:
+				loss = (tx - rx) * 1000000.0 / tx
+			if loss > self.ppm or rx > tx:
+				failures.append(Failure(description, (transmitting, receiving), self.received + ' / ' + self.transmitted, loss, self.ppm))
+		return failures
+
+def evaluate(snapshot, rules):
+	"""Test a counter snapshot of many ports against all rules in one pass and return a Verdict with every failing port and counter.
+
+	:param snapshot: a dictionary with a (unit, module, port) tuple as key and a dictionary of counter descriptions and values as value, as returned by Analyzer.read_counter_snapshot
+	:param rules: a list of rules, e.g. [Loss([(p1, p2), (p2, p1)], counter_group='test'), Maximum('FCS errors', 0, counter_group='test'), Maximum('Sequence error', 0, counter_group='test')]
+
+	"""
+	failures = []
+	for rule in rules:
+		failures.extend(rule.check(snapshot))
+	return Verdict(failures)
+
 # vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
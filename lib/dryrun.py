@@ -0,0 +1,153 @@
+#	This program is free software: you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation, either version 3 of the License, or
+#	(at your option) any later version.
+#
+#	This program is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#	Copyright 2013, AMS-IX
+#	Original author: Sean Rijs
+#	Current maintainer: Stefan Plug
+#	Contact: stefan.plug@ams-ix.net
+#
+#	This library creates an API for Anritsu nework Generators
+#
+#!/bin/python
+
+"""
+dryrun.py - this module runs the library without a device and collects every message it would send into a script, with a summary of the expected round trips and time. The script can be replayed against the device later as a few fast batches.
+"""
+
+from anritsu import analyzer, loopback, error
+
+# The queries whose replies depend on the traffic, the script holds no expected reply for them
+VOLATILE = (':COUNter', ':TSTReam:STATe')
+
+class DryRunSocket(loopback.LoopbackSocket):
+	"""A loopback stand-in which also records the script: every message and the markers for waits. A query is followed by a tab and its expected reply, unless its reply depends on the traffic, see VOLATILE.
+
+	:ivar script: the list of script lines, messages without their newline and markers starting with '#'
+	:ivar round_trips: the amount of writes which contained a query, the sender waits for their replies
+
+	"""
+	def __init__(self):
+		loopback.LoopbackSocket.__init__(self)
+		self.script = []
+		self.round_trips = 0
+	def sendall(self, data):
+		pending = len(self.replies)
+		loopback.LoopbackSocket.sendall(self, data)
+		expected = self.replies[pending:].split('\n')
+		messages = [message for message in data.split('\n') if message]
+		for message in messages:
+			if not message.endswith('?'):
+				self.script.append(message)
+				continue
+			reply = expected.pop(0)
+			if message.startswith(VOLATILE):
+				self.script.append(message)
+			else:
+				self.script.append(message + '\t' + reply)
+		if any(message.endswith('?') for message in messages):
+			self.round_trips = self.round_trips + 1
+	def marker(self, line):
+		"""Add a marker line to the script."""
+		self.script.append(line)
+
+class DryRun(analyzer.Analyzer):
+	"""An Analyzer without a socket, which collects the messages of port.py, stream.py and combined_tests into a script. Queries are answered by a loopback stand-in, so verification passes. Waits don't sleep, they become markers in the script.
+
+	"""
+	def __init__(self, anritsu_type):
+		analyzer.Analyzer.__init__(self, None, anritsu_type, DryRunSocket())
+		self.waits = 0.0
+	def wait_for_deadline(self, seconds, traffic=None):
+		self.socket.marker('#WAIT ' + str(float(seconds)))
+		self.waits = self.waits + float(seconds)
+	def wait_for_transmission(self, unit, module, port_number, when=None, time=None, traffic=None):
+		if when == 'CONT':
+			analyzer.Analyzer.wait_for_transmission(self, unit, module, port_number, when, time, traffic)
+		else:
+			self.wait_for_transmission_group([(unit, module, port_number)])
+	def wait_for_transmission_group(self, ports, interval=1, connection=None):
+		self.socket.marker('#WAIT_STOPPED ' + ' '.join('/'.join(str(number) for number in location) for location in ports))
+	def watch_transmission_group(self, pairs, frames, seconds, frame_rate, latency, buffer, interval=0.2, connection=None, traffic=None):
+		self.wait_for_transmission_group([tx for tx, rx in pairs])
+	def summary(self, rtt=0.001):
+		"""Return a dictionary with the amount of messages, commands, queries (expected replies), bytes and round trips of the script, and the estimated time at the given round trip time plus the known waits. Waits for streams to stop depend on the device and are counted, not estimated.
+
+		:param rtt: the round trip time to the device in seconds
+
+		"""
+		messages = [line.split('\t')[0] for line in self.socket.script if not line.startswith('#')]
+		queries = [message for message in messages if message.endswith('?')]
+		return {
+			'messages': len(messages),
+			'commands': len(messages) - len(queries),
+			'queries': len(queries),
+			'bytes': sum(len(message) + 1 for message in messages),
+			'round_trips': self.socket.round_trips,
+			'stream_waits': len([line for line in self.socket.script if line.startswith('#WAIT_STOPPED')]),
+			'estimated_seconds': self.socket.round_trips * rtt + self.waits,
+			}
+	def print_summary(self, rtt=0.001):
+		"""Print the summary, see summary()."""
+		summary = self.summary(rtt)
+		print(str(summary['messages']) + ' messages (' + str(summary['commands']) + ' commands, ' + str(summary['queries']) + ' queries), ' + str(summary['bytes']) + ' bytes')
+		print(str(summary['round_trips']) + ' round trips, ' + str(summary['stream_waits']) + ' waits for streams to stop')
+		print('estimated ' + ('%.3f' % summary['estimated_seconds']) + ' s at ' + str(rtt * 1000) + ' ms RTT, excluding the waits for streams to stop')
+	def save(self, path):
+		"""Write the script to a file, one message or marker per line, a query with its expected reply after a tab.
+
+		:param path: the script file
+
+		"""
+		with open(path, 'w') as script_file:
+			script_file.write('\n'.join(self.socket.script) + '\n')
+
+def replay(anritsu_control, path, strict=True):
+	"""Send a script to the device. All messages between two markers are sent with one write and their replies are read with one pipelined read. Every reply is compared with the expected reply of its query in the script. Returns the list of replies.
+
+	:param anritsu_control: an Analyzer object
+	:param path: the script file, as written by DryRun.save
+	:param strict: if True, raise the first mismatch as an AnritsuQueryError, before the next batch is sent. If False, print every mismatch and continue.
+
+	"""
+	replies = []
+	batch = []
+	expected = []
+	# The traffic of a wait is started by the batch before it
+	traffic = None
+	with open(path) as script_file:
+		lines = [line.rstrip('\n') for line in script_file if line.strip()]
+	for line in lines + ['#END']:
+		if not line.startswith('#'):
+			message = line.split('\t', 1)
+			batch.append(message[0] + '\n')
+			if message[0].endswith('?'):
+				expected.append(message)
+			continue
+		if batch:
+			batch_replies = anritsu_control.send_recv_batch(batch)
+			traffic = analyzer.Traffic(analyzer.monotonic(), [], 0.0)
+			for message, data in zip(expected, batch_replies):
+				if len(message) == 2 and data != message[1] + '\n':
+					if strict:
+						raise error.AnritsuQueryError(message[0] + '\n', message[1], data)
+					print('replay mismatch: ' + message[0] + ' expected ' + message[1] + ', got ' + data.rstrip('\n'))
+			replies.extend(batch_replies)
+			batch = []
+			expected = []
+		if line.startswith('#WAIT_STOPPED '):
+			anritsu_control.wait_for_transmission_group([tuple(location.split('/')) for location in line.split(' ')[1:]])
+		elif line.startswith('#WAIT '):
+			anritsu_control.wait_for_deadline(float(line.split(' ')[1]), traffic)
+	return replies
+
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
@@ -83,4 +83,37 @@ class AnritsuTimeout(Error):
 	def __str__(self):
 		return repr('The query message \"' + self.command + '\" was sent, followed by a timeout, meaning an invalid query or command message was sent or our connect was lost.')
 
+class AnritsuOwnershipError(Error):
+	"""Exception raised when the ownership of ports could not be taken, because another user owns them.
+
+	:ivar ports: The list of (unit, module, port) tuples which are not owned
+	"""
+
+	def __init__(self, ports):
+		self.ports = ports
+	def __str__(self):
+		return repr('The ownership of port ' + ', '.join('/'.join(location) for location in self.ports) + ' was taken, but another user still owns it.')
+
+class AnritsuRepairError(Error):
+	"""Exception raised when a drifted stream field can't be repaired by sending its command message again.
+
+	:ivar query: The query message of the drifted field
+	"""
+
+	def __init__(self, query):
+		self.query = query
+	def __str__(self):
+		return repr('The query message \"' + self.query + '\" found a drifted field, but it has no command message which sets it.')
+
+class AnritsuBrokerError(Error):
+	"""Exception raised when the broker could not run a program.
+
+	:ivar message: The error the broker replied with
+	"""
+
+	def __init__(self, message):
+		self.message = message
+	def __str__(self):
+		return repr('The broker could not run the program: ' + self.message)
+
 # vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
@@ -0,0 +1,167 @@
+#	This program is free software: you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation, either version 3 of the License, or
+#	(at your option) any later version.
+#
+#	This program is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#	Copyright 2013, AMS-IX
+#	Original author: Sean Rijs
+#	Current maintainer: Stefan Plug
+#	Contact: stefan.plug@ams-ix.net
+#
+#	This library creates an API for Anritsu nework Generators
+#
+#!/bin/python
+
+"""
+exporter.py - this module exports live port counters as Prometheus text format metrics, to a textfile or over HTTP.
+"""
+
+import os
+import re
+import socket
+import threading
+import BaseHTTPServer
+from time import time
+from anritsu import port, error
+
+class MetricsExporter:
+	"""Refreshes the counters of the configured ports on a background schedule, with one pipelined read per counter group, and renders them as Prometheus text format: the absolute counters as counter, the per second rates as gauge. Scrapes and textfile writes are served from the last rendered snapshot, so they never touch the instrument socket. The exporter reads through its Analyzer from a background thread, so give it an Analyzer (or connection) no other thread uses.
+
+	:ivar anritsu_control: the Analyzer object to read the counters with
+	:ivar ports: a list of (unit, module, port) tuples
+	:ivar counter_groups: a list of counter group names, as in port.read_group, validated when the exporter is built
+	:ivar interval: the seconds between refreshes
+	:ivar textfile: a file to write the metrics to after every refresh, e.g. for the node exporter textfile collector
+	:ivar text: the last rendered metrics
+
+	"""
+	def __init__(self, anritsu_control, ports, counter_groups=None, interval=10, textfile=None, prefix='anritsu'):
+		if counter_groups == None:
+			counter_groups = [None]
+		for counter_group in counter_groups:
+			if counter_group not in port.COUNTER_GROUPS:
+				raise ValueError('unknown counter group ' + str(counter_group))
+			# Raises AnritsuSupported for a group the Anritsu type doesn't support
+			port.read_group_items(counter_group, anritsu_control.anritsu_type)
+		self.anritsu_control = anritsu_control
+		self.ports = ports
+		self.counter_groups = counter_groups
+		self.interval = interval
+		self.textfile = textfile
+		self.prefix = prefix
+		self.text = ''
+		self.stopped = threading.Event()
+		self.thread = None
+		self.server = None
+	def refresh(self):
+		"""Read the counters of all ports and render the metrics. When reading fails, the up metric is set to 0 and the previous counters are kept. A lost connection or a timeout also reconnects the Analyzer, so the next refresh reads from a fresh connection."""
+		try:
+			counters = {}
+			for counter_group in self.counter_groups:
+				snapshot = self.anritsu_control.read_counter_snapshot(self.ports, counter_group)
+				for location, values in snapshot.iteritems():
+					counters.setdefault(location, {}).update(values)
+			self.text = self.render(counters)
+		except Exception as exception:
+			print('refreshing metrics failed: ' + str(exception))
+			self.text = re.sub(r'(?m)^' + self.prefix + '_up [01]$', self.prefix + '_up 0', self.text) or self.prefix + '_up 0\n'
+			if isinstance(exception, (socket.error, error.AnritsuTimeout)):
+				try:
+					self.anritsu_control.reconnect()
+				except Exception as reconnect_exception:
+					print('reconnecting failed: ' + str(reconnect_exception))
+		if self.textfile != None:
+			self.write_textfile(self.textfile)
+	def render(self, counters):
+		"""Render counters as Prometheus text format.
+
+		:param counters: a dictionary with a (unit, module, port) tuple as key and a dictionary with counter descriptions and values as value
+
+		"""
+		metrics = {}
+		types = {}
+		for location, values in counters.iteritems():
+			label = '{port="' + '/'.join(str(number) for number in location) + '"}'
+			for description, value in values.iteritems():
+				metrics.setdefault(self.metric_name(description), []).append(label + ' ' + str(value))
+				types[self.metric_name(description)] = self.metric_type(description)
+		lines = []
+		for name in sorted(metrics):
+			lines.append('# TYPE ' + name + ' ' + types[name])
+			for sample in sorted(metrics[name]):
+				lines.append(name + sample)
+		lines.append('# TYPE ' + self.prefix + '_last_refresh_seconds gauge')
+		lines.append(self.prefix + '_last_refresh_seconds ' + ('%.3f' % time()))
+		lines.append('# TYPE ' + self.prefix + '_up gauge')
+		lines.append(self.prefix + '_up 1')
+		return '\n'.join(lines) + '\n'
+	def metric_name(self, description):
+		"""Return the metric name of a counter description, e.g. 'Received frames' becomes 'anritsu_received_frames'."""
+		return self.prefix + '_' + re.sub(r'[^a-z0-9]+', '_', description.lower()).strip('_')
+	def metric_type(self, description):
+		"""Return the Prometheus type of a counter description: 'gauge' for a per second rate, 'counter' for the absolute counters, which only grow until they are cleared."""
+		if description.endswith('per second'):
+			return 'gauge'
+		return 'counter'
+	def write_textfile(self, path):
+		"""Write the last rendered metrics to a file, atomically so a reader never sees half a file.
+
+		:param path: the file to write
+
+		"""
+		temporary_path = path + '.tmp'
+		with open(temporary_path, 'w') as metrics_file:
+			metrics_file.write(self.text)
+		os.rename(temporary_path, path)
+	def start(self):
+		"""Start refreshing in a background thread."""
+		self.stopped.clear()
+		self.thread = threading.Thread(target=self._loop)
+		self.thread.daemon = True
+		self.thread.start()
+	def stop(self):
+		"""Stop refreshing and serving."""
+		self.stopped.set()
+		if self.server != None:
+			self.server.shutdown()
+			self.server = None
+	def serve(self, port=9464, address=''):
+		"""Serve the last rendered metrics over HTTP on /metrics in a background thread.
+
+		:param port: the TCP port to listen on
+		:param address: the address to listen on, defaults to all addresses
+
+		"""
+		exporter = self
+		class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+			def do_GET(self):
+				if self.path.split('?')[0] not in ('/', '/metrics'):
+					self.send_error(404)
+					return
+				body = exporter.text
+				self.send_response(200)
+				self.send_header('Content-Type', 'text/plain; version=0.0.4')
+				self.send_header('Content-Length', str(len(body)))
+				self.end_headers()
+				self.wfile.write(body)
+			def log_message(self, format, *arguments):
+				pass
+		self.server = BaseHTTPServer.HTTPServer((address, port), Handler)
+		thread = threading.Thread(target=self.server.serve_forever)
+		thread.daemon = True
+		thread.start()
+	def _loop(self):
+		while not self.stopped.is_set():
+			started = time()
+			self.refresh()
+			self.stopped.wait(max(0, self.interval - (time() - started)))
+
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
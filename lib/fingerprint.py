@@ -0,0 +1,125 @@
+#	This program is free software: you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation, either version 3 of the License, or
+#	(at your option) any later version.
+#
+#	This program is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#	Copyright 2013, AMS-IX
+#	Original author: Sean Rijs
+#	Current maintainer: Stefan Plug
+#	Contact: stefan.plug@ams-ix.net
+#
+#	This library creates an API for Anritsu nework Generators
+#
+#!/bin/python
+
+"""
+fingerprint.py - this module keeps a persisted fingerprint of the streams committed on every port, so an unchanged port keeps its stream table and only gets its counters cleared.
+"""
+
+import hashlib
+import json
+import os
+from anritsu import port, stream, audit
+
+# The fields read back per stream by the probe, they differ between most trials
+PROBE_QUERIES = (stream.FIELDS['frames_per_burst'].query, stream.FIELDS['frame_size_value'].query)
+
+def fingerprint(stream_objects):
+	"""Return a hash of the port selection and command messages of a list of stream objects.
+
+	:param stream_objects: a list of stream objects
+
+	"""
+	digest = hashlib.sha1()
+	for stream_object in stream_objects:
+		digest.update(''.join(stream_object.port_commands))
+		digest.update(''.join(stream_object.commands))
+		digest.update('\0')
+	return digest.hexdigest()
+
+def probe(anritsu_control, location, stream_objects):
+	"""Clear the counters of a port and check cheaply that its stream table still holds the given streams, with one write and one pipelined read: the stream IDs in the table and, per stream, only the fields of PROBE_QUERIES it sets. Returns True if all agree.
+
+	:param anritsu_control: an Analyzer object
+	:param location: the (unit, module, port) tuple
+	:param stream_objects: the list of stream objects for the port
+
+	"""
+	messages = [port.block(port.clear_counters, *location)]
+	messages.extend(port.stream_table())
+	expected = []
+	for stream_object in stream_objects:
+		messages.append(':TSTReam:TABLe:ID ' + str(stream_object.stream_identification_number) + '\n')
+		for message in PROBE_QUERIES:
+			if message in stream_object.stream_queries:
+				messages.append(message)
+				expected.append(stream_object.stream_queries[message])
+	replies = anritsu_control.send_recv_batch(messages)
+	ids = sorted(int(stream_object.stream_identification_number) for stream_object in stream_objects)
+	if replies[0] != str(len(ids)) + '\n' or replies[1] != ','.join(str(stream_id) for stream_id in ids) + '\n':
+		return False
+	return replies[2:] == expected
+
+class FingerprintCache:
+	"""A file with the fingerprint of the streams last committed on every port.
+
+	:ivar path: the JSON file the fingerprints are stored in
+	:ivar entries: a dictionary with 'unit/module/port' as key and the fingerprint as value
+
+	"""
+	def __init__(self, path):
+		"""Open a fingerprint file, created when it doesn't exist.
+
+		:param path: the JSON file
+
+		"""
+		self.path = path
+		self.entries = {}
+		if os.path.exists(path):
+			with open(path) as fingerprint_file:
+				self.entries = json.load(fingerprint_file)
+	def prepare(self, anritsu_control, location, stream_objects):
+		"""Make sure a port has exactly the given streams, with cleared counters. If the fingerprint of the streams equals the stored one and the stream table agrees with them, only the counters are cleared. The table is checked with a cheap probe, see probe(), and only when the probe disagrees with a full audit of all fields. Otherwise the port is initialized, the streams are committed and the fingerprint is stored. Returns True if the stream table was reused.
+
+		:param anritsu_control: an Analyzer object
+		:param location: the (unit, module, port) tuple
+		:param stream_objects: the list of stream objects for the port
+
+		"""
+		key = '/'.join(str(number) for number in location)
+		current = fingerprint(stream_objects)
+		if self.entries.get(key) == current:
+			if probe(anritsu_control, location, stream_objects) or audit.audit(anritsu_control, stream_objects).in_sync():
+				anritsu_control.rates.clear(*location)
+				return True
+		anritsu_control.port_clear_own(location[0], location[1], location[2])
+		# Forget the fingerprint first, a failing commit leaves the port unknown
+		self.forget(location)
+		anritsu_control.stream_commit_batch(stream_objects)
+		self.entries[key] = current
+		self.save()
+		return False
+	def forget(self, location):
+		"""Remove the fingerprint of a port, e.g. after changing it outside this cache.
+
+		:param location: the (unit, module, port) tuple
+
+		"""
+		if self.entries.pop('/'.join(str(number) for number in location), None) != None:
+			self.save()
+	def save(self):
+		"""Write the fingerprints to the file, atomically."""
+		temporary_path = self.path + '.tmp'
+		with open(temporary_path, 'w') as fingerprint_file:
+			json.dump(self.entries, fingerprint_file, indent=1, sort_keys=True)
+		os.rename(temporary_path, self.path)
+
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
@@ -24,10 +24,19 @@
 input_validator.py - this module is used to validate user input with a given set.
 """
 
-import sys
+class Range:
+	"""An inclusive range of allowed integers, validated by comparing with its bounds instead of iterating like xrange.
+
+	:ivar minimum: the minimum allowed integer
+	:ivar maximum: the maximum allowed integer
+
+	"""
+	def __init__(self, minimum, maximum):
+		self.minimum = int(minimum)
+		self.maximum = int(maximum)
 
 def value_minimum_maximum(minimum, maximum, user_input):
-	"""This function is used to validate user input with the allowed value range for the targeted Anritsu variable. If this function returns True, the user input is validated.
+	"""This function is used to validate user input with the allowed value range for the targeted Anritsu variable. If this function returns True, the user input is validated, otherwise a ValueError is raised.
 
 	:param minimum: the minimum allowed integer
 	:param maximum: the maximum allowed integer
@@ -39,36 +48,42 @@ def value_minimum_maximum(minimum, maximum, user_input):
 	# We handle exceptions here in case someone for example inputs a string instead of an int
 	try:
 		user_input = int(user_input)
-	except:
-		error = sys.exc_info()[0]
-		print("Could not validate input because of the error: %s" % error)
+	except (TypeError, ValueError):
+		raise ValueError('given input value: ' + str(user_input) + ', is not an integer')
 	# If the following 'if' passes, the input is validated
-	if user_input < minimum and user_input > maximum:
+	if user_input >= minimum and user_input <= maximum:
 		return True
 	# The input is invalid, testing what is wrong and raise the correct error.
 	elif user_input > maximum:
-		print('given input value: ' + str(user_input) + ', exceeds the maximum value: ' + str(maximum))
-	elif user_input < minimum:
-		print('given input value: ' + str(user_input) + ', exceeds the minimum value: ' + str(minimum))
+		raise ValueError('given input value: ' + str(user_input) + ', exceeds the maximum value: ' + str(maximum))
+	else:
+		raise ValueError('given input value: ' + str(user_input) + ', exceeds the minimum value: ' + str(minimum))
 
 def string_set(allowed_strings, user_input):
-	"""This function is used to validate user input with the allowed strings for the targeted Anritsu variable. If this function returns True, the user input is validated.
+	"""This function is used to validate user input with the allowed strings for the targeted Anritsu variable. If this function returns True, the user input is validated, otherwise a ValueError is raised.
 
-	:param allowed_strings: an array of allowed strings which the Anritsu should allow
-	:param user_input: the user input its string to test against the allowed list of strings
+	:param allowed_strings: a frozenset (or any other collection) of allowed strings which the Anritsu should allow
+	:param user_input: the user input its string to test against the allowed set of strings
 
 	"""
-	input_validated = False
-	# Test if the user_input matches any of the allowed_strings
-	for selected_string in allowed_strings:
-		if selected_string == user_input:
-			input_validated = True
-			continue
-	# If none matched, raise an error
-	if input_validated != True:
-			print('the given user input: ' +  str(user_input) + ', is not found in the allowed list.')
-	# If we came here, the input was validated
-	else:
+	if not isinstance(allowed_strings, frozenset):
+		allowed_strings = frozenset(allowed_strings)
+	# A set lookup instead of a scan over every allowed string
+	if user_input not in allowed_strings:
+		raise ValueError('the given user input: ' +  str(user_input) + ', is not found in the allowed list.')
+	return True
+
+def allowed(allowed_values, user_input):
+	"""Validate user input with a Range or a frozenset of strings. If this function returns True, the user input is validated, otherwise a ValueError is raised.
+
+	:param allowed_values: a Range of allowed integers, a frozenset of allowed strings, or None to allow any input
+	:param user_input: the user input to test
+
+	"""
+	if allowed_values == None:
 		return True
+	if isinstance(allowed_values, Range):
+		return value_minimum_maximum(allowed_values.minimum, allowed_values.maximum, user_input)
+	return string_set(allowed_values, user_input)
 
 # vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
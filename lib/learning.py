@@ -0,0 +1,97 @@
+#	This program is free software: you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation, either version 3 of the License, or
+#	(at your option) any later version.
+#
+#	This program is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#	Copyright 2013, AMS-IX
+#	Original author: Sean Rijs
+#	Current maintainer: Stefan Plug
+#	Contact: stefan.plug@ams-ix.net
+#
+#	This library creates an API for Anritsu nework Generators
+#
+#!/bin/python
+
+"""
+learning.py - this module keeps track of the MAC addresses the device under test has learned, so learning passes are only sent when its MAC table entries may have aged out.
+"""
+
+from time import time
+from anritsu import combined_tests, convert_calc
+
+class LearningManager:
+	"""Remembers when every (port, MAC address) pair last sent traffic and sends a short learning burst only when an entry may have aged out of the MAC table of the device under test.
+
+	:ivar ttl: the aging time in seconds of the device under test, keep it below the configured MAC aging time
+	:ivar frames: the amount of frames of a learning burst
+	:ivar frame_size: the frame size of a learning burst
+	:ivar speed: the load in percent of a learning burst
+	:ivar last_seen: a dictionary with a ((unit, module, port), MAC address) tuple as key and the time it last sent traffic as value
+
+	"""
+	def __init__(self, ttl=240, frames=16, frame_size=64, speed=10):
+		self.ttl = ttl
+		self.frames = frames
+		self.frame_size = frame_size
+		self.speed = speed
+		self.last_seen = {}
+	def seen(self, location, timestamp=None):
+		"""Register that a port sent traffic with its own source MAC address.
+
+		:param location: the (unit, module, port) tuple
+		:param timestamp: the time the traffic was sent, defaults to now
+
+		"""
+		if timestamp == None:
+			timestamp = time()
+		location = tuple(str(number) for number in location)
+		self.last_seen[(location, convert_calc.MactoHex('00-00', location[0], location[1], location[2]))] = timestamp
+	def expired(self, locations, now=None):
+		"""Return True if the MAC address of any of the ports may have aged out.
+
+		:param locations: a list of (unit, module, port) tuples
+		:param now: the time to compare with, defaults to now
+
+		"""
+		if now == None:
+			now = time()
+		for location in locations:
+			location = tuple(str(number) for number in location)
+			last = self.last_seen.get((location, convert_calc.MactoHex('00-00', location[0], location[1], location[2])))
+			if last == None or now - last >= self.ttl:
+				return True
+		return False
+	def learn(self, anritsu_control, p1, p2, Gbps):
+		"""Send a short learning burst between two ports if needed. Returns True if a burst was sent, False if the entries were still warm.
+
+		:param anritsu_control: an Analyzer object
+		:param p1: the first (unit, module, port)
+		:param p2: the second (unit, module, port)
+		:param Gbps: the speed of the ports in Gbps
+
+		"""
+		if not self.expired([p1, p2]):
+			return False
+		mac_a = convert_calc.MactoHex('00-00', p1[0], p1[1], p1[2])
+		mac_b = convert_calc.MactoHex('00-00', p2[0], p2[1], p2[2])
+		anritsu_control.port_clear_own(p1[0], p1[1], p1[2])
+		anritsu_control.port_clear_own(p2[0], p2[1], p2[2])
+		IFG = convert_calc.calculate_inter_frame_gap(self.speed, 8, self.frame_size, Gbps)
+		combined_tests.set_port(anritsu_control, p1, mac_a, mac_b, 1, self.frames, self.frame_size, IFG[1])
+		combined_tests.set_port(anritsu_control, p2, mac_b, mac_a, 1, self.frames, self.frame_size, IFG[1])
+		anritsu_control.count_transmit(p1[0], p1[1], p1[2], p2[0], p2[1], p2[2])
+		anritsu_control.wait_for_transmission(p2[0], p2[1], p2[2], 'STOP')
+		anritsu_control.stop_counter(p1[0], p1[1], p1[2], p2[0], p2[1], p2[2])
+		self.seen(p1)
+		self.seen(p2)
+		return True
+
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
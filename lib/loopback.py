@@ -0,0 +1,109 @@
+#	This program is free software: you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation, either version 3 of the License, or
+#	(at your option) any later version.
+#
+#	This program is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#	Copyright 2013, AMS-IX
+#	Original author: Sean Rijs
+#	Current maintainer: Stefan Plug
+#	Contact: stefan.plug@ams-ix.net
+#
+#	This library creates an API for Anritsu nework Generators
+#
+#!/bin/python
+
+"""
+loopback.py - this module contains a local stand-in for an Anritsu, to run the library without a device.
+"""
+
+import socket
+
+class LoopbackSocket:
+	"""A socket-like object which answers the messages of this library like an Anritsu would: a query returns the value last set by its command on the selected port (and stream), counters return zero, the stream table lists the stream IDs with fields set and streams are always stopped. Pass it as the connection of an Analyzer.
+
+	:ivar state: a dictionary with a (selection, command path) tuple as key and its last set value as value
+	:ivar written: a list of every write, in order
+	:ivar replies: the replies waiting to be received
+
+	"""
+	SELECTION = (':UENTry:ID', ':MODule:ID', ':PORT:ID', ':TSTReam:TABLe:ID')
+	def __init__(self):
+		self.state = {}
+		self.selected = dict((path, '0') for path in self.SELECTION)
+		self.written = []
+		self.replies = ''
+	def settimeout(self, timeout):
+		pass
+	def send(self, data):
+		self.sendall(data)
+		return len(data)
+	def sendall(self, data):
+		self.written.append(data)
+		for message in data.split('\n'):
+			if not message:
+				continue
+			if message.endswith('?'):
+				self.replies = self.replies + self.reply(message[:-1]) + '\n'
+				continue
+			path_value = message.split(' ', 1)
+			if path_value[0] in self.SELECTION:
+				self.selected[path_value[0]] = path_value[1]
+			elif path_value[0] == ':PORT:OWNership:TAKE':
+				self.state[self.key(':PORT:OWNership')] = '1'
+			elif path_value[0] in (':PORT:OWNership:CLEar', ':PORT:OWNership:RELease'):
+				self.state[self.key(':PORT:OWNership')] = '0'
+			elif path_value[0] == ':TSTReam:TABLe:ACLear':
+				port_key = self.key('')[0][:3]
+				for key in self.state.keys():
+					if key[0][:3] == port_key and len(key[0]) == 4:
+						del self.state[key]
+			elif len(path_value) == 2:
+				self.state[self.key(path_value[0])] = path_value[1]
+	def key(self, path):
+		"""Return the state key of a command path: stream items are kept per port and stream ID, other settings per port."""
+		selection = tuple(self.selected[selection_path] for selection_path in self.SELECTION[:3])
+		if path.startswith(':TSTReam:TABLe:ITEM'):
+			selection = selection + (self.selected[':TSTReam:TABLe:ID'],)
+		return (selection, path)
+	def reply(self, path):
+		"""Return the reply on a query, without the newline.
+
+		:param path: the query message without the question mark
+
+		"""
+		if path in self.SELECTION:
+			return self.selected[path]
+		if path.startswith(':COUNter'):
+			return '0,0'
+		if path == ':TSTReam:STATe':
+			return '0'
+		if path == ':TSTReam:TABLe:COUNt':
+			return str(len(self.stream_ids()))
+		if path == ':TSTReam:TABLe:IDList':
+			return ','.join(self.stream_ids())
+		# The Anritsu sets this implicitly with a test frame
+		if path == ':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:ITFRame':
+			return self.state.get(self.key(':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:ENABle'), '0')
+		return self.state.get(self.key(path), '0')
+	def stream_ids(self):
+		"""Return the sorted list of stream IDs with fields set on the selected port."""
+		port_key = self.key('')[0][:3]
+		return sorted(set(key[0][3] for key in self.state if key[0][:3] == port_key and len(key[0]) == 4), key=int)
+	def recv(self, size):
+		if not self.replies:
+			raise socket.timeout()
+		data = self.replies[:size]
+		self.replies = self.replies[size:]
+		return data
+	def close(self):
+		pass
+
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
@@ -0,0 +1,156 @@
+#	This program is free software: you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation, either version 3 of the License, or
+#	(at your option) any later version.
+#
+#	This program is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#	Copyright 2013, AMS-IX
+#	Original author: Sean Rijs
+#	Current maintainer: Stefan Plug
+#	Contact: stefan.plug@ams-ix.net
+#
+#	This library creates an API for Anritsu nework Generators
+#
+#!/bin/python
+
+"""
+mesh.py - this module builds full-mesh and partial-mesh traffic between many ports, as on a shared peering LAN where every member port talks to every other.
+"""
+
+from anritsu import convert_calc
+
+# The offset in bytes of the flow test frame in a frame, behind the Ethernet and IPv4 headers
+FLOW_OFFSET = '34'
+# The highest flow ID of a test frame
+FLOW_ID_MAXIMUM = 65535
+
+def full_mesh(ports, load):
+	"""Return a traffic matrix in which every port sends to every other port, its load split evenly over its destinations.
+
+	:param ports: a list of (unit, module, port) tuples
+	:param load: the load in percent every port sends in total
+
+	"""
+	matrix = {}
+	for source in ports:
+		for destination in ports:
+			if source != destination:
+				matrix[(source, destination)] = float(load) / (len(ports) - 1)
+	return matrix
+
+class Mesh:
+	"""Traffic between many ports, described by a traffic matrix. Every sending port gets one stream per destination, with the source MAC address of its own port, the destination MAC address of the destination port and a FLOW test frame with the flow ID of the (source, destination) pair, so every destination counts the received frames of every flow on its own. A port sends its streams one after the other at its total load, the frames of every stream are its share of that load, so over the duration every flow averages its own load.
+
+	:ivar ports: the list of all (unit, module, port) tuples in the matrix
+	:ivar matrix: a dictionary with a (source, destination) tuple of (unit, module, port) tuples as key and the load in percent as value
+	:ivar frame_size: the frame size in bytes
+	:ivar Gbps: the speed of the ports in Gbps
+	:ivar sec: the duration in seconds
+	:ivar flow_ids: a dictionary with the (source, destination) tuple as key and its flow ID as value
+	:ivar expected: a dictionary with the (source, destination) tuple as key and the amount of frames it sends as value
+	:ivar frame_rates: a dictionary with the sending (unit, module, port) tuple as key and its frames per second as value
+	:ivar skew: the measured seconds between the first and last sender start of the last run, see Analyzer.count_transmit_group
+
+	"""
+	def __init__(self, matrix, frame_size, Gbps, sec):
+		self.matrix = dict((pair, load) for pair, load in matrix.iteritems() if load > 0)
+		self.frame_size = frame_size
+		self.Gbps = Gbps
+		self.sec = sec
+		self.ports = []
+		for source, destination in sorted(self.matrix):
+			for location in (source, destination):
+				if location not in self.ports:
+					self.ports.append(location)
+		if len(self.matrix) > FLOW_ID_MAXIMUM:
+			raise ValueError('a mesh can have at most ' + str(FLOW_ID_MAXIMUM) + ' flows, not ' + str(len(self.matrix)))
+		self.flow_ids = dict((pair, teller + 1) for teller, pair in enumerate(sorted(self.matrix)))
+		self.expected = {}
+		self.frame_rates = {}
+		self.skew = None
+	def senders(self):
+		"""Return the list of ports which send traffic."""
+		return [location for location in self.ports if any(source == location for source, destination in self.matrix)]
+	def streams(self, anritsu_control):
+		"""Create the stream objects of all ports.
+
+		:param anritsu_control: an Analyzer object
+
+		"""
+		stream_objects = []
+		self.expected = {}
+		for source in self.senders():
+			flows = sorted((destination, load) for (flow_source, destination), load in self.matrix.iteritems() if flow_source == source)
+			total = sum(load for destination, load in flows)
+			if total > 100:
+				raise ValueError('port ' + '/'.join(source) + ' would send ' + str(total) + '% load')
+			IFG = convert_calc.calculate_inter_frame_gap(total, 8, self.frame_size, self.Gbps)
+			frames = convert_calc.calculate_frames(self.sec, 8, IFG[0], self.frame_size, self.Gbps)
+			self.frame_rates[source] = frames / float(self.sec)
+			for teller, (destination, load) in enumerate(flows):
+				flow_frames = max(1, int(frames * load / total))
+				self.expected[(source, destination)] = flow_frames
+				new_stream = anritsu_control.stream(teller + 1, source[0], source[1], source[2])
+				new_stream.distribution('NEXT')
+				new_stream.frames_per_burst(str(flow_frames))
+				new_stream.inter_frame_gap('FIXED', str(IFG[1]))
+				new_stream.frame_size('FIXED', self.frame_size)
+				new_stream.frame_source_address(convert_calc.MactoHex('00-00', source[0], source[1], source[2]))
+				new_stream.frame_destination_address(convert_calc.MactoHex('00-00', destination[0], destination[1], destination[2]))
+				new_stream.protocol('IPV4')
+				new_stream.ipv4_source_address('127.0.0.1/24', 'STATIC')
+				new_stream.ipv4_destination_address('127.0.0.0/24', 'RANDOM')
+				new_stream.test_frame('FLOW', FLOW_OFFSET, str(self.flow_ids[(source, destination)]))
+				stream_objects.append(new_stream)
+		return stream_objects
+	def run(self, anritsu_control):
+		"""Configure, start and verify the whole mesh with batched I/O: one write to initialize all ports, one batched stream commit, one write to start all counters and then all transmitters, one pipelined read to measure the start skew, pipelined state polls, one write to stop the counters and one pipelined read of the flow counters of the destinations. Returns the loss matrix, see loss().
+
+		:param anritsu_control: an Analyzer object
+
+		"""
+		anritsu_control.send_batch([anritsu_control.initialize_block(*location) for location in self.ports])
+		for location in self.ports:
+			anritsu_control.rates.clear(*location)
+		anritsu_control.stream_commit_batch(self.streams(anritsu_control))
+		self.skew = anritsu_control.count_transmit_group(self.ports, self.senders(), self.frame_rates).skew
+		anritsu_control.wait_for_transmission_group(self.senders())
+		anritsu_control.stop_counter_group(self.ports)
+		flows = [(destination, self.flow_ids[(source, destination)]) for source, destination in sorted(self.matrix)]
+		counters = anritsu_control.read_flow_counters(flows)
+		return self.loss(dict(((source, destination), counters[(destination, self.flow_ids[(source, destination)])]) for source, destination in self.matrix))
+	def loss(self, received):
+		"""Return the per-flow loss matrix: a dictionary with the (source, destination) tuple as key and the lost frames as value, the expected frames of the flow minus the test frames its destination received with its flow ID.
+
+		:param received: a dictionary with the (source, destination) tuple as key and the test frames received of that flow as value
+
+		"""
+		return dict((pair, frames - received.get(pair, 0)) for pair, frames in self.expected.iteritems())
+
+def print_loss(matrix, ports):
+	"""Print a loss matrix with the sources as rows and the destinations as columns.
+
+	:param matrix: the loss matrix, as returned by Mesh.run
+	:param ports: the list of (unit, module, port) tuples, in the order to print
+
+	"""
+	names = ['/'.join(str(number) for number in location) for location in ports]
+	width = max([len(name) for name in names] + [10])
+	print('src \\ dst'.ljust(width) + ' ' + ' '.join(name.rjust(width) for name in names))
+	for source, name in zip(ports, names):
+		cells = []
+		for destination in ports:
+			if (source, destination) in matrix:
+				cells.append(str(matrix[(source, destination)]).rjust(width))
+			else:
+				cells.append('-'.rjust(width))
+		print(name.ljust(width) + ' ' + ' '.join(cells))
+
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
@@ -26,6 +26,45 @@ port.py - this module is contains funtions to create port read messages.
 
 from anritsu import error
 from anritsu import input_validator
+from collections import OrderedDict
+
+# The names of the counter groups of read_group
+COUNTER_GROUPS = frozenset([None, 'test_and_IPV4', 'test', 'ARP', 'IPV4', 'IPV6'])
+# The maximum amount of pre-joined message blocks kept by block() and read_group_items()
+CACHE_SIZE = 4096
+_cache = OrderedDict()
+
+def _cached(key, build):
+	"""Return the cached value of a key, or build, cache and return it. The oldest value is dropped when the cache is full."""
+	try:
+		return _cache[key]
+	except KeyError:
+		pass
+	value = build()
+	if len(_cache) >= CACHE_SIZE:
+		_cache.popitem(last=False)
+	_cache[key] = value
+	return value
+
+def block(builder, *arguments):
+	"""Return the messages of a builder function of this module as one immutable pre-joined string, ready to be sent with one write. Blocks are cached by the builder and its arguments, e.g. (unit, module, port), so polling loops don't rebuild and join the same messages on every call.
+
+	:param builder: a function of this module which returns a list of messages, e.g. port.initialize or port.stop_counter
+	:param arguments: the arguments of the builder function
+
+	"""
+	arguments = tuple(str(argument) for argument in arguments)
+	return _cached((builder.__name__,) + arguments, lambda: ''.join(builder(*arguments)))
+
+def read_group_items(counter_group_name, anritsu_type, rates=True):
+	"""Return the (query message, description) pairs of read_group as a cached tuple sorted by query message.
+
+	:param counter_group_name: the name of the group of counters
+	:param anritsu_type: the Anritsu type
+	:param rates: if False, the per second rate counters are left out
+
+	"""
+	return _cached(('read_group', counter_group_name, anritsu_type, rates), lambda: tuple(sorted(read_group(counter_group_name, anritsu_type, rates).iteritems())))
 
 def initialize(unit, module, port):
 	"""Creates messages to initialize a port for first use, more specifically: set port to default settings, clear/take ownership, clear/stop counters, clear streams
@@ -47,6 +86,39 @@ def initialize(unit, module, port):
 	init.append(':COUNter:STOP\n')
 	return init
 
+def initialize_shared(unit, module, port):
+	"""Creates messages to initialize a port for first use like initialize, but only take its ownership, without clearing the ownership of another user first, as needed on a shared chassis. Check the ownership afterwards, see ownership.
+
+	:param unit: the unit (generator) number as a string to be selected
+	:param module: the module (network card) number as a string to be selected
+	:param port: the port number as a string to be selected with ownership taken and its counters and streams cleared
+
+	"""
+	init = []
+	init.append(':UENTry:ID ' + str(unit) + '\n')
+	init.append(':MODule:ID ' + str(module) + '\n')
+	init.append(':PORT:ID ' + str(port) + '\n')
+	init.append(':PORT:OWNership:TAKE\n')
+	init.append(':PORT:DEFault\n')
+	init.append(':COUNter:CLEar\n')
+	init.append(':TSTReam:TABLe:ACLear\n')
+	init.append(':COUNter:STOP\n')
+	return init
+
+def clear_counters(unit, module, port):
+	"""Creates messages to take ownership of a port and clear/stop its counters, while keeping its settings and streams
+
+	:param unit: the unit (generator) number as a string to be selected
+	:param module: the module (network card) number as a string to be selected
+	:param port: the port number as a string to be selected
+
+	"""
+	clear = select(unit, module, port)
+	clear.append(':PORT:OWNership:TAKE\n')
+	clear.append(':COUNter:CLEar\n')
+	clear.append(':COUNter:STOP\n')
+	return clear
+
 def select(unit, module, port):
 	"""Creates messages to select a port
 
@@ -61,6 +133,36 @@ def select(unit, module, port):
 	select.append(':PORT:ID ' + str(port) + '\n')
 	return select 
 
+def take_ownership(unit, module, port):
+	"""Creates messages to take ownership of a port, without clearing the ownership of another user first.
+
+	:param unit: the unit (generator) number as a string to be selected
+	:param module: the module (network card) number as a string to be selected
+	:param port: the port number as a string to be selected
+
+	"""
+	take = select(unit, module, port)
+	take.append(':PORT:OWNership:TAKE\n')
+	return take
+
+def ownership():
+	"""Creates messages to query the ownership of the selected port, the Anritsu replies 1 if this connection owns it"""
+	own = []
+	own.append(':PORT:OWNership?\n')
+	return own
+
+def release_ownership(unit, module, port):
+	"""Creates messages to release the ownership of a port, so other users can take it.
+
+	:param unit: the unit (generator) number as a string to be selected
+	:param module: the module (network card) number as a string to be selected
+	:param port: the port number as a string to be selected
+
+	"""
+	release = select(unit, module, port)
+	release.append(':PORT:OWNership:RELease\n')
+	return release
+
 def read(counter_name):
 	"""Creates messages to read a port its amount of transmitted frames
 
@@ -88,7 +190,25 @@ def read(counter_name):
 		print('unkown counter counter_name')
 	return queries
 
-def read_group(counter_group_name, anritsu_type):
+def read_flow(flow_id):
+	"""Creates messages to read the received test frames of one flow ID on the selected port, as sent by streams with a FLOW test frame, see Stream.test_frame
+
+	:param flow_id: the flow ID of the test frames
+
+	"""
+	queries = []
+	queries.append(':COUNter:FLOW:ID ' + str(flow_id) + '\n')
+	queries.append(':COUNter:FLOW:RECeived:TFRames?\n')
+	return queries
+
+def read_group(counter_group_name, anritsu_type, rates=True):
+	"""Creates a dictionary with the query messages of a counter group as key and their description as value.
+
+	:param counter_group_name: the name of the group of counters, can select out of the following set: None, 'test_and_IPV4', 'test', 'ARP', 'IPV4', 'IPV6'
+	:param anritsu_type: the Anritsu type, because not all counters are applicable on all Anritsu devices
+	:param rates: if False, the per second rate counters are left out, so only the absolute counters are queried (rates can then be calculated with the rate module)
+
+	"""
 	queries = {}
 	queries[':COUNter:TRANsmitted:BYTEs?\n'] = str('Transmitted bytes')
 	#queries[':COUNter:TRANsmitted:BYTEs:BPS?\n'] = str('Transmitted bytes per second')
@@ -139,6 +259,10 @@ def read_group(counter_group_name, anritsu_type):
 		queries[':COUNter:IPV6:RECeived:PACKets:PPS?\n'] = str('IPv6 received packets per second')
 		queries[':COUNter:IPV6:TRANsmitted:PACKets?\n'] = str('IPv6 transmitted packets')
 		queries[':COUNter:IPV6:TRANsmitted:PACKets:PPS?\n'] = str('IPv6 transmitted packets per second')
+	if rates == False:
+		for message in queries.keys():
+			if message.endswith((':BPS?\n', ':FPS?\n', ':PPS?\n')):
+				del queries[message]
 	return queries
 
 def transmit(unit_number, module_number, port_number):
@@ -221,6 +345,13 @@ def stop_stream(unit_number, module_number, port_number):
 	stop.append(':TSTReam:STOP\n')
 	return stop
 
+def stream_table():
+	"""Creates messages to read the stream table of the selected port: the amount of streams in the table and the list of their IDs"""
+	table = []
+	table.append(':TSTReam:TABLe:COUNt?\n')
+	table.append(':TSTReam:TABLe:IDList?\n')
+	return table
+
 def transmit_state():
 	checkstopped = []
 	checkstopped.append(':TSTReam:STATe?\n')
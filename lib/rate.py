@@ -0,0 +1,95 @@
+#	This program is free software: you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation, either version 3 of the License, or
+#	(at your option) any later version.
+#
+#	This program is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#	Copyright 2013, AMS-IX
+#	Original author: Sean Rijs
+#	Current maintainer: Stefan Plug
+#	Contact: stefan.plug@ams-ix.net
+#
+#	This library creates an API for Anritsu nework Generators
+#
+#!/bin/python
+
+"""
+rate.py - this module calculates counter rates from successive absolute counter snapshots, so only the absolute counters have to be queried.
+"""
+
+from time import time
+
+class CounterRate:
+	"""Keeps the previous absolute counter snapshot of every port with its timestamp, and calculates the per second rates (frames/s, bytes/s, packets/s, errors/s) of a new snapshot from the difference.
+
+	:ivar snapshots: A dictionary with the (unit, module, port) as key and a (timestamp, counters) tuple as value.
+
+	"""
+	def __init__(self):
+		"""Creates an empty snapshot store."""
+		self.snapshots = {}
+	def clear(self, unit, module, port, timestamp=None):
+		"""Register that the counters of a port are cleared (e.g. by port_clear_own), the next snapshot of the port is then compared to zero counters at the time of clearing.
+
+		:param unit: the unit (generator) number as a string
+		:param module: the module (network card) number as a string
+		:param port: the port number as a string
+		:param timestamp: the time the counters were cleared, defaults to now
+
+		"""
+		if timestamp == None:
+			timestamp = time()
+		self.snapshots[(str(unit), str(module), str(port))] = (timestamp, None)
+	def forget(self, unit, module, port):
+		"""Remove the snapshot of a port, the next snapshot of the port will then be the first one.
+
+		:param unit: the unit (generator) number as a string
+		:param module: the module (network card) number as a string
+		:param port: the port number as a string
+
+		"""
+		self.snapshots.pop((str(unit), str(module), str(port)), None)
+	def update(self, unit, module, port, counters, timestamp=None):
+		"""Store a new absolute counter snapshot of a port and return the rates since the previous snapshot. The rates are returned with the counter description followed by ' per second' as key, the same naming the Anritsu rate counters have in port.read_group. The first snapshot of a port has no rates. When a counter decreased without clear() being called (someone else cleared the port), its rate is left out and the new value is used as the base for the next snapshot.
+
+		:param unit: the unit (generator) number as a string
+		:param module: the module (network card) number as a string
+		:param port: the port number as a string
+		:param counters: a dictionary with the counter description as key and its absolute integer value as value
+		:param timestamp: the time the counters were read, defaults to now
+
+		"""
+		if timestamp == None:
+			timestamp = time()
+		key = (str(unit), str(module), str(port))
+		previous = self.snapshots.get(key)
+		self.snapshots[key] = (timestamp, dict(counters))
+		rates = {}
+		if previous == None:
+			return rates
+		previous_timestamp, previous_counters = previous
+		interval = float(timestamp - previous_timestamp)
+		if interval <= 0:
+			return rates
+		for description, value in counters.iteritems():
+			# A cleared port counts from zero
+			if previous_counters == None:
+				previous_value = 0
+			elif description in previous_counters:
+				previous_value = previous_counters[description]
+			else:
+				continue
+			delta = value - previous_value
+			if delta < 0:
+				continue
+			rates[description + ' per second'] = delta / interval
+		return rates
+
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
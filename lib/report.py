@@ -0,0 +1,177 @@
+#	This program is free software: you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation, either version 3 of the License, or
+#	(at your option) any later version.
+#
+#	This program is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#	Copyright 2013, AMS-IX
+#	Original author: Sean Rijs
+#	Current maintainer: Stefan Plug
+#	Contact: stefan.plug@ams-ix.net
+#
+#	This library creates an API for Anritsu nework Generators
+#
+#!/bin/python
+
+"""
+report.py - this module writes counter snapshots as reports, row by row, to a terminal table, CSV or JSON lines.
+"""
+
+import csv
+import json
+from anritsu import port
+from collections import OrderedDict
+from sys import stdout
+from time import time
+
+# The minimum width of a value column of the terminal table, wide enough for counters up to 10^14
+VALUE_WIDTH = 14
+# The maximum amount of layouts kept by layout()
+CACHE_SIZE = 64
+
+_cache = OrderedDict()
+
+class Layout:
+	"""The precomputed columns of a report of a group of counters for a list of ports. A layout only depends on the counter group and the ports, so it is built once and reused for every refresh of the report.
+
+	:ivar ports: a list of (unit, module, port) tuples, in column order
+	:ivar descriptions: the list of counter descriptions, in row order
+	:ivar names: the list of port names as 'unit/module/port'
+	:ivar border: the border line of the terminal table
+	:ivar header: the header lines of the terminal table
+	:ivar row: the format string of a row of the terminal table
+
+	"""
+	def __init__(self, ports, descriptions):
+		self.ports = [tuple(str(number) for number in location) for location in ports]
+		self.descriptions = list(descriptions)
+		self.names = ['/'.join(location) for location in self.ports]
+		titles = ['Int ' + name for name in self.names]
+		description_width = max([len('Counter')] + [len(description) for description in self.descriptions])
+		widths = [max(VALUE_WIDTH, len(title)) for title in titles]
+		self.border = '+-' + '-+-'.join(['-' * description_width] + ['-' * width for width in widths]) + '-+\n'
+		self.header = self.border + '| ' + ' | '.join(['Counter'.ljust(description_width)] + [title.rjust(width) for title, width in zip(titles, widths)]) + ' |\n' + self.border.replace('-', '=')
+		self.row = '| %-' + str(description_width) + 's | ' + ' | '.join(['%' + str(width) + 's' for width in widths]) + ' |\n'
+
+def layout(ports, counter_group=None, anritsu_type='md1260a', rates=False):
+	"""Return the layout of a report of a group of counters for a list of ports. Layouts are cached, so the same report refreshed every poll cycle reuses its layout.
+
+	:param ports: a list of (unit, module, port) tuples
+	:param counter_group: the name of the group of counters, as in port.read_group
+	:param anritsu_type: can select out of the following set: 'md1230b', 'md1260a'
+	:param rates: if True, the Anritsu rate counters are included as well
+
+	"""
+	key = (tuple(tuple(str(number) for number in location) for location in ports), counter_group, anritsu_type, rates)
+	try:
+		value = _cache.pop(key)
+	except KeyError:
+		value = Layout(ports, [desc for message, desc in port.read_group_items(counter_group, anritsu_type, rates)])
+		if len(_cache) >= CACHE_SIZE:
+			_cache.popitem(last=False)
+	_cache[key] = value
+	return value
+
+class TableWriter:
+	"""Writes snapshots as a terminal table with a row per counter and a column per port.
+
+	:ivar output: the file object to write to
+
+	"""
+	def __init__(self, output=None):
+		if output == None:
+			output = stdout
+		self.output = output
+	def write(self, report_layout, snapshot):
+		"""Write a snapshot, a row at a time.
+
+		:param report_layout: the Layout of the report
+		:param snapshot: a dictionary with a (unit, module, port) tuple as key and a dictionary with counter descriptions and values as value, as returned by Analyzer.read_counter_snapshot
+
+		"""
+		columns = [_counters(snapshot, location) for location in report_layout.ports]
+		self.output.write(report_layout.header)
+		for description in report_layout.descriptions:
+			self.output.write(report_layout.row % tuple([description] + [counters.get(description, '') for counters in columns]))
+		self.output.write(report_layout.border)
+
+class CsvWriter:
+	"""Writes snapshots as CSV, with a row per port and a column per counter. The header is written before the first snapshot only, so the refreshes of a report can be appended to one file.
+
+	:ivar output: the file object to write to
+
+	"""
+	def __init__(self, output=None):
+		if output == None:
+			output = stdout
+		self.output = output
+		self.writer = csv.writer(output)
+		self.started = False
+	def write(self, report_layout, snapshot):
+		"""Write a snapshot, a row at a time.
+
+		:param report_layout: the Layout of the report
+		:param snapshot: a dictionary with a (unit, module, port) tuple as key and a dictionary with counter descriptions and values as value
+
+		"""
+		if not self.started:
+			self.writer.writerow(['timestamp', 'port'] + report_layout.descriptions)
+			self.started = True
+		timestamp = time()
+		for location, name in zip(report_layout.ports, report_layout.names):
+			counters = _counters(snapshot, location)
+			self.writer.writerow([timestamp, name] + [counters.get(description, '') for description in report_layout.descriptions])
+
+class JsonLinesWriter:
+	"""Writes snapshots as JSON lines, with a line per port.
+
+	:ivar output: the file object to write to
+
+	"""
+	def __init__(self, output=None):
+		if output == None:
+			output = stdout
+		self.output = output
+	def write(self, report_layout, snapshot):
+		"""Write a snapshot, a line at a time.
+
+		:param report_layout: the Layout of the report
+		:param snapshot: a dictionary with a (unit, module, port) tuple as key and a dictionary with counter descriptions and values as value
+
+		"""
+		timestamp = time()
+		for location, name in zip(report_layout.ports, report_layout.names):
+			counters = _counters(snapshot, location)
+			self.output.write(json.dumps({'timestamp': timestamp, 'port': name, 'counters': counters}, sort_keys=True) + '\n')
+
+def print_counters(anritsu_control, ports, counter_group=None, writer=None, rates=False):
+	"""Read a group of counters of many ports with one pipelined read and write them as a report.
+
+	:param anritsu_control: the Analyzer object to read the counters with
+	:param ports: a list of (unit, module, port) tuples
+	:param counter_group: the name of the group of counters
+	:param writer: a TableWriter, CsvWriter or JsonLinesWriter, defaults to a TableWriter on stdout
+	:param rates: if True, the Anritsu rate counters are read as well
+
+	"""
+	if writer == None:
+		writer = TableWriter()
+	report_layout = layout(ports, counter_group, anritsu_control.anritsu_type, rates)
+	writer.write(report_layout, anritsu_control.read_counter_snapshot(report_layout.ports, counter_group, rates))
+
+def _counters(snapshot, location):
+	"""Return the counters of a port in a snapshot, whether it is keyed by tuples of strings or of numbers."""
+	try:
+		return snapshot[location]
+	except KeyError:
+		for key, counters in snapshot.iteritems():
+			if tuple(str(number) for number in key) == location:
+				return counters
+	return {}
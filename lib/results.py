@@ -0,0 +1,140 @@
+#	This program is free software: you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation, either version 3 of the License, or
+#	(at your option) any later version.
+#
+#	This program is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#	Copyright 2013, AMS-IX
+#	Original author: Sean Rijs
+#	Current maintainer: Stefan Plug
+#	Contact: stefan.plug@ams-ix.net
+#
+#	This library creates an API for Anritsu nework Generators
+#
+#!/bin/python
+
+"""
+results.py - this module streams test results to disk, so sweep and soak runs can be analysed afterwards.
+"""
+
+import csv
+import glob
+import json
+import os
+from time import time
+
+COLUMNS = ['timestamp', 'test', 'tx_port', 'rx_port', 'frame_size', 'load', 'seconds', 'expected_frames', 'tx_frames', 'rx_frames', 'passed', 'elapsed', 'port', 'counter', 'value', 'minimum', 'maximum']
+
+class ResultStore:
+	"""An append-only store for per-trial records. Records are kept in a buffer and written in batches, so a long soak run doesn't grow in memory and the control loop isn't slowed down by a disk write per trial.
+
+	:ivar path: the file the records are appended to, for the 'npz' format every batch is written to its own numbered segment file next to it
+	:ivar file_format: the format of the file, can select out of the following set: 'csv', 'jsonl', 'npz'
+	:ivar columns: the list of record fields, in order
+	:ivar batch_size: the amount of buffered records which triggers a write
+
+	"""
+	def __init__(self, path, file_format='csv', columns=None, batch_size=100):
+		"""Open a results store, existing records in the file are kept.
+
+		:param path: the file to append the records to
+		:param file_format: can select out of the following set: 'csv', 'jsonl', 'npz'
+		:param columns: the list of record fields, defaults to COLUMNS
+		:param batch_size: the amount of buffered records which triggers a write
+
+		"""
+		if file_format not in ('csv', 'jsonl', 'npz'):
+			raise ValueError('unknown result file format: ' + str(file_format))
+		if columns == None:
+			columns = COLUMNS
+		self.path = path
+		self.file_format = file_format
+		self.columns = list(columns)
+		self.batch_size = int(batch_size)
+		self.buffer = []
+		self.segment = len(glob.glob(path + '.*.npz'))
+	def record(self, **fields):
+		"""Add a record to the buffer, a missing field is stored as empty and the timestamp is set when not given.
+
+		:param fields: the record fields as keywords, must be in columns
+
+		"""
+		for field in fields:
+			if field not in self.columns:
+				raise ValueError('unknown result field: ' + str(field))
+		if 'timestamp' in self.columns and fields.get('timestamp') == None:
+			fields['timestamp'] = time()
+		self.buffer.append([fields.get(column) for column in self.columns])
+		if len(self.buffer) >= self.batch_size:
+			self.flush()
+	def flush(self):
+		"""Write all buffered records to disk and empty the buffer."""
+		if not self.buffer:
+			return
+		if self.file_format == 'csv':
+			self._write_csv()
+		elif self.file_format == 'jsonl':
+			self._write_jsonl()
+		else:
+			self._write_npz()
+		self.buffer = []
+	def close(self):
+		"""Write the remaining buffered records."""
+		self.flush()
+	def _write_csv(self):
+		new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+		with open(self.path, 'ab') as result_file:
+			writer = csv.writer(result_file)
+			if new_file:
+				writer.writerow(self.columns)
+			for row in self.buffer:
+				writer.writerow(['' if value == None else value for value in row])
+	def _write_jsonl(self):
+		with open(self.path, 'ab') as result_file:
+			result_file.write(''.join(json.dumps(dict(zip(self.columns, row)), sort_keys=True) + '\n' for row in self.buffer))
+	def _write_npz(self):
+		# numpy is only required for the compact binary format
+		import numpy
+		arrays = {}
+		for index, column in enumerate(self.columns):
+			values = [row[index] for row in self.buffer]
+			if None in values:
+				arrays[column] = numpy.array(['' if value == None else str(value) for value in values])
+			else:
+				arrays[column] = numpy.array(values)
+		numpy.savez_compressed(self.path + '.' + str(self.segment).zfill(6) + '.npz', **arrays)
+		self.segment = self.segment + 1
+
+def read(path, file_format='csv'):
+	"""Read all records of a results store back as a list of dictionaries, for analysis after a run.
+
+	:param path: the file the records were appended to
+	:param file_format: can select out of the following set: 'csv', 'jsonl', 'npz'
+
+	"""
+	records = []
+	if file_format == 'csv':
+		with open(path, 'rb') as result_file:
+			records = list(csv.DictReader(result_file))
+	elif file_format == 'jsonl':
+		with open(path, 'rb') as result_file:
+			records = [json.loads(line) for line in result_file if line.strip()]
+	elif file_format == 'npz':
+		import numpy
+		for segment_path in sorted(glob.glob(path + '.*.npz')):
+			segment = numpy.load(segment_path)
+			columns = segment.files
+			for row in zip(*[segment[column].tolist() for column in columns]):
+				records.append(dict(zip(columns, row)))
+	else:
+		raise ValueError('unknown result file format: ' + str(file_format))
+	return records
+
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
@@ -0,0 +1,158 @@
+#	This program is free software: you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation, either version 3 of the License, or
+#	(at your option) any later version.
+#
+#	This program is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#	Copyright 2013, AMS-IX
+#	Original author: Sean Rijs
+#	Current maintainer: Stefan Plug
+#	Contact: stefan.plug@ams-ix.net
+#
+#	This library creates an API for Anritsu nework Generators
+#
+#!/bin/python
+
+"""
+scheduler.py - this module schedules test jobs on a shared chassis, jobs which need disjoint sets of ports run concurrently.
+"""
+
+import threading
+from time import time
+from anritsu import port, error
+
+class Job:
+	"""A test job with the ports it needs.
+
+	:ivar name: a description of the job
+	:ivar ports: a frozenset of the (unit, module, port) tuples the job needs
+	:ivar function: the function which runs the job, called with an Analyzer object and the job
+	:ivar submitted: the time the job was queued
+	:ivar started: the time the job started, None while queued
+	:ivar finished: the time the job finished, None while queued or running
+	:ivar result: the return value of the function
+	:ivar exception: the exception raised by the function, if any
+
+	"""
+	def __init__(self, name, ports, function):
+		self.name = name
+		self.ports = frozenset(tuple(str(number) for number in location) for location in ports)
+		self.function = function
+		self.submitted = time()
+		self.started = None
+		self.finished = None
+		self.result = None
+		self.exception = None
+	def wait_time(self):
+		"""Return the seconds the job waited in the queue."""
+		if self.started == None:
+			return time() - self.submitted
+		return self.started - self.submitted
+
+class Scheduler:
+	"""Queue test jobs and run every job as soon as none of its ports is used by a running job or by a job queued before it, so jobs can't starve. Every running job gets its own connection from a pool, which takes ownership of the job ports before and releases them after the job. The ownership of another user is never cleared: a job whose ports are owned by someone else fails with an AnritsuOwnershipError, and its connections initialize ports with port.initialize_shared instead of port.initialize.
+
+	:ivar connect: a function which returns a new Analyzer object, e.g. lambda: analyzer.Analyzer('10.0.0.1', 'md1260a')
+	:ivar max_connections: the maximum amount of concurrent jobs and connections
+	:ivar queue: the list of queued jobs
+	:ivar running: the list of running jobs
+	:ivar done: the list of finished jobs
+
+	"""
+	def __init__(self, connect, max_connections=4):
+		self.connect = connect
+		self.max_connections = max_connections
+		self.queue = []
+		self.running = []
+		self.done = []
+		self.idle = []
+		self.condition = threading.Condition()
+	def submit(self, name, ports, function):
+		"""Queue a job and return it.
+
+		:param name: a description of the job
+		:param ports: a list of (unit, module, port) tuples the job needs
+		:param function: the function which runs the job, called with an Analyzer object and the job
+
+		"""
+		job = Job(name, ports, function)
+		with self.condition:
+			self.queue.append(job)
+			self.condition.notify_all()
+		return job
+	def run(self):
+		"""Run all queued jobs and wait until they are finished, jobs submitted meanwhile are run as well. Returns the finished jobs."""
+		with self.condition:
+			while self.queue or self.running:
+				for job in self._startable():
+					self.queue.remove(job)
+					self.running.append(job)
+					job.started = time()
+					thread = threading.Thread(target=self._run_job, args=(job,))
+					thread.daemon = True
+					thread.start()
+				self.condition.wait(1)
+		for anritsu_control in self.idle:
+			anritsu_control.disconnect()
+		self.idle = []
+		return self.done
+	def report(self):
+		"""Print the queue wait time and run time of every finished job."""
+		for job in self.done:
+			state = 'failed: ' + str(job.exception) if job.exception != None else 'done'
+			print(job.name + ': waited ' + ('%.1f' % job.wait_time()) + ' s, ran ' + ('%.1f' % (job.finished - job.started)) + ' s, ' + state)
+	def _startable(self):
+		# Ports of running jobs and of jobs queued earlier are blocked, in queue order
+		blocked = set()
+		for job in self.running:
+			blocked.update(job.ports)
+		startable = []
+		for job in self.queue:
+			if len(self.running) + len(startable) >= self.max_connections:
+				break
+			if not blocked.intersection(job.ports):
+				startable.append(job)
+			blocked.update(job.ports)
+		return startable
+	def _run_job(self, job):
+		anritsu_control = None
+		try:
+			with self.condition:
+				if self.idle:
+					anritsu_control = self.idle.pop()
+			if anritsu_control == None:
+				anritsu_control = self.connect()
+				anritsu_control.clear_ownership = False
+			locations = sorted(job.ports)
+			replies = anritsu_control.send_recv_batch([port.block(port.take_ownership, *location) + port.block(port.ownership) for location in locations])
+			owned = [location for location, data in zip(locations, replies) if data == '1\n']
+			if len(owned) < len(locations):
+				anritsu_control.send_batch([port.block(port.release_ownership, *location) for location in owned])
+				job.exception = error.AnritsuOwnershipError([location for location in locations if location not in owned])
+			else:
+				try:
+					job.result = job.function(anritsu_control, job)
+				finally:
+					anritsu_control.send_batch([port.block(port.release_ownership, *location) for location in locations])
+		except Exception as exception:
+			job.exception = exception
+			# The connection state is unknown after an error, so it is not reused
+			if anritsu_control != None:
+				anritsu_control.disconnect()
+				anritsu_control = None
+		with self.condition:
+			job.finished = time()
+			self.running.remove(job)
+			self.done.append(job)
+			if anritsu_control != None:
+				self.idle.append(anritsu_control)
+			self.condition.notify_all()
+
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
@@ -26,9 +26,92 @@ stream.py - this module is contains the stream class to make messages to create
 
 from anritsu import convert_calc
 from anritsu import input_validator
+from anritsu import error
+import copy
+
+# The Anritsu types this API supports
+ANRITSU_TYPES = frozenset(['md1230b', 'md1260a'])
+# The allowed values shared by several fields
+GAP_NS = input_validator.Range(1, 1200000000000)
+AMOUNT = input_validator.Range(1, 1099511627775)
+FRAME_SIZE = input_validator.Range(8, 65280)
+ADDRESS_TYPES = frozenset(['GATEWAY', 'STATIC', 'INCREMENT', 'DECREMENT', 'RANDOM'])
+PROTOCOLS = frozenset(['NONE', 'ARP', 'IPV4', 'IGMP', 'IGAP', 'ICMP', 'TCP', 'UDP', 'RIP', 'DHCP', 'IPV6', 'ICMP6', 'TCP_IPV6', 'UDP_IPV6', 'TUNNEL', 'ICMP6_TUNNEL', 'TCP_TUNNEL', 'UDP_TUNNEL', 'TUNNEL6', 'TCP_TUNNEL6', 'UDP_TUNNEL6', 'IPX', 'IS_IS', 'MAC_CONTROL', 'EHTERNET', 'LEX_CONTROL', 'BPUD', 'LACP'])
+ARP_TYPES = {'ARP request': '1', 'ARP reply': '2', 'RARP request': '3', 'RARP reply': '4'}
+
+class Field:
+	"""A stream field: the SCPI path which sets it, the query dictionary its value is verified with, and its allowed values. The command and query strings are built once, so setting a field is a validation, an append and a dictionary store.
+
+	:ivar command: the command message without its value
+	:ivar query: the query message
+	:ivar queries: the name of the Stream query dictionary, 'stream_queries' or 'frame_queries'
+	:ivar allowed: a input_validator.Range, a frozenset of strings, or None to allow any value
+	:ivar anritsu_types: the frozenset of Anritsu types which support the field
+
+	"""
+	def __init__(self, path, queries, allowed=None, anritsu_types=ANRITSU_TYPES, query=None):
+		if query == None:
+			query = path
+		self.command = path + ' '
+		self.query = query + '?\n'
+		self.queries = queries
+		self.allowed = allowed
+		self.anritsu_types = anritsu_types
+
+# The schema of the stream fields, a new field only needs a line here to be set with Stream.set
+FIELDS = {
+	'distribution': Field(':TSTReam:TABLe:ITEM:CONTrol:DISTribution', 'stream_queries', frozenset(['CONT', 'CONT_BURST', 'STOP', 'NEXT', 'JUMP', 'JUMP_COUNT', 'JUMP_STOP'])),
+	'jump_to_id': Field(':TSTReam:TABLe:ITEM:CONTrol:JTID', 'stream_queries', input_validator.Range(1, 256)),
+	'count': Field(':TSTReam:TABLe:ITEM:CONTrol:COUNt', 'stream_queries', input_validator.Range(1, 16000000)),
+	'inter_burst_gap': Field(':TSTReam:TABLe:ITEM:CONTrol:GAP:IBG', 'stream_queries', GAP_NS),
+	'inter_stream_gap': Field(':TSTReam:TABLe:ITEM:CONTrol:GAP:ISG', 'stream_queries', GAP_NS),
+	'inter_frame_gap_type': Field(':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:TYPE', 'stream_queries', frozenset(['FIXED', 'RANDOM'])),
+	'inter_frame_gap_value': Field(':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:VALue', 'stream_queries', GAP_NS),
+	# The Anritsu reports the minimum of a random IFG as its value
+	'inter_frame_gap_minimum': Field(':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:MINimum', 'stream_queries', GAP_NS, query=':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:VALue'),
+	'inter_frame_gap_maximum': Field(':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:MAXimum', 'stream_queries', GAP_NS),
+	'burst_per_stream': Field(':TSTReam:TABLe:ITEM:CONTrol:BPSTream', 'stream_queries', AMOUNT),
+	'frames_per_burst': Field(':TSTReam:TABLe:ITEM:CONTrol:FPBurst', 'stream_queries', AMOUNT),
+	'frame_size_type': Field(':TSTReam:TABLe:ITEM:FSIZe:TYPE', 'stream_queries', frozenset(['AUTO', 'FIXED', 'INCREMENT', 'RANDOM'])),
+	'frame_size_value': Field(':TSTReam:TABLe:ITEM:FSIZe:VALue', 'stream_queries', FRAME_SIZE),
+	'frame_size_minimum': Field(':TSTReam:TABLe:ITEM:FSIZe:MINimum', 'stream_queries', FRAME_SIZE),
+	'frame_size_maximum': Field(':TSTReam:TABLe:ITEM:FSIZe:MAXimum', 'stream_queries', FRAME_SIZE),
+	'source_mac': Field(':TSTReam:TABLe:ITEM:FRAMe:ETHernet:SA:VALue', 'frame_queries'),
+	'source_mac_mask': Field(':TSTReam:TABLe:ITEM:FRAMe:ETHernet:SA:MASK', 'frame_queries'),
+	'source_mac_type': Field(':TSTReam:TABLe:ITEM:FRAMe:ETHernet:SA:TYPE', 'frame_queries', ADDRESS_TYPES),
+	'destination_mac': Field(':TSTReam:TABLe:ITEM:FRAMe:ETHernet:DA:VALue', 'frame_queries'),
+	'destination_mac_mask': Field(':TSTReam:TABLe:ITEM:FRAMe:ETHernet:DA:MASK', 'frame_queries'),
+	'destination_mac_type': Field(':TSTReam:TABLe:ITEM:FRAMe:ETHernet:DA:TYPE', 'frame_queries', ADDRESS_TYPES),
+	'protocol': Field(':TSTReam:TABLe:ITEM:PROTocol:TYPE', 'frame_queries', PROTOCOLS),
+	'data_field': Field(':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:ENABle', 'frame_queries', frozenset(['0', '1'])),
+	'data_field_type': Field(':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TYPE', 'frame_queries', frozenset(['TEST_FRAME'])),
+	'test_frame_type': Field(':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TFRame:TYPE', 'frame_queries', frozenset(['PRBS', 'FLOW_ID'])),
+	'test_frame_length': Field(':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:LENGth', 'frame_queries', input_validator.Range(46, 65517)),
+	'test_frame_offset': Field(':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:OFFSet', 'frame_queries', input_validator.Range(28, 65499)),
+	'flow_id': Field(':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TFRame:FID', 'frame_queries', input_validator.Range(0, 65535)),
+	'ethernet_error': Field(':TSTReam:TABLe:ITEM:ERRor:ETHernet:TYPE', 'frame_queries', frozenset(['FCS', 'UNDERSIZE', 'OVERSIZE', 'OVERSIZE_FCS', 'PRBS_BIT'])),
+	'ipv4_error': Field(':TSTReam:TABLe:ITEM:ERRor:IP:TYPE', 'frame_queries', frozenset(['CHECKSUM'])),
+	'arp_operation': Field(':TSTReam:TABLe:ITEM:PROTocol:ARP:OPERation', 'frame_queries', frozenset(ARP_TYPES.values())),
+	'arp_sender_mac': Field(':TSTReam:TABLe:ITEM:PROTocol:ARP:SMADdress', 'frame_queries'),
+	'arp_sender_ip': Field(':TSTReam:TABLe:ITEM:PROTocol:ARP:SIADdress', 'frame_queries'),
+	'arp_target_ip': Field(':TSTReam:TABLe:ITEM:PROTocol:ARP:TIADdress', 'frame_queries'),
+	'arp_target_mac': Field(':TSTReam:TABLe:ITEM:PROTocol:ARP:TMADdress', 'frame_queries'),
+	'ipv4_source_type': Field(':TSTReam:TABLe:ITEM:PROTocol:IP:SA:TYPE', 'frame_queries', ADDRESS_TYPES),
+	'ipv4_source': Field(':TSTReam:TABLe:ITEM:PROTocol:IP:SA:VALue', 'frame_queries'),
+	'ipv4_source_mask': Field(':TSTReam:TABLe:ITEM:PROTocol:IP:SA:MASK', 'frame_queries'),
+	'ipv4_destination_type': Field(':TSTReam:TABLe:ITEM:PROTocol:IP:DA:TYPE', 'frame_queries', ADDRESS_TYPES),
+	'ipv4_destination': Field(':TSTReam:TABLe:ITEM:PROTocol:IP:DA:VALue', 'frame_queries'),
+	'ipv4_destination_mask': Field(':TSTReam:TABLe:ITEM:PROTocol:IP:DA:MASK', 'frame_queries'),
+	'ipv6_source_type': Field(':TSTReam:TABLe:ITEM:PROTocol:IPv6:SA:TYPE', 'frame_queries', ADDRESS_TYPES),
+	'ipv6_source': Field(':TSTReam:TABLe:ITEM:PROTocol:IPv6:SA:VALue', 'frame_queries'),
+	'ipv6_source_mask': Field(':TSTReam:TABLe:ITEM:PROTocol:IPv6:SA:MASK', 'frame_queries'),
+	'ipv6_destination_type': Field(':TSTReam:TABLe:ITEM:PROTocol:IPv6:DA:TYPE', 'frame_queries', ADDRESS_TYPES),
+	'ipv6_destination': Field(':TSTReam:TABLe:ITEM:PROTocol:IPv6:DA:VALue', 'frame_queries'),
+	'ipv6_destination_mask': Field(':TSTReam:TABLe:ITEM:PROTocol:IPv6:DA:MASK', 'frame_queries'),
+}
 
 class Stream:
-	"""This class represents one stream. These functions create command messages and its related query messages. The commands set a variable on the Anritsu. The queries test the user input with the Anritsu current set variable. 
+	"""This class represents one stream. These functions create command messages and its related query messages. The commands set a variable on the Anritsu. The queries test the user input with the Anritsu current set variable. The fields are described by FIELDS, the functions below combine them as the Anritsu expects.
 
 	:ivar commands: A list is created for the command messages, which set a variable on the Anritsu
 	:ivar stream_queries: A dictionary is created with query messages for the stream, as required to test a variable on the Anritsu.
@@ -55,6 +138,7 @@ class Stream:
 		self.module = module
 		self.port = port
 		self.anritsu_type = anritsu_type
+		self.stream_identification_number = stream_identification_number
 		# Append the associated command message to the self.commands list, to set a variable on the Anritsu
 		self.commands.append(':TSTReam:TABLe:ADD\n')
 		self.commands.append(':TSTReam:TABLe:ID '+ str(stream_identification_number) + '\n')
@@ -69,6 +153,21 @@ class Stream:
 		self.port_queries[':UENTry:ID?\n'] = str(unit) + '\n'
 		self.port_queries[':MODule:ID?\n'] = str(module) + '\n'
 		self.port_queries[':PORT:ID?\n'] = str(port) + '\n'
+	def set(self, settings):
+		"""Set fields of FIELDS. All values are validated before any message is created, so an invalid value leaves the stream unchanged.
+
+		:param settings: a list of (field name, value) tuples, in the order the commands are sent
+
+		"""
+		for name, value in settings:
+			field = FIELDS[name]
+			if self.anritsu_type not in field.anritsu_types:
+				raise error.AnritsuSupported(field.command.rstrip(), self.anritsu_type)
+			input_validator.allowed(field.allowed, str(value))
+		for name, value in settings:
+			field = FIELDS[name]
+			self.commands.append(field.command + str(value) + '\n')
+			getattr(self, field.queries)[field.query] = str(value) + '\n'
 	def distribution(self, stream_distribution_type, jump_to_id=None, count=None):
 		"""Creates messages to define the type of distribution of the stream.
 	
@@ -77,51 +176,28 @@ class Stream:
 		:param count: if the distribution type is 'JUMP_COUNT', 'JUMP_STOP'. This parameter sets the loop count, which is the amount of jumps, before this stream stops. Expects to be a number between 1 and 256.
 	
 		"""
-		# First validate the user input
-		input_validator.string_set(['CONT', 'CONT_BURST', 'STOP', 'NEXT', 'JUMP', 'JUMP_COUNT', 'JUMP_STOP'], stream_distribution_type)
-		# Append the associated command message to the self.commands list, to set a variable on the Anritsu
-		self.commands.append(':TSTReam:TABLe:ITEM:CONTrol:DISTribution ' + str(stream_distribution_type) + '\n')
-		# Write the corresponding query message to the self.stream_queries dictionary as a key and the input as it value.
-		# Which is required to test a variable on the Anritsu with the users input value.
-		self.stream_queries[':TSTReam:TABLe:ITEM:CONTrol:DISTribution?\n'] = str(stream_distribution_type) + '\n'
-		# Expect extra parameters when a certain subset of the first argument is set and append the required command and query messages.
+		settings = [('distribution', stream_distribution_type)]
+		# Expect extra parameters when a certain subset of the first argument is set
 		if stream_distribution_type == 'JUMP':
-			input_validator.value_minimum_maximum(1, 256, jump_to_id)
-			self.commands.append(':TSTReam:TABLe:ITEM:CONTrol:JTID ' + str(jump_to_id) + '\n')
-			self.stream_queries[':TSTReam:TABLe:ITEM:CONTrol:JTID?\n'] = str(jump_to_id) + '\n'
+			settings.append(('jump_to_id', jump_to_id))
 		elif stream_distribution_type == 'JUMP_COUNT' or stream_distribution_type == 'JUMP_STOP':
-			input_validator.value_minimum_maximum(1, 256, jump_to_id)
-			input_validator.value_minimum_maximum(1, 16000000, count)
-			self.commands.append(':TSTReam:TABLe:ITEM:CONTrol:JTID ' + str(jump_to_id) + '\n')
-			self.commands.append(':TSTReam:TABLe:ITEM:CONTrol:COUNt ' + str(count) + '\n')
-			self.stream_queries[':TSTReam:TABLe:ITEM:CONTrol:JTID?\n'] = str(jump_to_id) + '\n'
-			self.stream_queries[':TSTReam:TABLe:ITEM:CONTrol:COUNt?\n'] = str(count) + '\n'
+			settings.append(('jump_to_id', jump_to_id))
+			settings.append(('count', count))
+		self.set(settings)
 	def inter_burst_gap(self, inter_burst_gap_value):
 		"""Creates messages to define the Inter Burst Gap (IBG).
 	
 		:param inter_burst_gap_value: the IBG in ns.
 	
 		"""
-		# First validate the user input
-		input_validator.value_minimum_maximum(1, 1200000000000, inter_burst_gap_value)
-		# Append the associated command message to the self.commands list, to set a variable on the Anritsu
-		self.commands.append(':TSTReam:TABLe:ITEM:CONTrol:GAP:IBG ' + str(inter_burst_gap_value) + '\n')
-		# Write the corresponding query message to the self.stream_queries dictionary as a key and the input as it value.
-		# Which is required to test a variable on the Anritsu with the users input value.
-		self.stream_queries[':TSTReam:TABLe:ITEM:CONTrol:GAP:IBG?\n'] = str(inter_burst_gap_value) + '\n'
+		self.set([('inter_burst_gap', inter_burst_gap_value)])
 	def inter_stream_gap(self, inter_stream_gap_value):
 		"""Creates messages to define the Inter Stream Gap (ISG).
 	
 		:param inter_stream_gap_value: the ISG in ns.
 	
 		"""
-		# First validate the user input
-		input_validator.value_minimum_maximum(1, 1200000000000, inter_stream_gap_value)
-		# Append the associated command message to the self.commands list, to set a variable on the Anritsu
-		self.commands.append(':TSTReam:TABLe:ITEM:CONTrol:GAP:ISG ' + str(inter_stream_gap_value) + '\n')
-		# Write the corresponding query message to the self.stream_queries dictionary as a key and the input as it value.
-		# Which is required to test a variable on the Anritsu with the users input value.
-		self.stream_queries[':TSTReam:TABLe:ITEM:CONTrol:GAP:ISG?\n'] = str(inter_stream_gap_value) + '\n'
+		self.set([('inter_stream_gap', inter_stream_gap_value)])
 	def inter_frame_gap(self, inter_frame_gap_type, inter_frame_gap_value, inter_frame_gap_maximum=None):
 		"""Creates messages to define the Inter Frame Gap (IFG).
 	
@@ -130,51 +206,24 @@ class Stream:
 		:param inter_frame_gap_maximum: if the IFG type is 'RANDOM', this keyword is the maximum time in ns.
 	
 		"""
-		# First validate the user input
-		input_validator.string_set(['FIXED', 'RANDOM'], inter_frame_gap_type)
-		if inter_frame_gap_type == 'FIXED':
-			input_validator.value_minimum_maximum(1, 1200000000000, inter_frame_gap_value)
-			# Append the associated command message to the self.commands list, to set a variable on the Anritsu
-			self.commands.append(':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:TYPE ' + str(inter_frame_gap_type) + '\n')
-			self.commands.append(':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:VALue ' + str(inter_frame_gap_value) + '\n')
-			# Write the corresponding query message to the self.stream_queries dictionary as a key and the input as it value.
-			# Which is required to test a variable on the Anritsu with the users input value.
-			self.stream_queries[':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:TYPE?\n'] = str(inter_frame_gap_type) + '\n'
-			self.stream_queries[':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:VALue?\n'] = str(inter_frame_gap_value) + '\n'
 		if inter_frame_gap_type == 'RANDOM':
-			input_validator.value_minimum_maximum(1, 1200000000000, inter_frame_gap_value)
-			input_validator.value_minimum_maximum(1, 1200000000000, inter_frame_gap_maximum)
-			# Append the associated command message to the self.commands list, to set a variable on the Anritsu
-			self.commands.append(':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:TYPE ' + str(inter_frame_gap_type) + '\n')
-			self.commands.append(':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:MINimum ' + str(inter_frame_gap_value) + '\n')
-			self.commands.append(':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:MAXimum ' + str(inter_frame_gap_maximum) + '\n')
-			# Write the corresponding query message to the self.stream_queries dictionary as a key and the input as it value.
-			# Which is required to test a variable on the Anritsu with the users input value.
-			self.stream_queries[':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:TYPE?\n'] = str(inter_frame_gap_type) + '\n'
-			self.stream_queries[':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:VALue?\n'] = str(inter_frame_gap_value) + '\n'
-			self.stream_queries[':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:MAXimum?\n'] = str(inter_frame_gap_maximum) + '\n'
+			self.set([('inter_frame_gap_type', inter_frame_gap_type), ('inter_frame_gap_minimum', inter_frame_gap_value), ('inter_frame_gap_maximum', inter_frame_gap_maximum)])
+		else:
+			self.set([('inter_frame_gap_type', inter_frame_gap_type), ('inter_frame_gap_value', inter_frame_gap_value)])
 	def burst_per_stream(self, burst_per_stream_amount):
 		"""Creates messages to define how many burst are needed for this stream.
 	
 		:param burst_per_stream_amount: amount of burst
 	
 		"""
-		# First validate the user input
-		input_validator.value_minimum_maximum(1, 1099511627775, burst_per_stream_amount)
-		# Append the associated command message to the self.commands list, to set a variable on the Anritsu
-		self.commands.append(':TSTReam:TABLe:ITEM:CONTrol:BPSTream ' + str(burst_per_stream_amount) + '\n')
-		# Write the corresponding query message to the self.stream_queries dictionary as a key and the input as it value.
-		# Which is required to test a variable on the Anritsu with the users input value.
-		self.stream_queries[':TSTReam:TABLe:ITEM:CONTrol:BPSTream?\n'] = str(burst_per_stream_amount) + '\n'
+		self.set([('burst_per_stream', burst_per_stream_amount)])
 	def frames_per_burst(self, frames_per_burst_amount):
 		"""Creates messages to define how many frames are needed for every burst.
 	
 		:param frames_per_burst_amount: amount of frames
 	
 		"""
-		input_validator.value_minimum_maximum(1, 1099511627775, frames_per_burst_amount)
-		self.commands.append(':TSTReam:TABLe:ITEM:CONTrol:FPBurst ' + str(frames_per_burst_amount) + '\n')
-		self.stream_queries[':TSTReam:TABLe:ITEM:CONTrol:FPBurst?\n'] = str(frames_per_burst_amount) + '\n'
+		self.set([('frames_per_burst', frames_per_burst_amount)])
 	def frame_size(self, frame_size_type, frame_size_value=None, frame_size_maximum=None):
 		"""Creates messages to define what frame size type is needed. 
 	
@@ -183,32 +232,13 @@ class Stream:
 		:param frame_size_maximum: ignored with frame size type 'AUTO' and 'FIXED'. If it is 'INCREMENT' or 'RANDOM' it is the maximum frame size.
 	
 		"""
-		input_validator.string_set(['AUTO', 'FIXED', 'INCREMENT', 'RANDOM'], frame_size_type)
-		if frame_size_type == 'AUTO':
-			self.commands.append(':TSTReam:TABLe:ITEM:FSIZe:TYPE ' + str(frame_size_type) + '\n')
-			self.stream_queries[':TSTReam:TABLe:ITEM:FSIZe:TYPE?\n'] = str(frame_size_type) + '\n'
-		elif frame_size_type == 'FIXED':
-			input_validator.value_minimum_maximum(8, 65280, frame_size_value)
-			self.commands.append(':TSTReam:TABLe:ITEM:FSIZe:TYPE ' + str(frame_size_type) + '\n')
-			self.commands.append(':TSTReam:TABLe:ITEM:FSIZe:VALue ' + str(frame_size_value) + '\n')
-			self.stream_queries[':TSTReam:TABLe:ITEM:FSIZe:TYPE?\n'] = str(frame_size_type) + '\n'
-			self.stream_queries[':TSTReam:TABLe:ITEM:FSIZe:VALue?\n'] = str(frame_size_value) + '\n'
-		elif frame_size_type == 'INCREMENT':
-			input_validator.value_minimum_maximum(8, 65280, frame_size_value)
-			self.commands.append(':TSTReam:TABLe:ITEM:FSIZe:TYPE ' + str(frame_size_type) + '\n')
-			self.commands.append(':TSTReam:TABLe:ITEM:FSIZe:MINimum ' + str(frame_size_value) + '\n')
-			self.commands.append(':TSTReam:TABLe:ITEM:FSIZe:MAXimum ' + str(frame_size_maximum) + '\n')
-			self.stream_queries[':TSTReam:TABLe:ITEM:FSIZe:TYPE?\n'] = str(frame_size_type) + '\n'
-			self.stream_queries[':TSTReam:TABLe:ITEM:FSIZe:MINimum?\n'] = str(frame_size_value) + '\n'
-			self.stream_queries[':TSTReam:TABLe:ITEM:FSIZe:MAXimum?\n'] = str(frame_size_maximum) + '\n'
-		elif frame_size_type == 'RANDOM':
-			input_validator.value_minimum_maximum(8, 65280, frame_size_value)
-			self.commands.append(':TSTReam:TABLe:ITEM:FSIZe:TYPE ' + str(frame_size_type) + '\n')
-			self.commands.append(':TSTReam:TABLe:ITEM:FSIZe:MINimum ' + str(frame_size_value) + '\n')
-			self.commands.append(':TSTReam:TABLe:ITEM:FSIZe:MAXimum ' + str(frame_size_maximum) + '\n')
-			self.stream_queries[':TSTReam:TABLe:ITEM:FSIZe:TYPE?\n'] = str(frame_size_type) + '\n'
-			self.stream_queries[':TSTReam:TABLe:ITEM:FSIZe:MINimum?\n'] = str(frame_size_value) + '\n'
-			self.stream_queries[':TSTReam:TABLe:ITEM:FSIZe:MAXimum?\n'] = str(frame_size_maximum) + '\n'
+		settings = [('frame_size_type', frame_size_type)]
+		if frame_size_type == 'FIXED':
+			settings.append(('frame_size_value', frame_size_value))
+		elif frame_size_type == 'INCREMENT' or frame_size_type == 'RANDOM':
+			settings.append(('frame_size_minimum', frame_size_value))
+			settings.append(('frame_size_maximum', frame_size_maximum))
+		self.set(settings)
 	def frame_source_address(self, frame_source_address_hexed, frame_source_mask_hexed_separated='FF-FF-FF-FF-FF-FF', frame_source_address_type='STATIC'):
 		"""Creates messages to define the frame source MAC address. 
 	
@@ -220,13 +250,7 @@ class Stream:
 		## First convert and validate the users input MAC address
 		#frame_source_address_hexed = mactohex.MactoHex(frame_source_address_hexed_separated,  self.unit, self.module, self.port)
 		frame_source_mask_hexed = convert_calc.MactoHex(frame_source_mask_hexed_separated,  self.unit, self.module, self.port)
-		# Then append the commands and the corresponding queries, to set and test a variable on the Anritsu
-		self.commands.append(':TSTReam:TABLe:ITEM:FRAMe:ETHernet:SA:VALue ' + str(frame_source_address_hexed) + '\n')
-		self.commands.append(':TSTReam:TABLe:ITEM:FRAMe:ETHernet:SA:MASK ' + str(frame_source_mask_hexed) + '\n')
-		self.commands.append(':TSTReam:TABLe:ITEM:FRAMe:ETHernet:SA:TYPE ' + str(frame_source_address_type) + '\n')
-		self.frame_queries[':TSTReam:TABLe:ITEM:FRAMe:ETHernet:SA:VALue?\n'] = str(frame_source_address_hexed) + '\n'
-		self.frame_queries[':TSTReam:TABLe:ITEM:FRAMe:ETHernet:SA:MASK?\n'] = str(frame_source_mask_hexed) + '\n'
-		self.frame_queries[':TSTReam:TABLe:ITEM:FRAMe:ETHernet:SA:TYPE?\n'] = str(frame_source_address_type) + '\n'
+		self.set([('source_mac', frame_source_address_hexed), ('source_mac_mask', frame_source_mask_hexed), ('source_mac_type', frame_source_address_type)])
 	def frame_destination_address(self, frame_destination_address_hexed, frame_destination_mask_hexed_separated='FF-FF-FF-FF-FF-FF', frame_destination_address_type='STATIC'):
 		"""Creates messages to define the frame destination MAC address. 
 
@@ -237,21 +261,14 @@ class Stream:
 		"""
 		#frame_destination_address_hexed = mactohex.MactoHex(frame_destination_address_hexed_separated, other_stream.unit, other_stream.module, other_stream.port)
 		frame_destination_mask_hexed = convert_calc.MactoHex(frame_destination_mask_hexed_separated, self.unit, self.module, self.port)
-		self.commands.append(':TSTReam:TABLe:ITEM:FRAMe:ETHernet:DA:VALue ' + str(frame_destination_address_hexed) + '\n')
-		self.commands.append(':TSTReam:TABLe:ITEM:FRAMe:ETHernet:DA:MASK ' + str(frame_destination_mask_hexed) + '\n')
-		self.commands.append(':TSTReam:TABLe:ITEM:FRAMe:ETHernet:DA:TYPE ' + str(frame_destination_address_type) + '\n')
-		self.frame_queries[':TSTReam:TABLe:ITEM:FRAMe:ETHernet:DA:VALue?\n'] = str(frame_destination_address_hexed) + '\n'
-		self.frame_queries[':TSTReam:TABLe:ITEM:FRAMe:ETHernet:DA:MASK?\n'] = str(frame_destination_mask_hexed) + '\n'
-		self.frame_queries[':TSTReam:TABLe:ITEM:FRAMe:ETHernet:DA:TYPE?\n'] = str(frame_destination_address_type) + '\n'
+		self.set([('destination_mac', frame_destination_address_hexed), ('destination_mac_mask', frame_destination_mask_hexed), ('destination_mac_type', frame_destination_address_type)])
 	def protocol(self, stream_protocol):
 		"""Creates messages to define the protocol in the stream. 
 
 		:param protocol: the protocol used, can select out of the following set: 'NONE', 'ARP', 'IPV4', 'IGMP', 'IGAP', 'ICMP', 'TCP', 'UDP', 'RIP', 'DHCP', 'IPV6', 'ICMP6', 'TCP_IPV6', 'UDP_IPV6', 'TUNNEL', 'ICMP6_TUNNEL', 'TCP_TUNNEL', 'UDP_TUNNEL', 'TUNNEL6', 'TCP_TUNNEL6', 'UDP_TUNNEL6', 'IPX', 'IS_IS', 'MAC_CONTROL', 'EHTERNET', 'LEX_CONTROL', 'BPUD', 'LACP'.
 
 		"""
-		input_validator.string_set(['NONE', 'ARP', 'IPV4', 'IGMP', 'IGAP', 'ICMP', 'TCP', 'UDP', 'RIP', 'DHCP', 'IPV6', 'ICMP6', 'TCP_IPV6', 'UDP_IPV6', 'TUNNEL', 'ICMP6_TUNNEL', 'TCP_TUNNEL', 'UDP_TUNNEL', 'TUNNEL6', 'TCP_TUNNEL6', 'UDP_TUNNEL6', 'IPX', 'IS_IS', 'MAC_CONTROL', 'EHTERNET', 'LEX_CONTROL', 'BPUD', 'LACP'], stream_protocol)
-		self.commands.append(':TSTReam:TABLe:ITEM:PROTocol:TYPE ' + str(stream_protocol) + '\n')
-		self.frame_queries[':TSTReam:TABLe:ITEM:PROTocol:TYPE?\n'] = str(stream_protocol) + '\n'
+		self.set([('protocol', stream_protocol)])
 	def test_frame(self, test_type, length_or_offset=None, flow_id=None):
 		"""Adds a test frame in the frame its data field
 
@@ -260,51 +277,33 @@ class Stream:
 		:param flow_id: when a flow test frame is selected, this is the ID.
 
 		"""
-		input_validator.string_set(['PRBS', 'FLOW'], test_type)
+		input_validator.string_set(frozenset(['PRBS', 'FLOW']), test_type)
 		if test_type == 'PRBS':
-			input_validator.value_minimum_maximum(46, 65517, length_or_offset)
-			self.commands.append(':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:ENABle 1\n')
-			self.commands.append(':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TYPE TEST_FRAME\n')
-			self.commands.append(':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TFRame:TYPE '  + str(test_type) + '\n')
-			self.frame_queries[':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:ENABle?\n'] = '1\n'
-			self.frame_queries[':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:ITFRame?\n'] = '1\n'
-			self.frame_queries[':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TYPE?\n'] = 'TEST_FRAME\n'
-			self.frame_queries[':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TFRame:TYPE?\n'] = str(test_type) + '\n'
+			settings = [('data_field', '1'), ('data_field_type', 'TEST_FRAME'), ('test_frame_type', test_type)]
 			if length_or_offset != None:
-				self.commands.append(':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:LENGth '  + str(length_or_offset) + '\n')
-				self.frame_queries[':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:LENGth?\n'] = str(length_or_offset) + '\n'
+				settings.append(('test_frame_length', length_or_offset))
+			self.set(settings)
+			# The Anritsu sets this implicitly with a test frame
+			self.frame_queries[':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:ITFRame?\n'] = '1\n'
 		elif test_type == 'FLOW':
-			input_validator.value_minimum_maximum(28, 65499, length_or_offset)
-			input_validator.value_minimum_maximum(0, 65535, flow_id)
-			self.commands.append(':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:ENABle 1\n')
-			self.commands.append(':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TYPE TEST_FRAME\n')
-			self.commands.append(':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TFRame:TYPE FLOW_ID\n')
-			self.commands.append(':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TFRame:FID ' + str(flow_id) + '\n')
-			self.frame_queries[':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:ENABle?\n'] = '1\n'
-			self.frame_queries[':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TYPE?\n'] = 'TEST_FRAME\n'
-			self.frame_queries[':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TFRame:TYPE?\n'] = 'FLOW_ID\n'
-			self.frame_queries[':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TFRame:FID?\n'] = str(flow_id) + '\n'
+			settings = [('data_field', '1'), ('data_field_type', 'TEST_FRAME'), ('test_frame_type', 'FLOW_ID'), ('flow_id', flow_id)]
 			if length_or_offset != None:
-				self.commands.append(':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:OFFSet ' + str(length_or_offset) + '\n')
-				self.frame_queries[':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:OFFSet?\n'] = str(length_or_offset) + '\n'
+				settings.append(('test_frame_offset', length_or_offset))
+			self.set(settings)
 	def ethernet_error(self, error_type):
 		"""Insert an ethernet error in a stream.
 
 		:param error_type: what type of ethernet error, can select out of the following set: 'FCS', 'UNDERSIZE', 'OVERSIZE', 'OVERSIZE_FCS', 'PRBS_BIT'.
 
 		"""
-		input_validator.string_set(['FCS', 'UNDERSIZE', 'OVERSIZE', 'OVERSIZE_FCS', 'PRBS_BIT'], error_type)
-		self.commands.append(':TSTReam:TABLe:ITEM:ERRor:ETHernet:TYPE ' + str(error_type) + '\n')
-		self.frame_queries[':TSTReam:TABLe:ITEM:ERRor:ETHernet:TYPE?\n'] = str(error_type) + '\n'
+		self.set([('ethernet_error', error_type)])
 	def ipv4_error(self, error_type):
 		"""Insert an IPv4 error in a stream.
 
 		:param error_type: what type of IPv4 error, can select out of the following set: 'CHECKSUM'.
 
 		"""
-		input_validator.string_set(['CHECKSUM'], error_type)
-		self.commands.append(':TSTReam:TABLe:ITEM:ERRor:IP:TYPE ' + str(error_type) + '\n')
-		self.frame_queries[':TSTReam:TABLe:ITEM:ERRor:IP:TYPE?\n'] = str(error_type) + '\n'
+		self.set([('ipv4_error', error_type)])
 	def arp(self, arp_type, sender_mac, sender_ip, target_mac, target_ip):
 		"""Creates messages to set the ARP protocol
 
@@ -315,28 +314,13 @@ class Stream:
 		:param target_ip: set the target's IP address. (e.g. 192.168.1.3)
 
 		"""
-		input_validator.string_set(['ARP request', 'ARP reply', 'RARP request', 'RARP reply'], arp_type)
-		self.arp_type_translator = {}
-		self.arp_type_translator['ARP request'] = '1'
-		self.arp_type_translator['ARP reply'] = '2'
-		self.arp_type_translator['RARP request'] = '3'
-		self.arp_type_translator['RARP reply'] = '4'
-		self.sender_mac_address_hexed = convert_calc.MactoHex(sender_mac)
-		self.target_mac_address_hexed = convert_calc.MactoHex(target_mac)
-		self.sender_ip_address = convert_calc.IPtoHex(sender_ip)
-		self.target_ip_address = convert_calc.IPtoHex(target_ip)
-		self.sender_ip_address_hexed = self.sender_ip_address[0]
-		self.target_ip_address_hexed = self.target_ip_address[0]
-		self.commands.append(':TSTReam:TABLe:ITEM:PROTocol:ARP:OPERation ' + str(self.arp_type_translator.get(arp_type)) + '\n')
-		self.commands.append(':TSTReam:TABLe:ITEM:PROTocol:ARP:SMADdress ' + str(self.sender_mac_address_hexed) + '\n')
-		self.commands.append(':TSTReam:TABLe:ITEM:PROTocol:ARP:SIADdress ' + str(self.sender_ip_address_hexed) + '\n')
-		self.commands.append(':TSTReam:TABLe:ITEM:PROTocol:ARP:TIADdress ' + str(self.target_ip_address_hexed) + '\n')
-		self.commands.append(':TSTReam:TABLe:ITEM:PROTocol:ARP:TMADdress ' + str(self.target_mac_address_hexed) + '\n')
-		self.frame_queries[':TSTReam:TABLe:ITEM:PROTocol:ARP:OPERation?\n'] = str(self.arp_type_translator.get(arp_type) + '\n')
-		self.frame_queries[':TSTReam:TABLe:ITEM:PROTocol:ARP:SMADdress?\n'] = str(self.sender_mac_address_hexed) + '\n'
-		self.frame_queries[':TSTReam:TABLe:ITEM:PROTocol:ARP:SIADdress?\n'] = str(self.sender_ip_address_hexed) + '\n'
-		self.frame_queries[':TSTReam:TABLe:ITEM:PROTocol:ARP:TIADdress?\n'] = str(self.target_ip_address_hexed) + '\n'
-		self.frame_queries[':TSTReam:TABLe:ITEM:PROTocol:ARP:TMADdress?\n'] = str(self.target_mac_address_hexed) + '\n'
+		input_validator.string_set(frozenset(ARP_TYPES), arp_type)
+		self.set([
+			('arp_operation', ARP_TYPES[arp_type]),
+			('arp_sender_mac', convert_calc.MactoHex(sender_mac)),
+			('arp_sender_ip', convert_calc.IPtoHex(sender_ip)[0]),
+			('arp_target_ip', convert_calc.IPtoHex(target_ip)[0]),
+			('arp_target_mac', convert_calc.MactoHex(target_mac))])
 	def ipv4_source_address(self, ipv4_source_address, ipv4_source_address_type='STATIC'):
 		"""Creates messages to define the packets source IPv4 address. 
 
@@ -344,18 +328,9 @@ class Stream:
 		:param ipv4_source_address_type: source address type,  can select out of the following set: 'GATEWAY', 'STATIC', 'INCREMENT', 'DECREMENT', 'RANDOM'
 
 		"""
-		# First convert and validate the users input IPv4 address
-		input_validator.string_set(['GATEWAY', 'STATIC', 'INCREMENT', 'DECREMENT', 'RANDOM'], ipv4_source_address_type)
+		# First convert the users input IPv4 address
 		ipv4_address_and_mask = convert_calc.IPtoHex(ipv4_source_address)
-		hexed_ipv4_source_address = ipv4_address_and_mask[0]
-		hexed_ipv4_source_mask = ipv4_address_and_mask[1]
-		# Then append the commands and the corresponding queries, to set and test a variable on the Anritsu
-		self.commands.append(':TSTReam:TABLe:ITEM:PROTocol:IP:SA:TYPE ' + str(ipv4_source_address_type) + '\n')
-		self.commands.append(':TSTReam:TABLe:ITEM:PROTocol:IP:SA:VALue ' + str(hexed_ipv4_source_address) + '\n')
-		self.commands.append(':TSTReam:TABLe:ITEM:PROTocol:IP:SA:MASK ' + str(hexed_ipv4_source_mask) + '\n')
-		self.frame_queries[':TSTReam:TABLe:ITEM:PROTocol:IP:SA:TYPE?\n'] = str(ipv4_source_address_type) + '\n'
-		self.frame_queries[':TSTReam:TABLe:ITEM:PROTocol:IP:SA:VALue?\n'] = str(hexed_ipv4_source_address) + '\n'
-		self.frame_queries[':TSTReam:TABLe:ITEM:PROTocol:IP:SA:MASK?\n'] = str(hexed_ipv4_source_mask) + '\n'
+		self.set([('ipv4_source_type', ipv4_source_address_type), ('ipv4_source', ipv4_address_and_mask[0]), ('ipv4_source_mask', ipv4_address_and_mask[1])])
 	def ipv4_destination_address(self, ipv4_destination_address, ipv4_destination_address_type='STATIC'):
 		"""Creates messages to define the packets destination IPv4 address. 
 
@@ -363,16 +338,8 @@ class Stream:
 		:param ipv4_destination_address_type: destination address type,  can select out of the following set: 'GATEWAY', 'STATIC', 'INCREMENT', 'DECREMENT', 'RANDOM'
 
 		"""
-		input_validator.string_set(['GATEWAY', 'STATIC', 'INCREMENT', 'DECREMENT', 'RANDOM'], ipv4_destination_address_type)
 		ipv4_address_and_mask = convert_calc.IPtoHex(ipv4_destination_address)
-		hexed_ipv4_destination_address = ipv4_address_and_mask[0]
-		hexed_ipv4_destination_mask = ipv4_address_and_mask[1]
-		self.commands.append(':TSTReam:TABLe:ITEM:PROTocol:IP:DA:TYPE ' + str(ipv4_destination_address_type) + '\n')
-		self.commands.append(':TSTReam:TABLe:ITEM:PROTocol:IP:DA:VALue ' + str(hexed_ipv4_destination_address) + '\n')
-		self.commands.append(':TSTReam:TABLe:ITEM:PROTocol:IP:DA:MASK ' + str(hexed_ipv4_destination_mask) + '\n')
-		self.frame_queries[':TSTReam:TABLe:ITEM:PROTocol:IP:DA:TYPE?\n'] = str(ipv4_destination_address_type) + '\n'
-		self.frame_queries[':TSTReam:TABLe:ITEM:PROTocol:IP:DA:VALue?\n'] = str(hexed_ipv4_destination_address) + '\n'
-		self.frame_queries[':TSTReam:TABLe:ITEM:PROTocol:IP:DA:MASK?\n'] = str(hexed_ipv4_destination_mask) + '\n'
+		self.set([('ipv4_destination_type', ipv4_destination_address_type), ('ipv4_destination', ipv4_address_and_mask[0]), ('ipv4_destination_mask', ipv4_address_and_mask[1])])
 	def ipv6_source_address(self, ipv6_source_address, ipv6_source_address_type='STATIC'):
 		"""Creates messages to define the packets source IPv6 address. 
 
@@ -380,18 +347,9 @@ class Stream:
 		:param ipv6_source_address_type: source address type,  can select out of the following set: 'GATEWAY', 'STATIC', 'INCREMENT', 'DECREMENT', 'RANDOM'
 
 		"""
-		input_validator.string_set(['GATEWAY', 'STATIC', 'INCREMENT', 'DECREMENT', 'RANDOM'], ipv6_source_address_type)
-		# First convert and validate the users input IPv6 address
+		# First convert the users input IPv6 address
 		ipv6_address_and_mask = convert_calc.IPtoHex(ipv6_source_address)
-		hexed_ipv6_source_address = ipv6_address_and_mask[0]
-		hexed_ipv6_source_mask = ipv6_address_and_mask[1]
-		# Then append the commands and the corresponding queries, to set and test a variable on the Anritsu
-		self.commands.append(':TSTReam:TABLe:ITEM:PROTocol:IPv6:SA:TYPE ' + str(ipv6_source_address_type) + '\n')
-		self.commands.append(':TSTReam:TABLe:ITEM:PROTocol:IPv6:SA:VALue ' + str(hexed_ipv6_source_address) + '\n')
-		self.commands.append(':TSTReam:TABLe:ITEM:PROTocol:IPv6:SA:MASK ' + str(hexed_ipv6_source_mask) + '\n')
-		self.frame_queries[':TSTReam:TABLe:ITEM:PROTocol:IPv6:SA:TYPE?\n'] = str(ipv6_source_address_type) + '\n'
-		self.frame_queries[':TSTReam:TABLe:ITEM:PROTocol:IPv6:SA:VALue?\n'] = str(hexed_ipv6_source_address) + '\n'
-		self.frame_queries[':TSTReam:TABLe:ITEM:PROTocol:IPv6:SA:MASK?\n'] = str(hexed_ipv6_source_mask) + '\n'
+		self.set([('ipv6_source_type', ipv6_source_address_type), ('ipv6_source', ipv6_address_and_mask[0]), ('ipv6_source_mask', ipv6_address_and_mask[1])])
 	def ipv6_destination_address(self, ipv6_destination_address, ipv6_destination_address_type='STATIC'):
 		"""Creates messages to define the packets destination IPv6 address. 
 
@@ -399,15 +357,42 @@ class Stream:
 		:param ipv6_destination_address_type: destination address type,  can select out of the following set: 'GATEWAY', 'STATIC', 'INCREMENT', 'DECREMENT', 'RANDOM'
 
 		"""
-		input_validator.string_set(['GATEWAY', 'STATIC', 'INCREMENT', 'DECREMENT', 'RANDOM'], ipv6_destination_address_type)
 		ipv6_address_and_mask = convert_calc.IPtoHex(ipv6_destination_address)
-		hexed_ipv6_destination_address = ipv6_address_and_mask[0] 
-		hexed_ipv6_destination_mask = ipv6_address_and_mask[1]
-		self.commands.append(':TSTReam:TABLe:ITEM:PROTocol:IPv6:DA:TYPE ' + str(ipv6_destination_address_type) + '\n')
-		self.commands.append(':TSTReam:TABLe:ITEM:PROTocol:IPv6:DA:VALue ' + str(hexed_ipv6_destination_address) + '\n')
-		self.commands.append(':TSTReam:TABLe:ITEM:PROTocol:IPv6:DA:MASK ' + str(hexed_ipv6_destination_mask) + '\n')
-		self.frame_queries[':TSTReam:TABLe:ITEM:PROTocol:IPv6:DA:TYPE?\n'] = str(ipv6_destination_address_type) + '\n'
-		self.frame_queries[':TSTReam:TABLe:ITEM:PROTocol:IPv6:DA:VALue?\n'] = str(hexed_ipv6_destination_address) + '\n'
-		self.frame_queries[':TSTReam:TABLe:ITEM:PROTocol:IPv6:DA:MASK?\n'] = str(hexed_ipv6_destination_mask) + '\n'
+		self.set([('ipv6_destination_type', ipv6_destination_address_type), ('ipv6_destination', ipv6_address_and_mask[0]), ('ipv6_destination_mask', ipv6_address_and_mask[1])])
+	def replicate(self, unit, module, port, destination=None):
+		"""Return a copy of this stream for another port. The port selection is changed, a source MAC address which carries the port identity (as made by MactoHex with 2 octets) gets the identity of the new port, and when a destination port is given, the destination MAC address becomes the source MAC address of that port. The last 2 octets of both addresses are kept.
+
+		:param unit: the unit (generator) number as a string of the new port
+		:param module: the module (network card) number as a string of the new port
+		:param port: the port number as a string of the new port
+		:param destination: an optional (unit, module, port) tuple of the port the copy sends to
+
+		"""
+		replica = copy.deepcopy(self)
+		replica.unit = unit
+		replica.module = module
+		replica.port = port
+		replica.port_commands = [':UENTry:ID ' + str(unit) + '\n', ':MODule:ID ' + str(module) + '\n', ':PORT:ID ' + str(port) + '\n']
+		replica.port_queries = {':UENTry:ID?\n': str(unit) + '\n', ':MODule:ID?\n': str(module) + '\n', ':PORT:ID?\n': str(port) + '\n'}
+		source = self.frame_queries.get(':TSTReam:TABLe:ITEM:FRAMe:ETHernet:SA:VALue?\n')
+		if source != None and source.rstrip('\n') == _port_mac(source.rstrip('\n'), self.unit, self.module, self.port):
+			replica._replace(':TSTReam:TABLe:ITEM:FRAMe:ETHernet:SA:VALue', _port_mac(source.rstrip('\n'), unit, module, port))
+		target = self.frame_queries.get(':TSTReam:TABLe:ITEM:FRAMe:ETHernet:DA:VALue?\n')
+		if target != None and destination != None:
+			replica._replace(':TSTReam:TABLe:ITEM:FRAMe:ETHernet:DA:VALue', _port_mac(target.rstrip('\n'), destination[0], destination[1], destination[2]))
+		return replica
+	def _replace(self, path, value):
+		"""Replace the value of a set command and its query."""
+		for teller, command in enumerate(self.commands):
+			if command.startswith(path + ' '):
+				self.commands[teller] = path + ' ' + str(value) + '\n'
+		for queries in (self.stream_queries, self.frame_queries):
+			if path + '?\n' in queries:
+				queries[path + '?\n'] = str(value) + '\n'
+
+def _port_mac(hexed_mac, unit, module, port):
+	"""Return the MAC address with the port identity of the given port and the last 2 octets of a hexed MAC address."""
+	octets = hexed_mac[-4:-2] + '-' + hexed_mac[-2:]
+	return convert_calc.MactoHex(octets, str(unit), str(module), str(port))
 
 # vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
@@ -0,0 +1,214 @@
+#	This program is free software: you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation, either version 3 of the License, or
+#	(at your option) any later version.
+#
+#	This program is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#	Copyright 2013, AMS-IX
+#	Original author: Sean Rijs
+#	Current maintainer: Stefan Plug
+#	Contact: stefan.plug@ams-ix.net
+#
+#	This library creates an API for Anritsu nework Generators
+#
+#!/bin/python
+
+"""
+sweep.py - this module runs frame size sweeps which are checkpointed to disk, so a sweep can be resumed after a lost connection or an interrupted run.
+"""
+
+import json
+import os
+import socket
+from time import sleep, time
+from anritsu import combined_tests, error, convert_calc, compare
+
+class Checkpoint:
+	"""An append-only file with one JSON line per completed trial.
+
+	:ivar path: the checkpoint file
+	:ivar completed: a dictionary with the key of every completed trial and its result
+
+	"""
+	def __init__(self, path):
+		"""Open a checkpoint file and read the trials completed before.
+
+		:param path: the checkpoint file, created when it doesn't exist
+
+		"""
+		self.path = path
+		self.completed = {}
+		if os.path.exists(path):
+			with open(path) as checkpoint_file:
+				for line in checkpoint_file:
+					# A line cut off by an interrupted run is skipped
+					try:
+						entry = json.loads(line)
+					except ValueError:
+						continue
+					self.completed[entry['trial']] = entry.get('result')
+	def done(self, key):
+		"""Return True if a trial is completed.
+
+		:param key: the key of the trial
+
+		"""
+		return key in self.completed
+	def complete(self, key, result=None):
+		"""Mark a trial as completed and write it to disk immediately.
+
+		:param key: the key of the trial
+		:param result: the result of the trial, must be JSON serializable
+
+		"""
+		with open(self.path, 'a') as checkpoint_file:
+			checkpoint_file.write(json.dumps({'trial': key, 'result': result}) + '\n')
+			checkpoint_file.flush()
+			os.fsync(checkpoint_file.fileno())
+		self.completed[key] = result
+
+def trial_key(p1, p2, sec, speed, frame_size, Gbps, learn):
+	"""Return the key which identifies a trial in a checkpoint file."""
+	return json.dumps([list(p1), list(p2), sec, speed, frame_size, Gbps, learn])
+
+def recover(anritsu_control, ports, retry_interval):
+	"""Reconnect to the analyzer and take ownership of the ports again, which also clears their counters and streams.
+
+	:param anritsu_control: an Analyzer object
+	:param ports: a list of (unit, module, port) tuples
+	:param retry_interval: the seconds to wait before reconnecting
+
+	"""
+	sleep(retry_interval)
+	anritsu_control.reconnect()
+	for location in ports:
+		anritsu_control.port_clear_own(location[0], location[1], location[2])
+
+def run_sweep(anritsu_control, p1, p2, sec, speed, frame_sizes, Gbps, learn, checkpoint_path, results=None, retries=3, retry_interval=10):
+	"""Run combined_tests.run for every frame size, like combined_tests.run_test, and checkpoint every completed trial. Completed trials in the checkpoint file are skipped, so running the same sweep again resumes at the first unfinished trial. When the connection times out or is lost, the analyzer is reconnected, the port ownership is taken again and the trial is restarted.
+
+	:param anritsu_control: an Analyzer object
+	:param p1: the first (unit, module, port)
+	:param p2: the second (unit, module, port)
+	:param sec: the seconds per trial
+	:param speed: the load in percent
+	:param frame_sizes: the list of frame sizes
+	:param Gbps: the speed of the ports in Gbps
+	:param learn: 1 for a learning sweep, 0 for a measured sweep
+	:param checkpoint_path: the checkpoint file
+	:param results: an optional results.ResultStore
+	:param retries: how many times a trial is retried after a lost connection
+	:param retry_interval: the seconds to wait before reconnecting
+
+	"""
+	checkpoint = Checkpoint(checkpoint_path)
+	for teller, frame_size in enumerate(frame_sizes):
+		key = trial_key(p1, p2, sec, speed, frame_size, Gbps, learn)
+		if checkpoint.done(key):
+			print('Test: ' + str(teller+1) + '/' + str(len(frame_sizes)) + ', frame size ' + str(frame_size) + ' Byte already completed')
+			continue
+		print('Test: ' + str(teller+1) + '/' + str(len(frame_sizes)) + ', frame size ' + str(frame_size) + ' Byte')
+		attempt = 0
+		while 1:
+			try:
+				result = combined_tests.run(anritsu_control, p1, p2, sec, speed, frame_size, Gbps, learn, results)
+				break
+			except (error.AnritsuTimeout, socket.error):
+				attempt = attempt + 1
+				if attempt > retries:
+					raise
+				print('connection lost, reconnecting (attempt ' + str(attempt) + '/' + str(retries) + ')')
+				try:
+					recover(anritsu_control, [p1, p2], retry_interval)
+				except socket.error:
+					print('reconnecting failed')
+		checkpoint.complete(key, result)
+		if results != None:
+			results.flush()
+	return checkpoint.completed
+
+class Prepared:
+	"""A trial of a pipelined sweep, with its streams built and its commit encoded.
+
+	:ivar group: the (p1, p2) port pair of the trial
+	:ivar frame_size: the frame size in bytes
+	:ivar frames: the amount of frames every port sends
+	:ivar encoded: the commit of its streams, encoded by Analyzer.encode_commit_batch
+	:ivar uploaded: True once the streams are committed on the ports
+
+	"""
+	def __init__(self, anritsu_control, group, sec, speed, frame_size, Gbps):
+		p1, p2 = group
+		mac_a = convert_calc.MactoHex('00-00', p1[0], p1[1], p1[2])
+		mac_b = convert_calc.MactoHex('00-00', p2[0], p2[1], p2[2])
+		IFG = convert_calc.calculate_inter_frame_gap(speed, 8, frame_size, Gbps)
+		self.group = group
+		self.frame_size = frame_size
+		self.frames = convert_calc.calculate_frames(sec, 8, IFG[0], frame_size, Gbps)
+		self.encoded = anritsu_control.encode_commit_batch([
+			combined_tests.port_stream(anritsu_control, p1, mac_a, mac_b, 1, self.frames, frame_size, IFG[1]),
+			combined_tests.port_stream(anritsu_control, p2, mac_b, mac_a, 1, self.frames, frame_size, IFG[1])])
+		self.uploaded = False
+	def upload(self, anritsu_control):
+		"""Initialize the ports of the trial and commit its streams, with one write and one pipelined read."""
+		anritsu_control.stream_commit_encoded(self.encoded, prefix=[anritsu_control.initialize_block(*location) for location in self.group])
+		for location in self.group:
+			anritsu_control.rates.clear(*location)
+		self.uploaded = True
+
+def run_pipelined(anritsu_control, groups, sec, speed, frame_sizes, Gbps, results=None):
+	"""Run a measured frame size sweep like combined_tests.run_test, but prepare the next trial while the current one transmits: its streams are built and their commit is encoded during the transmit window. The trials use the port groups in turn; when the next trial uses other ports than the current one, its streams are also committed during the transmit window, so switching trials is only a start. On a single group, the prepared commit is sent with one write after the current trial. Returns a list with the [result_a, result_b] list of every trial.
+
+	:param anritsu_control: an Analyzer object
+	:param groups: a list of (p1, p2) port pairs, each port a (unit, module, port) tuple
+	:param sec: the seconds per trial
+	:param speed: the load in percent
+	:param frame_sizes: the list of frame sizes
+	:param Gbps: the speed of the ports in Gbps
+	:param results: an optional results.ResultStore
+
+	"""
+	groups = [tuple(tuple(location) for location in group) for group in groups]
+	verdicts = []
+	prepared = Prepared(anritsu_control, groups[0], sec, speed, frame_sizes[0], Gbps)
+	prepared.upload(anritsu_control)
+	for teller, frame_size in enumerate(frame_sizes):
+		current = prepared
+		p1, p2 = current.group
+		print('Test: ' + str(teller+1) + '/' + str(len(frame_sizes)) + ', frame size ' + str(frame_size) + ' Byte on ' + '/'.join(p1) + ' and ' + '/'.join(p2))
+		started = time()
+		anritsu_control.count_transmit_group([p1, p2])
+		prepared = None
+		if teller + 1 < len(frame_sizes):
+			prepared = Prepared(anritsu_control, groups[(teller + 1) % len(groups)], sec, speed, frame_sizes[teller + 1], Gbps)
+			if not set(prepared.group) & set(current.group):
+				prepared.upload(anritsu_control)
+		anritsu_control.wait_for_transmission_group([p1, p2])
+		anritsu_control.stop_counter_group([p1, p2])
+		snapshot = anritsu_control.read_counter_snapshot([p1, p2])
+		rx_a = snapshot[p1]['Received frames']
+		rx_b = snapshot[p2]['Received frames']
+		# The transmitted frames counted by the senders, read in the same snapshot
+		tx_a = snapshot[p1]['Transmitted frames']
+		tx_b = snapshot[p2]['Transmitted frames']
+		result_a = compare.in_range(rx_a, current.frames, current.frames)
+		result_b = compare.in_range(rx_b, current.frames, current.frames)
+		if results != None:
+			elapsed = time() - started
+			results.record(test='throughput', tx_port='/'.join(p2), rx_port='/'.join(p1), frame_size=frame_size, load=speed, seconds=sec, expected_frames=current.frames, tx_frames=tx_b, rx_frames=rx_a, passed=result_a, elapsed=elapsed)
+			results.record(test='throughput', tx_port='/'.join(p1), rx_port='/'.join(p2), frame_size=frame_size, load=speed, seconds=sec, expected_frames=current.frames, tx_frames=tx_a, rx_frames=rx_b, passed=result_b, elapsed=elapsed)
+		verdicts.append([result_a, result_b])
+		if prepared != None and not prepared.uploaded:
+			prepared.upload(anritsu_control)
+	if results != None:
+		results.flush()
+	return verdicts
+
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
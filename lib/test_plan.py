@@ -0,0 +1,253 @@
+#	This program is free software: you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation, either version 3 of the License, or
+#	(at your option) any later version.
+#
+#	This program is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#	Copyright 2013, AMS-IX
+#	Original author: Sean Rijs
+#	Current maintainer: Stefan Plug
+#	Contact: stefan.plug@ams-ix.net
+#
+#	This library creates an API for Anritsu nework Generators
+#
+#!/bin/python
+
+"""
+test_plan.py - this module compiles declarative test plan files into batched command programs and runs them.
+
+A test plan is a JSON (or, when PyYAML is installed, YAML) file like::
+
+	{
+		"anritsu_type": "md1260a",
+		"ports": {"a": ["1", "1", "1"], "b": ["1", "1", "2"]},
+		"flows": [{"from": "a", "to": "b"}, {"from": "b", "to": "a"}],
+		"stream": [["protocol", "IPV4"], ["test_frame", "PRBS", "46"]],
+		"sweep": {"seconds": 1, "loads": [100], "frame_sizes": [64, 1518], "Gbps": 10, "learn": true},
+		"assertions": [{"port": "b", "counter": "rxframes", "minimum": "expected", "maximum": "expected"}]
+	}
+
+The 'stream' list holds the Stream method calls which are applied to every flow after its distribution, frames per burst, inter frame gap, frame size, source and destination address are set. When no 'assertions' are given, every receiving port is expected to receive exactly the frames sent to it. The 'counter' of an assertion can select out of the following set: 'txframes', 'rxframes', 'txtestframes', 'rxtestframes'. The value 'expected' in an assertion is replaced by the amount of frames sent to that port.
+"""
+
+import json
+from anritsu import port, stream, convert_calc, error
+
+# The counters port.read can read, BIP isn't included as port.read can't check the Anritsu type for it
+COUNTERS = ('txframes', 'rxframes', 'txtestframes', 'rxtestframes')
+
+DEFAULT_STREAM = [['protocol', 'IPV4'], ['ipv4_source_address', '127.0.0.1/24', 'STATIC'], ['ipv4_destination_address', '127.0.0.0/24', 'RANDOM'], ['test_frame', 'PRBS', '46']]
+
+def load(path):
+	"""Load a test plan file, files ending with '.yaml' or '.yml' are read with PyYAML.
+
+	:param path: the test plan file
+
+	"""
+	with open(path) as plan_file:
+		if path.endswith(('.yaml', '.yml')):
+			import yaml
+			return yaml.safe_load(plan_file)
+		return json.load(plan_file)
+
+class Trial:
+	"""One compiled trial of a test plan, every step holds the pre-joined messages of one batched write or pipelined read.
+
+	:ivar name: a description of the trial
+	:ivar learn: True for a learning trial, which has no assertions
+	:ivar setup: the messages to take ownership and clear all ports
+	:ivar streams: the stream objects to commit with one batched write
+	:ivar start: the messages to start all counters and then all transmitters
+	:ivar transmitting: the list of (unit, module, port) which transmit
+	:ivar stop: the messages to stop the counters of all ports
+	:ivar reads: a list of (port name, counter name) to read after the trial
+	:ivar read_messages: the selection and query messages of the reads
+	:ivar assertions: a list of (port name, counter name, minimum, maximum)
+	:ivar ports: a dictionary with the port name as key and its (unit, module, port) as value
+	:ivar expected: a dictionary with the port name as key and the amount of frames sent to it as value
+	:ivar parameters: a dictionary with the sweep values of the trial
+
+	"""
+	def __init__(self, name, learn, parameters):
+		self.name = name
+		self.learn = learn
+		self.parameters = parameters
+		self.setup = []
+		self.streams = []
+		self.start = []
+		self.transmitting = []
+		self.stop = []
+		self.reads = []
+		self.read_messages = []
+		self.assertions = []
+		self.ports = {}
+		self.expected = {}
+
+def compile_plan(plan, anritsu_type=None):
+	"""Compile a test plan into a list of trials.
+
+	:param plan: a test plan dictionary, as returned by load()
+	:param anritsu_type: the Anritsu type, defaults to the 'anritsu_type' of the plan
+
+	"""
+	if anritsu_type == None:
+		anritsu_type = plan.get('anritsu_type')
+	if anritsu_type == None:
+		raise ValueError('no anritsu_type given')
+	anritsu_type = str.lower(str(anritsu_type))
+	ports = dict((name, tuple(str(number) for number in location)) for name, location in plan['ports'].iteritems())
+	flows = plan['flows']
+	for flow in flows:
+		if flow['from'] not in ports or flow['to'] not in ports:
+			raise ValueError('flow uses an unknown port: ' + str(flow))
+	# An unknown counter has no query, which would shift the replies of all following reads
+	for assertion in plan.get('assertions') or []:
+		if assertion['port'] not in ports:
+			raise ValueError('assertion uses an unknown port: ' + str(assertion))
+		if assertion['counter'] not in COUNTERS:
+			raise ValueError('assertion uses an unknown counter: ' + str(assertion) + ', choose out of: ' + ', '.join(COUNTERS))
+	stream_calls = plan.get('stream', DEFAULT_STREAM)
+	sweep = plan.get('sweep', {})
+	seconds = sweep.get('seconds', 1)
+	Gbps = sweep.get('Gbps', 10)
+	loads = sweep.get('loads', [100])
+	frame_sizes = sweep.get('frame_sizes', [64])
+	# Every port is only used once per write, in the order of the plan
+	used = []
+	for flow in flows:
+		for name in (flow['from'], flow['to']):
+			if name not in used:
+				used.append(name)
+	sending = []
+	for flow in flows:
+		if flow['from'] not in sending:
+			sending.append(flow['from'])
+	receiving = []
+	for flow in flows:
+		if flow['to'] not in receiving:
+			receiving.append(flow['to'])
+	trials = []
+	for speed in loads:
+		for frame_size in frame_sizes:
+			passes = [False]
+			if sweep.get('learn', False):
+				passes = [True, False]
+			for learn in passes:
+				description = 'load ' + str(speed) + '%, frame size ' + str(frame_size) + ' Byte'
+				if learn:
+					description = 'learning, ' + description
+				trial = Trial(description, learn, {'load': speed, 'frame_size': frame_size, 'seconds': seconds, 'Gbps': Gbps})
+				IFG = convert_calc.calculate_inter_frame_gap(speed, 8, frame_size, Gbps)
+				frames = convert_calc.calculate_frames(seconds, 8, IFG[0], frame_size, Gbps)
+				trial.parameters['frames'] = frames
+				trial.ports = ports
+				for name in used:
+					trial.setup.extend(port.initialize(*ports[name]))
+				# Every sending port gets one stream per flow, all flows of a port share its load
+				stream_ids = {}
+				expected = {}
+				for flow in flows:
+					source = ports[flow['from']]
+					destination = ports[flow['to']]
+					stream_ids[flow['from']] = stream_ids.get(flow['from'], 0) + 1
+					share = flows_from(flows, flow['from'])
+					flow_frames = frames // share
+					expected[flow['to']] = expected.get(flow['to'], 0) + flow_frames
+					new_stream = stream.Stream(stream_ids[flow['from']], source[0], source[1], source[2], anritsu_type)
+					new_stream.distribution('NEXT')
+					new_stream.frames_per_burst(str(flow_frames))
+					new_stream.inter_frame_gap('FIXED', str(IFG[1]))
+					new_stream.frame_size('FIXED', frame_size)
+					new_stream.frame_source_address(convert_calc.MactoHex('00-00', source[0], source[1], source[2]))
+					new_stream.frame_destination_address(convert_calc.MactoHex('00-00', destination[0], destination[1], destination[2]))
+					for call in stream_calls:
+						getattr(new_stream, call[0])(*call[1:])
+					trial.streams.append(new_stream)
+				trial.expected = expected
+				for name in used:
+					trial.start.extend(port.count(*ports[name]))
+				for name in sending:
+					trial.start.extend(port.transmit(*ports[name]))
+					trial.transmitting.append(ports[name])
+				for name in used:
+					trial.stop.extend(port.stop_counter(*ports[name]))
+				if not learn:
+					assertions = plan.get('assertions')
+					if assertions == None:
+						assertions = [{'port': name, 'counter': 'rxframes', 'minimum': 'expected', 'maximum': 'expected'} for name in receiving]
+					for assertion in assertions:
+						minimum = assertion.get('minimum', 'expected')
+						maximum = assertion.get('maximum', 'expected')
+						if minimum == 'expected':
+							minimum = expected.get(assertion['port'], 0)
+						if maximum == 'expected':
+							maximum = expected.get(assertion['port'], 0)
+						trial.assertions.append((assertion['port'], assertion['counter'], int(minimum), int(maximum)))
+						if (assertion['port'], assertion['counter']) not in trial.reads:
+							trial.reads.append((assertion['port'], assertion['counter']))
+					for name, counter_name in trial.reads:
+						trial.read_messages.extend(port.select(*ports[name]))
+						trial.read_messages.extend(port.read(counter_name))
+				trials.append(trial)
+	return trials
+
+def flows_from(flows, name):
+	"""Return the amount of flows sent by a port.
+
+	:param flows: the list of flows of a test plan
+	:param name: the name of the port
+
+	"""
+	return len([flow for flow in flows if flow['from'] == name])
+
+def run(anritsu_control, trials, results=None):
+	"""Run compiled trials, returning a list with a (trial, passed, counter values) tuple for every measured trial.
+
+	:param anritsu_control: an Analyzer object
+	:param trials: a list of trials, as returned by compile_plan()
+	:param results: an optional results.ResultStore to record every assertion in, with its port, counter, value and range
+
+	"""
+	verdicts = []
+	for trial in trials:
+		print('Test: ' + trial.name)
+		anritsu_control.send_batch(trial.setup)
+		anritsu_control.stream_commit_batch(trial.streams)
+		anritsu_control.send_batch(trial.start)
+		anritsu_control.wait_for_transmission_group(trial.transmitting)
+		anritsu_control.send_batch(trial.stop)
+		if trial.learn:
+			continue
+		values = {}
+		replies = anritsu_control.send_recv_batch(trial.read_messages)
+		for read, data in zip(trial.reads, replies):
+			values[read] = int(str.split(data, ',')[1])
+		passed = True
+		for name, counter_name, minimum, maximum in trial.assertions:
+			value = values[(name, counter_name)]
+			assertion_passed = minimum <= value <= maximum
+			if not assertion_passed:
+				print('out of range, ' + name + ' ' + counter_name + ' = ' + str(value))
+				passed = False
+			if results != None:
+				location = '/'.join(trial.ports[name])
+				fields = {'port': location, 'counter': counter_name, 'value': value, 'minimum': minimum, 'maximum': maximum}
+				# Only frame counters fill the columns of the measured frames
+				if counter_name == 'rxframes':
+					fields.update(rx_port=location, rx_frames=value, expected_frames=trial.expected.get(name, 0))
+				elif counter_name == 'txframes':
+					fields.update(tx_port=location, tx_frames=value)
+				results.record(test=trial.name, frame_size=trial.parameters['frame_size'], load=trial.parameters['load'], seconds=trial.parameters['seconds'], passed=assertion_passed, **fields)
+		verdicts.append((trial, passed, values))
+	if results != None:
+		results.flush()
+	return verdicts
+
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
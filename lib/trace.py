@@ -0,0 +1,157 @@
+#	This program is free software: you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation, either version 3 of the License, or
+#	(at your option) any later version.
+#
+#	This program is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#	Copyright 2013, AMS-IX
+#	Original author: Sean Rijs
+#	Current maintainer: Stefan Plug
+#	Contact: stefan.plug@ams-ix.net
+#
+#	This library creates an API for Anritsu nework Generators
+#
+#!/bin/python
+
+"""
+trace.py - this module records spans of a test run and exports them as Chrome trace events (chrome://tracing or Perfetto), to see where calls overlap or block each other.
+"""
+
+import json
+import threading
+try:
+	from time import monotonic
+except ImportError:
+	# Python 2 has no monotonic clock in the standard library
+	from time import time as monotonic
+
+class Tracer:
+	"""Records spans in a preallocated buffer, so tracing adds no allocations of its own while the test runs. Spans recorded after the buffer is full are counted as dropped.
+
+	:ivar capacity: the maximum amount of spans
+	:ivar count: the amount of recorded spans
+	:ivar dropped: the amount of spans which didn't fit in the buffer
+
+	"""
+	def __init__(self, capacity=65536):
+		self.capacity = capacity
+		self.names = [None] * capacity
+		self.starts = [0.0] * capacity
+		self.durations = [0.0] * capacity
+		self.threads = [0] * capacity
+		self.arguments = [None] * capacity
+		self.count = 0
+		self.dropped = 0
+		self.origin = monotonic()
+		self.lock = threading.Lock()
+	def add(self, name, start, duration, arguments=None):
+		"""Record a span.
+
+		:param name: the name of the span
+		:param start: the start time, from the monotonic clock
+		:param duration: the duration in seconds
+		:param arguments: an optional dictionary shown with the span
+
+		"""
+		with self.lock:
+			index = self.count
+			if index >= self.capacity:
+				self.dropped = self.dropped + 1
+				return
+			self.count = index + 1
+		self.names[index] = name
+		self.starts[index] = start
+		self.durations[index] = duration
+		self.threads[index] = threading.current_thread().ident
+		self.arguments[index] = arguments
+	def span(self, name, arguments=None):
+		"""Return a context manager which records a span around its block.
+
+		:param name: the name of the span
+		:param arguments: an optional dictionary shown with the span
+
+		"""
+		return Span(self, name, arguments)
+	def instrument(self, anritsu_control):
+		"""Record a span around every public method call of an Analyzer object, the port arguments are shown with the span.
+
+		:param anritsu_control: an Analyzer object
+
+		"""
+		for name in dir(anritsu_control):
+			if name.startswith('_'):
+				continue
+			method = getattr(anritsu_control, name)
+			if not callable(method) or not hasattr(method, 'im_func'):
+				continue
+			setattr(anritsu_control, name, self._wrap(name, method))
+	def _wrap(self, name, method):
+		tracer = self
+		def traced(*arguments, **keywords):
+			start = monotonic()
+			try:
+				return method(*arguments, **keywords)
+			finally:
+				tracer.add(name, start, monotonic() - start, {'arguments': ' '.join(str(argument) for argument in arguments if isinstance(argument, (str, int)))})
+		traced.__doc__ = method.__doc__
+		return traced
+	def events(self):
+		"""Return the recorded spans as a list of Chrome trace events."""
+		events = []
+		for index in range(self.count):
+			event = {'name': self.names[index], 'ph': 'X', 'pid': 1, 'tid': self.threads[index], 'ts': (self.starts[index] - self.origin) * 1000000.0, 'dur': self.durations[index] * 1000000.0}
+			if self.arguments[index] != None:
+				event['args'] = self.arguments[index]
+			events.append(event)
+		return events
+	def export(self, path):
+		"""Write the recorded spans as a Chrome trace event JSON file.
+
+		:param path: the file to write
+
+		"""
+		with open(path, 'w') as trace_file:
+			json.dump({'traceEvents': self.events(), 'displayTimeUnit': 'ms', 'otherData': {'dropped': self.dropped}}, trace_file)
+
+class Span:
+	"""A context manager which records its block as a span of a tracer."""
+	def __init__(self, tracer, name, arguments):
+		self.tracer = tracer
+		self.name = name
+		self.arguments = arguments
+	def __enter__(self):
+		self.start = monotonic()
+		return self
+	def __exit__(self, exception_type, exception_value, traceback):
+		self.tracer.add(self.name, self.start, monotonic() - self.start, self.arguments)
+		return False
+
+class NoSpan:
+	"""A context manager which does nothing, used when tracing is off."""
+	def __enter__(self):
+		return self
+	def __exit__(self, exception_type, exception_value, traceback):
+		return False
+
+NO_SPAN = NoSpan()
+
+def span(tracer, name, arguments=None):
+	"""Return a span of the tracer, or a span which does nothing when the tracer is None.
+
+	:param tracer: a Tracer object or None
+	:param name: the name of the span
+	:param arguments: an optional dictionary shown with the span
+
+	"""
+	if tracer == None:
+		return NO_SPAN
+	return Span(tracer, name, arguments)
+
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
@@ -0,0 +1,136 @@
+#	This program is free software: you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation, either version 3 of the License, or
+#	(at your option) any later version.
+#
+#	This program is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#	Copyright 2013, AMS-IX
+#	Original author: Sean Rijs
+#	Current maintainer: Stefan Plug
+#	Contact: stefan.plug@ams-ix.net
+#
+#	This library creates an API for Anritsu nework Generators
+#
+#!/bin/python
+
+"""
+test_analyzer.py - tests how the replies of a batch of messages are read from the analyzer.
+"""
+
+import unittest
+import socket
+from anritsu import analyzer
+from anritsu import error
+
+class ScriptedSocket:
+	"""A socket-like object which records what is sent, and returns the given chunks on recv(), one chunk per call. When the chunks run out, recv() times out."""
+	def __init__(self, chunks=None):
+		self.chunks = list(chunks or [])
+		self.sent = []
+	def sendall(self, data):
+		self.sent.append(data)
+	def send(self, data):
+		self.sent.append(data)
+		return len(data)
+	def recv(self, size):
+		if not self.chunks:
+			raise socket.timeout()
+		return self.chunks.pop(0)
+	def close(self):
+		return None
+
+class SendRecvBatchTest(unittest.TestCase):
+	"""Analyzer.send_recv_batch sends all messages with one write and returns one reply per query, in order, however the replies are received."""
+	QUERIES = [':UENTry:ID 1\n:MODule:ID 1\n:PORT:ID 2\n', ':COUNter:TFRames?\n', ':COUNter:RFRames?\n', ':COUNter:ALARm?\n']
+	def new_analyzer(self, chunks):
+		self.connection = ScriptedSocket(chunks)
+		return analyzer.Analyzer('localhost', 'md1230b', connection=self.connection)
+	def test_one_write(self):
+		anritsu_control = self.new_analyzer(['x,1\nx,2\nx,3\n'])
+		anritsu_control.send_recv_batch(self.QUERIES)
+		self.assertEqual(self.connection.sent, [''.join(self.QUERIES)])
+	def test_replies_in_one_chunk(self):
+		anritsu_control = self.new_analyzer(['x,1\nx,2\nx,3\n'])
+		self.assertEqual(anritsu_control.send_recv_batch(self.QUERIES), ['x,1\n', 'x,2\n', 'x,3\n'])
+	def test_reply_split_across_chunks(self):
+		anritsu_control = self.new_analyzer(['x,1', '0\nx,', '2', '0\nx,30\n'])
+		self.assertEqual(anritsu_control.send_recv_batch(self.QUERIES), ['x,10\n', 'x,20\n', 'x,30\n'])
+	def test_reply_per_chunk(self):
+		anritsu_control = self.new_analyzer(['x,1\n', 'x,2\n', 'x,3\n'])
+		self.assertEqual(anritsu_control.send_recv_batch(self.QUERIES), ['x,1\n', 'x,2\n', 'x,3\n'])
+	def test_commands_only(self):
+		anritsu_control = self.new_analyzer([])
+		self.assertEqual(anritsu_control.send_recv_batch([':TSTReam:TABLe:ADD\n', ':TSTReam:TABLe:ID 1\n']), [])
+		self.assertEqual(self.connection.sent, [':TSTReam:TABLe:ADD\n:TSTReam:TABLe:ID 1\n'])
+	def test_timeout(self):
+		anritsu_control = self.new_analyzer(['x,1\nx,'])
+		try:
+			anritsu_control.send_recv_batch(self.QUERIES)
+		except error.AnritsuTimeout as timeout:
+			# The query of the first missing reply
+			self.assertEqual(timeout.command, ':COUNter:RFRames?\n')
+		else:
+			self.fail('AnritsuTimeout not raised')
+	def test_closed_connection(self):
+		anritsu_control = self.new_analyzer(['x,1\n', ''])
+		self.assertRaises(error.AnritsuTimeout, anritsu_control.send_recv_batch, self.QUERIES)
+
+class ModuleSendRecvBatchTest(unittest.TestCase):
+	"""The module level send_recv_batch works on any socket, e.g. the socket of a monitor connection."""
+	def test_replies(self):
+		connection = ScriptedSocket(['x,5\nx', ',6\n'])
+		self.assertEqual(analyzer.send_recv_batch(connection, [':COUNter:TFRames?\n', ':COUNter:RFRames?\n']), ['x,5\n', 'x,6\n'])
+		self.assertEqual(connection.sent, [':COUNter:TFRames?\n:COUNter:RFRames?\n'])
+	def test_timeout(self):
+		connection = ScriptedSocket([])
+		self.assertRaises(error.AnritsuTimeout, analyzer.send_recv_batch, connection, [':COUNter:TFRames?\n'])
+
+class ConnectionTest(unittest.TestCase):
+	"""A Connection only selects a port again when another port was selected on it."""
+	SELECT = ':UENTry:ID 1\n:MODule:ID 1\n:PORT:ID 2\n'
+	QUERY = ':COUNter:TFRames?\n'
+	def test_first_query_selects(self):
+		connection = analyzer.Connection(ScriptedSocket(['x,1\n']))
+		self.assertEqual(connection.query([(('1', '1', '2'), [self.QUERY])]), ['x,1\n'])
+		self.assertEqual(connection.socket.sent, [self.SELECT + self.QUERY])
+		self.assertEqual(connection.selected, ('1', '1', '2'))
+	def test_same_port_not_selected_again(self):
+		connection = analyzer.Connection(ScriptedSocket(['x,1\n', 'x,2\n']))
+		connection.query([(('1', '1', '2'), [self.QUERY])])
+		# Numbers and strings select the same port
+		connection.query([((1, 1, 2), [self.QUERY])])
+		self.assertEqual(connection.socket.sent, [self.SELECT + self.QUERY, self.QUERY])
+	def test_other_port_selected(self):
+		connection = analyzer.Connection(ScriptedSocket(['x,1\n', 'x,2\n']))
+		connection.query([(('1', '1', '2'), [self.QUERY])])
+		connection.query([(('1', '1', '3'), [self.QUERY])])
+		self.assertEqual(connection.socket.sent[1], ':UENTry:ID 1\n:MODule:ID 1\n:PORT:ID 3\n' + self.QUERY)
+		self.assertEqual(connection.selected, ('1', '1', '3'))
+	def test_selecting_messages_reset_the_selection(self):
+		connection = analyzer.Connection(ScriptedSocket(['x,1\n', 'x,2\n']))
+		connection.query([(('1', '1', '2'), [self.QUERY])])
+		connection.query([(None, [':PORT:ID 3\n', self.QUERY])])
+		self.assertEqual(connection.selected, None)
+		connection.query([(('1', '1', '2'), [])])
+		self.assertEqual(connection.socket.sent[2], self.SELECT)
+	def test_no_tracking(self):
+		connection = analyzer.Connection(ScriptedSocket(['x,1\n', 'x,2\n']), tracking=False)
+		connection.query([(('1', '1', '2'), [self.QUERY])])
+		connection.query([(('1', '1', '2'), [self.QUERY])])
+		self.assertEqual(connection.socket.sent, [self.SELECT + self.QUERY, self.SELECT + self.QUERY])
+	def test_failed_request_forgets_the_selection(self):
+		connection = analyzer.Connection(ScriptedSocket([]))
+		self.assertRaises(error.AnritsuTimeout, connection.query, [(('1', '1', '2'), [self.QUERY])])
+		self.assertEqual(connection.selected, None)
+
+if __name__ == '__main__':
+	unittest.main()
+
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
@@ -0,0 +1,263 @@
+#	This program is free software: you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation, either version 3 of the License, or
+#	(at your option) any later version.
+#
+#	This program is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#	Copyright 2013, AMS-IX
+#	Original author: Sean Rijs
+#	Current maintainer: Stefan Plug
+#	Contact: stefan.plug@ams-ix.net
+#
+#	This library creates an API for Anritsu nework Generators
+#
+#!/bin/python
+
+"""
+test_stream.py - pins the command and query messages of every Stream setter, as the Anritsu expects them, and the ValueError of invalid input.
+"""
+
+import unittest
+from anritsu import stream, convert_calc
+
+class StreamMessagesTest(unittest.TestCase):
+	"""Every setter must create exactly these command messages, in this order, and these verification queries."""
+	def new_stream(self):
+		return stream.Stream('1', '1', '1', '2', 'md1230b')
+	def assertMessages(self, stream_object, commands, stream_queries=None, frame_queries=None):
+		self.assertEqual(stream_object.commands[2:], commands)
+		expected_stream_queries = {':TSTReam:TABLe:ID?\n': '1\n'}
+		expected_stream_queries.update(stream_queries or {})
+		self.assertEqual(stream_object.stream_queries, expected_stream_queries)
+		self.assertEqual(stream_object.frame_queries, frame_queries or {})
+	def test_init(self):
+		stream_object = self.new_stream()
+		self.assertEqual(stream_object.commands, [':TSTReam:TABLe:ADD\n', ':TSTReam:TABLe:ID 1\n'])
+		self.assertEqual(stream_object.port_commands, [':UENTry:ID 1\n', ':MODule:ID 1\n', ':PORT:ID 2\n'])
+		self.assertEqual(stream_object.port_queries, {':UENTry:ID?\n': '1\n', ':MODule:ID?\n': '1\n', ':PORT:ID?\n': '2\n'})
+		self.assertMessages(stream_object, [])
+	def test_distribution(self):
+		stream_object = self.new_stream()
+		stream_object.distribution('NEXT')
+		self.assertMessages(stream_object, [':TSTReam:TABLe:ITEM:CONTrol:DISTribution NEXT\n'], {':TSTReam:TABLe:ITEM:CONTrol:DISTribution?\n': 'NEXT\n'})
+	def test_distribution_jump_count(self):
+		stream_object = self.new_stream()
+		stream_object.distribution('JUMP_COUNT', '2', '3')
+		self.assertMessages(stream_object, [
+			':TSTReam:TABLe:ITEM:CONTrol:DISTribution JUMP_COUNT\n',
+			':TSTReam:TABLe:ITEM:CONTrol:JTID 2\n',
+			':TSTReam:TABLe:ITEM:CONTrol:COUNt 3\n'], {
+			':TSTReam:TABLe:ITEM:CONTrol:DISTribution?\n': 'JUMP_COUNT\n',
+			':TSTReam:TABLe:ITEM:CONTrol:JTID?\n': '2\n',
+			':TSTReam:TABLe:ITEM:CONTrol:COUNt?\n': '3\n'})
+	def test_inter_burst_gap(self):
+		stream_object = self.new_stream()
+		stream_object.inter_burst_gap('100')
+		self.assertMessages(stream_object, [':TSTReam:TABLe:ITEM:CONTrol:GAP:IBG 100\n'], {':TSTReam:TABLe:ITEM:CONTrol:GAP:IBG?\n': '100\n'})
+	def test_inter_stream_gap(self):
+		stream_object = self.new_stream()
+		stream_object.inter_stream_gap('200')
+		self.assertMessages(stream_object, [':TSTReam:TABLe:ITEM:CONTrol:GAP:ISG 200\n'], {':TSTReam:TABLe:ITEM:CONTrol:GAP:ISG?\n': '200\n'})
+	def test_inter_frame_gap_fixed(self):
+		stream_object = self.new_stream()
+		stream_object.inter_frame_gap('FIXED', '300')
+		self.assertMessages(stream_object, [
+			':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:TYPE FIXED\n',
+			':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:VALue 300\n'], {
+			':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:TYPE?\n': 'FIXED\n',
+			':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:VALue?\n': '300\n'})
+	def test_inter_frame_gap_random(self):
+		stream_object = self.new_stream()
+		stream_object.inter_frame_gap('RANDOM', '100', '400')
+		# The Anritsu reports the minimum of a random IFG as its value
+		self.assertMessages(stream_object, [
+			':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:TYPE RANDOM\n',
+			':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:MINimum 100\n',
+			':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:MAXimum 400\n'], {
+			':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:TYPE?\n': 'RANDOM\n',
+			':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:VALue?\n': '100\n',
+			':TSTReam:TABLe:ITEM:CONTrol:GAP:IFG:MAXimum?\n': '400\n'})
+	def test_burst_per_stream(self):
+		stream_object = self.new_stream()
+		stream_object.burst_per_stream('5')
+		self.assertMessages(stream_object, [':TSTReam:TABLe:ITEM:CONTrol:BPSTream 5\n'], {':TSTReam:TABLe:ITEM:CONTrol:BPSTream?\n': '5\n'})
+	def test_frames_per_burst(self):
+		stream_object = self.new_stream()
+		stream_object.frames_per_burst('1000')
+		self.assertMessages(stream_object, [':TSTReam:TABLe:ITEM:CONTrol:FPBurst 1000\n'], {':TSTReam:TABLe:ITEM:CONTrol:FPBurst?\n': '1000\n'})
+	def test_frame_size_fixed(self):
+		stream_object = self.new_stream()
+		stream_object.frame_size('FIXED', '512')
+		self.assertMessages(stream_object, [
+			':TSTReam:TABLe:ITEM:FSIZe:TYPE FIXED\n',
+			':TSTReam:TABLe:ITEM:FSIZe:VALue 512\n'], {
+			':TSTReam:TABLe:ITEM:FSIZe:TYPE?\n': 'FIXED\n',
+			':TSTReam:TABLe:ITEM:FSIZe:VALue?\n': '512\n'})
+	def test_frame_size_random(self):
+		stream_object = self.new_stream()
+		stream_object.frame_size('RANDOM', '64', '1518')
+		self.assertMessages(stream_object, [
+			':TSTReam:TABLe:ITEM:FSIZe:TYPE RANDOM\n',
+			':TSTReam:TABLe:ITEM:FSIZe:MINimum 64\n',
+			':TSTReam:TABLe:ITEM:FSIZe:MAXimum 1518\n'], {
+			':TSTReam:TABLe:ITEM:FSIZe:TYPE?\n': 'RANDOM\n',
+			':TSTReam:TABLe:ITEM:FSIZe:MINimum?\n': '64\n',
+			':TSTReam:TABLe:ITEM:FSIZe:MAXimum?\n': '1518\n'})
+	def test_frame_source_address(self):
+		stream_object = self.new_stream()
+		stream_object.frame_source_address('#H000001000102')
+		self.assertMessages(stream_object, [
+			':TSTReam:TABLe:ITEM:FRAMe:ETHernet:SA:VALue #H000001000102\n',
+			':TSTReam:TABLe:ITEM:FRAMe:ETHernet:SA:MASK #HFFFFFFFFFFFF\n',
+			':TSTReam:TABLe:ITEM:FRAMe:ETHernet:SA:TYPE STATIC\n'], frame_queries={
+			':TSTReam:TABLe:ITEM:FRAMe:ETHernet:SA:VALue?\n': '#H000001000102\n',
+			':TSTReam:TABLe:ITEM:FRAMe:ETHernet:SA:MASK?\n': '#HFFFFFFFFFFFF\n',
+			':TSTReam:TABLe:ITEM:FRAMe:ETHernet:SA:TYPE?\n': 'STATIC\n'})
+	def test_frame_destination_address(self):
+		stream_object = self.new_stream()
+		stream_object.frame_destination_address('#H000001000203', '00-00-00-FF-FF-FF', 'INCREMENT')
+		self.assertMessages(stream_object, [
+			':TSTReam:TABLe:ITEM:FRAMe:ETHernet:DA:VALue #H000001000203\n',
+			':TSTReam:TABLe:ITEM:FRAMe:ETHernet:DA:MASK #H000000FFFFFF\n',
+			':TSTReam:TABLe:ITEM:FRAMe:ETHernet:DA:TYPE INCREMENT\n'], frame_queries={
+			':TSTReam:TABLe:ITEM:FRAMe:ETHernet:DA:VALue?\n': '#H000001000203\n',
+			':TSTReam:TABLe:ITEM:FRAMe:ETHernet:DA:MASK?\n': '#H000000FFFFFF\n',
+			':TSTReam:TABLe:ITEM:FRAMe:ETHernet:DA:TYPE?\n': 'INCREMENT\n'})
+	def test_protocol(self):
+		stream_object = self.new_stream()
+		stream_object.protocol('IPV4')
+		self.assertMessages(stream_object, [':TSTReam:TABLe:ITEM:PROTocol:TYPE IPV4\n'], frame_queries={':TSTReam:TABLe:ITEM:PROTocol:TYPE?\n': 'IPV4\n'})
+	def test_test_frame_prbs(self):
+		stream_object = self.new_stream()
+		stream_object.test_frame('PRBS', '46')
+		self.assertMessages(stream_object, [
+			':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:ENABle 1\n',
+			':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TYPE TEST_FRAME\n',
+			':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TFRame:TYPE PRBS\n',
+			':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:LENGth 46\n'], frame_queries={
+			':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:ENABle?\n': '1\n',
+			':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TYPE?\n': 'TEST_FRAME\n',
+			':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TFRame:TYPE?\n': 'PRBS\n',
+			':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:LENGth?\n': '46\n',
+			':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:ITFRame?\n': '1\n'})
+	def test_test_frame_flow(self):
+		stream_object = self.new_stream()
+		stream_object.test_frame('FLOW', '34', '7')
+		self.assertMessages(stream_object, [
+			':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:ENABle 1\n',
+			':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TYPE TEST_FRAME\n',
+			':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TFRame:TYPE FLOW_ID\n',
+			':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TFRame:FID 7\n',
+			':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:OFFSet 34\n'], frame_queries={
+			':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:ENABle?\n': '1\n',
+			':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TYPE?\n': 'TEST_FRAME\n',
+			':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TFRame:TYPE?\n': 'FLOW_ID\n',
+			':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:TFRame:FID?\n': '7\n',
+			':TSTReam:TABLe:ITEM:FRAMe:DFIeld1:OFFSet?\n': '34\n'})
+	def test_ethernet_error(self):
+		stream_object = self.new_stream()
+		stream_object.ethernet_error('FCS')
+		self.assertMessages(stream_object, [':TSTReam:TABLe:ITEM:ERRor:ETHernet:TYPE FCS\n'], frame_queries={':TSTReam:TABLe:ITEM:ERRor:ETHernet:TYPE?\n': 'FCS\n'})
+	def test_ipv4_error(self):
+		stream_object = self.new_stream()
+		stream_object.ipv4_error('CHECKSUM')
+		self.assertMessages(stream_object, [':TSTReam:TABLe:ITEM:ERRor:IP:TYPE CHECKSUM\n'], frame_queries={':TSTReam:TABLe:ITEM:ERRor:IP:TYPE?\n': 'CHECKSUM\n'})
+	def test_arp(self):
+		stream_object = self.new_stream()
+		stream_object.arp('ARP reply', '00-DE-BB-00-00-01', '192.168.1.3/32', '00-DE-BB-00-00-02', '192.168.1.4/32')
+		self.assertMessages(stream_object, [
+			':TSTReam:TABLe:ITEM:PROTocol:ARP:OPERation 2\n',
+			':TSTReam:TABLe:ITEM:PROTocol:ARP:SMADdress #H00DEBB000001\n',
+			':TSTReam:TABLe:ITEM:PROTocol:ARP:SIADdress #HC0A80103\n',
+			':TSTReam:TABLe:ITEM:PROTocol:ARP:TIADdress #HC0A80104\n',
+			':TSTReam:TABLe:ITEM:PROTocol:ARP:TMADdress #H00DEBB000002\n'], frame_queries={
+			':TSTReam:TABLe:ITEM:PROTocol:ARP:OPERation?\n': '2\n',
+			':TSTReam:TABLe:ITEM:PROTocol:ARP:SMADdress?\n': '#H00DEBB000001\n',
+			':TSTReam:TABLe:ITEM:PROTocol:ARP:SIADdress?\n': '#HC0A80103\n',
+			':TSTReam:TABLe:ITEM:PROTocol:ARP:TIADdress?\n': '#HC0A80104\n',
+			':TSTReam:TABLe:ITEM:PROTocol:ARP:TMADdress?\n': '#H00DEBB000002\n'})
+	def test_ipv4_source_address(self):
+		stream_object = self.new_stream()
+		stream_object.ipv4_source_address('127.0.0.1/24')
+		self.assertMessages(stream_object, [
+			':TSTReam:TABLe:ITEM:PROTocol:IP:SA:TYPE STATIC\n',
+			':TSTReam:TABLe:ITEM:PROTocol:IP:SA:VALue #H7F000001\n',
+			':TSTReam:TABLe:ITEM:PROTocol:IP:SA:MASK #HFFFFFF00\n'], frame_queries={
+			':TSTReam:TABLe:ITEM:PROTocol:IP:SA:TYPE?\n': 'STATIC\n',
+			':TSTReam:TABLe:ITEM:PROTocol:IP:SA:VALue?\n': '#H7F000001\n',
+			':TSTReam:TABLe:ITEM:PROTocol:IP:SA:MASK?\n': '#HFFFFFF00\n'})
+	def test_ipv4_destination_address(self):
+		stream_object = self.new_stream()
+		stream_object.ipv4_destination_address('127.0.0.0/24', 'RANDOM')
+		self.assertMessages(stream_object, [
+			':TSTReam:TABLe:ITEM:PROTocol:IP:DA:TYPE RANDOM\n',
+			':TSTReam:TABLe:ITEM:PROTocol:IP:DA:VALue #H7F000000\n',
+			':TSTReam:TABLe:ITEM:PROTocol:IP:DA:MASK #HFFFFFF00\n'], frame_queries={
+			':TSTReam:TABLe:ITEM:PROTocol:IP:DA:TYPE?\n': 'RANDOM\n',
+			':TSTReam:TABLe:ITEM:PROTocol:IP:DA:VALue?\n': '#H7F000000\n',
+			':TSTReam:TABLe:ITEM:PROTocol:IP:DA:MASK?\n': '#HFFFFFF00\n'})
+	def test_ipv6_source_address(self):
+		stream_object = self.new_stream()
+		stream_object.ipv6_source_address('fe80::dead:beef/64')
+		address, mask = convert_calc.IPtoHex('fe80::dead:beef/64')
+		self.assertMessages(stream_object, [
+			':TSTReam:TABLe:ITEM:PROTocol:IPv6:SA:TYPE STATIC\n',
+			':TSTReam:TABLe:ITEM:PROTocol:IPv6:SA:VALue ' + address + '\n',
+			':TSTReam:TABLe:ITEM:PROTocol:IPv6:SA:MASK ' + mask + '\n'], frame_queries={
+			':TSTReam:TABLe:ITEM:PROTocol:IPv6:SA:TYPE?\n': 'STATIC\n',
+			':TSTReam:TABLe:ITEM:PROTocol:IPv6:SA:VALue?\n': address + '\n',
+			':TSTReam:TABLe:ITEM:PROTocol:IPv6:SA:MASK?\n': mask + '\n'})
+	def test_ipv6_destination_address(self):
+		stream_object = self.new_stream()
+		stream_object.ipv6_destination_address('fe80::dead:beef/64', 'INCREMENT')
+		address, mask = convert_calc.IPtoHex('fe80::dead:beef/64')
+		self.assertMessages(stream_object, [
+			':TSTReam:TABLe:ITEM:PROTocol:IPv6:DA:TYPE INCREMENT\n',
+			':TSTReam:TABLe:ITEM:PROTocol:IPv6:DA:VALue ' + address + '\n',
+			':TSTReam:TABLe:ITEM:PROTocol:IPv6:DA:MASK ' + mask + '\n'], frame_queries={
+			':TSTReam:TABLe:ITEM:PROTocol:IPv6:DA:TYPE?\n': 'INCREMENT\n',
+			':TSTReam:TABLe:ITEM:PROTocol:IPv6:DA:VALue?\n': address + '\n',
+			':TSTReam:TABLe:ITEM:PROTocol:IPv6:DA:MASK?\n': mask + '\n'})
+
+class StreamValidationTest(unittest.TestCase):
+	"""Invalid input raises a ValueError and leaves the stream unchanged."""
+	def assertRejected(self, setter, *arguments):
+		stream_object = stream.Stream('1', '1', '1', '2', 'md1230b')
+		commands = list(stream_object.commands)
+		stream_queries = dict(stream_object.stream_queries)
+		frame_queries = dict(stream_object.frame_queries)
+		self.assertRaises(ValueError, getattr(stream_object, setter), *arguments)
+		self.assertEqual(stream_object.commands, commands)
+		self.assertEqual(stream_object.stream_queries, stream_queries)
+		self.assertEqual(stream_object.frame_queries, frame_queries)
+	def test_unknown_string(self):
+		self.assertRejected('distribution', 'SOMETIMES')
+		self.assertRejected('protocol', 'IPV5')
+		self.assertRejected('ethernet_error', 'CRC')
+		self.assertRejected('test_frame', 'flow', '34', '7')
+		self.assertRejected('arp', 'ARP answer', '00-DE-BB-00-00-01', '192.168.1.3/32', '00-DE-BB-00-00-02', '192.168.1.4/32')
+	def test_out_of_range(self):
+		self.assertRejected('frame_size', 'FIXED', '7')
+		self.assertRejected('frame_size', 'FIXED', '65281')
+		self.assertRejected('frames_per_burst', '0')
+		self.assertRejected('inter_burst_gap', '1200000000001')
+		self.assertRejected('test_frame', 'FLOW', '34', '65536')
+	def test_not_an_integer(self):
+		self.assertRejected('frames_per_burst', 'many')
+		self.assertRejected('frame_size', 'FIXED', None)
+	def test_later_invalid_value(self):
+		# The first setting is valid, but nothing is set because the last one is not
+		self.assertRejected('distribution', 'JUMP_COUNT', '2', '0')
+		self.assertRejected('frame_size', 'RANDOM', '64', '70000')
+
+if __name__ == '__main__':
+	unittest.main()
+
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
@@ -0,0 +1,92 @@
+#	This program is free software: you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation, either version 3 of the License, or
+#	(at your option) any later version.
+#
+#	This program is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#	Copyright 2013, AMS-IX
+#	Original author: Sean Rijs
+#	Current maintainer: Stefan Plug
+#	Contact: stefan.plug@ams-ix.net
+#
+#	This library creates an API for Anritsu nework Generators
+#
+#!/bin/python
+
+"""
+test_test_plan.py - compiles test plans and runs them on a loopback.LoopbackSocket.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from anritsu import analyzer, loopback, results, test_plan
+
+class CountingSocket(loopback.LoopbackSocket):
+	"""A LoopbackSocket whose counters differ per counter and port, so a reply read for the wrong counter shows."""
+	COUNTERS = {':COUNter:TRANsmitted:FRAMes': 1000, ':COUNter:RECeived:FRAMes': 2000, ':COUNter:TRANsmitted:TFRames': 3000, ':COUNter:RECeived:TFRames': 4000}
+	def reply(self, path):
+		if path in self.COUNTERS:
+			return '0,' + str(self.COUNTERS[path] + int(self.selected[':PORT:ID']))
+		return loopback.LoopbackSocket.reply(self, path)
+
+PLAN = {
+	'anritsu_type': 'md1260a',
+	'ports': {'a': ['1', '1', '1'], 'b': ['1', '1', '2']},
+	'flows': [{'from': 'a', 'to': 'b'}],
+	'sweep': {'frame_sizes': [64]},
+	'assertions': [
+		{'port': 'b', 'counter': 'rxframes', 'minimum': 0, 'maximum': 2002},
+		{'port': 'a', 'counter': 'txtestframes', 'minimum': 3001, 'maximum': 3001},
+		{'port': 'a', 'counter': 'txframes', 'minimum': 0, 'maximum': 1000}]}
+
+class TestPlanTest(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.anritsu_control = analyzer.Analyzer('localhost', 'md1260a', connection=CountingSocket())
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+	def test_unknown_counter(self):
+		plan = dict(PLAN, assertions=[{'port': 'b', 'counter': 'fcs'}])
+		self.assertRaises(ValueError, test_plan.compile_plan, plan)
+	def test_unknown_port(self):
+		plan = dict(PLAN, assertions=[{'port': 'c', 'counter': 'rxframes'}])
+		self.assertRaises(ValueError, test_plan.compile_plan, plan)
+	def test_run(self):
+		trials = test_plan.compile_plan(PLAN)
+		self.assertEqual(len(trials), 1)
+		verdicts = test_plan.run(self.anritsu_control, trials)
+		trial, passed, values = verdicts[0]
+		self.assertEqual(values, {('b', 'rxframes'): 2002, ('a', 'txtestframes'): 3001, ('a', 'txframes'): 1001})
+		# Only the transmitted frames of port a are out of range
+		self.assertFalse(passed)
+	def test_results(self):
+		path = os.path.join(self.directory, 'results.jsonl')
+		store = results.ResultStore(path, 'jsonl')
+		test_plan.run(self.anritsu_control, test_plan.compile_plan(PLAN), store)
+		records = dict((record['counter'], record) for record in results.read(path, 'jsonl'))
+		self.assertEqual(records['rxframes']['rx_port'], '1/1/2')
+		self.assertEqual(records['rxframes']['rx_frames'], 2002)
+		self.assertEqual(records['rxframes']['expected_frames'], test_plan.compile_plan(PLAN)[0].expected['b'])
+		self.assertEqual(records['txframes']['tx_port'], '1/1/1')
+		self.assertEqual(records['txframes']['tx_frames'], 1001)
+		self.assertFalse(records['txframes']['passed'])
+		# Other counters only fill their own columns
+		self.assertEqual(records['txtestframes']['value'], 3001)
+		self.assertEqual(records['txtestframes']['port'], '1/1/1')
+		self.assertEqual((records['txtestframes']['minimum'], records['txtestframes']['maximum']), (3001, 3001))
+		self.assertEqual(records['txtestframes']['rx_frames'], None)
+		self.assertEqual(records['txtestframes']['expected_frames'], None)
+
+if __name__ == '__main__':
+	unittest.main()
+
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4